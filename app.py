@@ -3,8 +3,17 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from pulp import LpMaximize, LpProblem, LpVariable, lpSum
 import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import functools
+from collections import Counter
+from contextlib import closing, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import heapq
 from dotenv import load_dotenv
 import joblib
 from google import genai
@@ -12,6 +21,17 @@ from google.genai import types
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from sklearn.neighbors import NearestNeighbors
+from match_simulator import score_summary, simulate_match
+from season_planner import plan_season
+from team_solver import (GRID_FIELDS, available_backends, merge_specs, parse_spec, scenario_grid, select_team,
+                         solve_scenarios)
+from ingest_scorecards import FORM_HALF_LIFE_DAYS, FORM_WINDOW, FORM_YEAR_DAYS, load_aggregates
+from player_names import PLAYER_ALIASES, build_player_index, register_player, initials_matches, resolve_player
+from price_models import (FORM_FIELDS, INTERVAL_LEVELS, RAW_PLAYER_FIELDS, FeatureStore, conformal_bounds,
+                          engineer_features_batch, impact_breakdown_batch, interval_path, load_xgb_price_model,
+                          player_stats_key, predict_with_contributions, uses_recent_form, xgb_predict_log_prices,
+                          xgb_predict_with_contributions, xgb_prices_crore)
 
 # Load environment variables
 load_dotenv()
@@ -24,617 +44,158 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # We'll handle navigation ourselves
 )
 
+# Instrumentation: timing spans around hot paths, off unless one of these is set
+#   APP_INSTRUMENTATION=1  per-rerun debug panel
+#   APP_METRICS_LOG=path   one JSON line per rerun
+#   APP_METRICS_PORT=9108  Prometheus text format on http://127.0.0.1:<port>/metrics
+METRICS_LOG_PATH = os.getenv("APP_METRICS_LOG")
+METRICS_PORT = os.getenv("APP_METRICS_PORT")
+INSTRUMENTATION = os.getenv("APP_INSTRUMENTATION") == "1" or bool(METRICS_LOG_PATH or METRICS_PORT)
+
+# The script re-executes on every rerun, so this holds the current rerun's spans only
+_RERUN = {'started': time.perf_counter(), 'spans': [], 'finished': False}
+
+@st.cache_resource
+def metrics_registry():
+    """Process-wide totals shared by all sessions (and the Prometheus endpoint)."""
+    return {'lock': threading.Lock(), 'seconds': Counter(), 'calls': Counter(),
+            'rows': Counter(), 'cache_misses': Counter(), 'reruns': Counter()}
+
+class _Span:
+    __slots__ = ('stage', 'rows', 'start')
+
+    def __init__(self, stage, rows):
+        self.stage, self.rows = stage, rows
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _RERUN['spans'].append({'stage': self.stage, 'ms': round(seconds * 1000, 3), 'rows': self.rows})
+        registry = metrics_registry()
+        with registry['lock']:
+            registry['seconds'][self.stage] += seconds
+            registry['calls'][self.stage] += 1
+            if self.rows:
+                registry['rows'][self.stage] += self.rows
+
+_NO_SPAN = nullcontext()
+
+def timing(stage, rows=None):
+    """Time a block as `stage`; a shared no-op context when instrumentation is off."""
+    return _Span(stage, rows) if INSTRUMENTATION else _NO_SPAN
+
+def timed(stage, rows=None):
+    """Decorator form of timing(); rows(*args) gives the number of rows processed.
+
+    Place it above st.cache_* so cache hits are timed too; the cached body calls
+    note_cache_miss(stage), so hits = calls - misses.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENTATION:
+                return fn(*args, **kwargs)
+            with _Span(stage, rows(*args, **kwargs) if rows else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def note_cache_miss(stage):
+    if INSTRUMENTATION:
+        registry = metrics_registry()
+        with registry['lock']:
+            registry['cache_misses'][stage] += 1
+
+def log_rerun(scope, seconds, spans):
+    """Count a rerun and append its breakdown to the JSON log sink."""
+    registry = metrics_registry()
+    with registry['lock']:
+        registry['reruns'][scope] += 1
+        if METRICS_LOG_PATH:
+            with open(METRICS_LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'ts': time.time(), 'scope': scope, 'ms': round(seconds * 1000, 3),
+                                    'spans': spans}) + "\n")
+
+def prometheus_text(registry):
+    """Render the registry in the Prometheus text exposition format."""
+    with registry['lock']:
+        series = [
+            ('app_stage_seconds_total', 'stage', registry['seconds']),
+            ('app_stage_calls_total', 'stage', registry['calls']),
+            ('app_stage_rows_total', 'stage', registry['rows']),
+            ('app_cache_misses_total', 'stage', registry['cache_misses']),
+            ('app_reruns_total', 'scope', registry['reruns']),
+        ]
+        lines = []
+        for metric, label, values in series:
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f'{metric}{{{label}="{key}"}} {value:.6g}' for key, value in sorted(values.items()))
+    return "\n".join(lines) + "\n"
+
+@st.cache_resource
+def start_metrics_server(port):
+    registry = metrics_registry()
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = prometheus_text(registry).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if METRICS_PORT:
+    start_metrics_server(int(METRICS_PORT))
+
+# Interactive regions rerun in isolation (st.experimental_fragment before Streamlit 1.37)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment")
+
+def fragment(fn):
+    """st.fragment that logs fragment-only reruns as their own breakdown."""
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        if not (INSTRUMENTATION and _RERUN['finished']):
+            return fn(*args, **kwargs)
+        first, start = len(_RERUN['spans']), time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            log_rerun(fn.__name__, time.perf_counter() - start, _RERUN['spans'][first:])
+            del _RERUN['spans'][first:]
+    return _fragment(run)
+
 # Initialize session state for page navigation
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "🏆 Best XI Team Builder"
 
-# COMPLETELY NEW SIDEBAR SOLUTION - Always visible custom navigation
-st.markdown("""
-<style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Poppins:wght@300;400;500;600;700;800&family=Roboto:wght@300;400;500;700&display=swap');
-    
-    /* Hide default Streamlit sidebar completely */
-    .css-1d391kg, [data-testid="stSidebar"] {
-        display: none !important;
-    }
-    
-    
-    /* Navigation buttons */
-    .nav-section {
-        padding: 1.5rem;
-    }
-    
-    .nav-button {
-        display: block;
-        width: 100%;
-        background: rgba(255,255,255,0.05);
-        color: white;
-        border: 2px solid rgba(50, 205, 50, 0.3);
-        border-radius: 12px;
-        padding: 1rem 1.5rem;
-        margin: 0.8rem 0;
-        font-size: 1rem;
-        font-weight: 500;
-        text-align: left;
-        cursor: pointer;
-        transition: all 0.3s ease;
-        text-decoration: none;
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    .nav-button:hover {
-        background: rgba(50, 205, 50, 0.2);
-        border-color: #32CD32;
-        transform: translateX(8px);
-        box-shadow: 0 4px 12px rgba(50, 205, 50, 0.3);
-        color: #90EE90;
-    }
-    
-    .nav-button.active {
-        background: linear-gradient(135deg, #32CD32 0%, #2E8B57 100%);
-        border-color: #32CD32;
-        color: white;
-        font-weight: 600;
-        transform: translateX(12px);
-        box-shadow: 0 6px 20px rgba(50, 205, 50, 0.4);
-    }
-    
-    .nav-button.active:hover {
-        background: linear-gradient(135deg, #90EE90 0%, #32CD32 100%);
-    }
-    
-    /* Stats section in sidebar */
-    .sidebar-stats {
-        background: rgba(255,255,255,0.05);
-        margin: 1.5rem;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border: 1px solid rgba(50, 205, 50, 0.3);
-    }
-    
-    .sidebar-stats h4 {
-        color: #32CD32;
-        text-align: center;
-        margin-bottom: 1rem;
-        font-size: 1.2rem;
-        font-weight: 600;
-    }
-    
-    .sidebar-stats p {
-        color: rgba(255,255,255,0.8);
-        margin: 0.5rem 0;
-        display: flex;
-        justify-content: space-between;
-        font-size: 0.9rem;
-    }
-    
-    .sidebar-stats strong {
-        color: #90EE90;
-    }
-    
-    /* Adjust main content for custom sidebar */
-    .main .block-container {
-        margin-left: 340px;
-        max-width: calc(100% - 360px);
-        padding-left: 2rem;
-    }
-    
-    /* Global Styles */
-    .main {
-        font-family: 'Poppins', sans-serif;
-        background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    /* Toggle button for mobile */
-    .sidebar-toggle {
-        display: none;
-        position: fixed;
-        top: 1rem;
-        left: 1rem;
-        z-index: 10000;
-        background: #2E8B57;
-        color: white;
-        border: none;
-        border-radius: 8px;
-        padding: 0.8rem;
-        cursor: pointer;
-        font-size: 1.2rem;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.3);
-    }
-    
-    .sidebar-toggle:hover {
-        background: #32CD32;
-    }
-    
-    /* Cricket-themed Header */
-    .main-header {
-        background: linear-gradient(135deg, #2E8B57 0%, #228B22 25%, #32CD32 50%, #90EE90 75%, #98FB98 100%);
-        padding: 3rem 2rem;
-        border-radius: 25px;
-        color: white;
-        text-align: center;
-        margin-bottom: 2rem;
-        box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .main-header::before {
-        content: "🏏";
-        position: absolute;
-        font-size: 120px;
-        opacity: 0.1;
-        top: 50%;
-        left: 50%;
-        transform: translate(-50%, -50%);
-    }
-    
-    .main-header h1 {
-        font-size: 4rem;
-        font-weight: 800;
-        margin-bottom: 0.5rem;
-        text-shadow: 3px 3px 6px rgba(0,0,0,0.3);
-        z-index: 1;
-        position: relative;
-    }
-    
-    .main-header p {
-        font-size: 1.4rem;
-        opacity: 0.95;
-        font-weight: 400;
-        z-index: 1;
-        position: relative;
-    }
-    
-    /* Feature Cards */
-    .feature-card {
-        background: white;
-        padding: 2rem;
-        border-radius: 20px;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-        border-left: 5px solid #32CD32;
-        margin: 1rem 0;
-        transition: all 0.3s ease;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-8px);
-        box-shadow: 0 20px 50px rgba(0,0,0,0.15);
-        border-left: 5px solid #228B22;
-    }
-    
-    .feature-card::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        right: 0;
-        width: 100px;
-        height: 100px;
-        background: linear-gradient(45deg, #32CD32, #90EE90);
-        opacity: 0.1;
-        border-radius: 50%;
-        transform: translate(30px, -30px);
-    }
-    
-    /* Stats Cards */
-    .stats-card {
-        background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%);
-        padding: 2rem;
-        border-radius: 20px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem;
-        box-shadow: 0 10px 25px rgba(46, 139, 87, 0.3);
-        transition: all 0.3s ease;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stats-card:hover {
-        transform: scale(1.05);
-        box-shadow: 0 15px 35px rgba(46, 139, 87, 0.4);
-    }
-    
-    .stats-card::after {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 3px;
-        background: linear-gradient(90deg, #FFD700, #FFA500, #FF6347);
-    }
-    
-    .stat-value {
-        font-size: 2.5rem;
-        font-weight: 700;
-        margin-bottom: 0.5rem;
-        text-shadow: 2px 2px 4px rgba(0,0,0,0.2);
-    }
-    
-    .stat-label {
-        font-size: 1rem;
-        opacity: 0.9;
-        font-weight: 500;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    
-    /* Chat Styling */
-    .chat-container {
-        max-height: 600px;
-        overflow-y: auto;
-        padding: 1.5rem;
-        background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-        border-radius: 20px;
-        margin: 1rem 0;
-        border: 2px solid #e2e8f0;
-        box-shadow: inset 0 2px 4px rgba(0,0,0,0.1);
-    }
-    
-    .chat-message {
-        padding: 1.5rem;
-        border-radius: 20px;
-        margin: 1rem 0;
-        animation: slideIn 0.3s ease-out;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        position: relative;
-    }
-    
-    .user-message {
-        background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%);
-        color: white;
-        margin-left: 15%;
-        border-bottom-right-radius: 8px;
-        border-top-right-radius: 20px;
-    }
-    
-    .user-message::before {
-        content: "👤";
-        position: absolute;
-        left: -40px;
-        top: 50%;
-        transform: translateY(-50%);
-        background: white;
-        padding: 8px;
-        border-radius: 50%;
-        font-size: 1.2rem;
-    }
-    
-    .ai-message {
-        background: linear-gradient(135deg, #ffffff 0%, #f1f5f9 100%);
-        color: #1e293b;
-        margin-right: 15%;
-        border: 2px solid #e2e8f0;
-        border-bottom-left-radius: 8px;
-        border-top-left-radius: 20px;
-    }
-    
-    .ai-message::before {
-        content: "🤖";
-        position: absolute;
-        right: -40px;
-        top: 50%;
-        transform: translateY(-50%);
-        background: #2E8B57;
-        color: white;
-        padding: 8px;
-        border-radius: 50%;
-        font-size: 1.2rem;
-    }
-    
-    /* Form Styling */
-    .stSelectbox > div > div {
-        background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%);
-        color: white;
-        border-radius: 12px;
-        border: none;
-        font-weight: 500;
-    }
-    
-    .stNumberInput > div > div > input,
-    .stTextInput > div > div > input {
-        border-radius: 12px;
-        border: 2px solid #e2e8f0;
-        padding: 0.75rem;
-        transition: all 0.3s ease;
-        font-family: 'Roboto', sans-serif;
-    }
-    
-    .stNumberInput > div > div > input:focus,
-    .stTextInput > div > div > input:focus {
-        border-color: #32CD32;
-        box-shadow: 0 0 0 3px rgba(50, 205, 50, 0.1);
-        outline: none;
-    }
-    
-    /* Enhanced Button Styling */
-    .stButton > button {
-        background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%);
-        color: white;
-        border: none;
-        border-radius: 15px;
-        padding: 1rem 2.5rem;
-        font-weight: 600;
-        font-size: 1.1rem;
-        transition: all 0.3s ease;
-        box-shadow: 0 8px 20px rgba(46, 139, 87, 0.3);
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 12px 30px rgba(46, 139, 87, 0.4);
-        background: linear-gradient(135deg, #32CD32 0%, #90EE90 100%);
-    }
-    
-    .stButton > button::before {
-        content: "";
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-        transition: left 0.6s;
-    }
-    
-    .stButton > button:hover::before {
-        left: 100%;
-    }
-    
-    /* Sample Question Buttons */
-    .sample-question-btn {
-        background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-        color: #2E8B57;
-        border: 2px solid #32CD32;
-        border-radius: 25px;
-        padding: 1rem;
-        margin: 0.5rem;
-        font-weight: 500;
-        transition: all 0.3s ease;
-        text-align: left;
-    }
-    
-    .sample-question-btn:hover {
-        background: linear-gradient(135deg, #32CD32 0%, #90EE90 100%);
-        color: white;
-        transform: translateY(-2px);
-        box-shadow: 0 8px 16px rgba(50, 205, 50, 0.3);
-    }
-    
-    /* Player Card Styling */
-    .player-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border-left: 4px solid #32CD32;
-        margin: 0.5rem 0;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-        transition: all 0.3s ease;
-    }
-    
-    .player-card:hover {
-        transform: translateX(5px);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.12);
-        border-left-color: #2E8B57;
-    }
-    
-    /* Performance Metrics */
-    .metric-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-        gap: 1rem;
-        margin: 2rem 0;
-    }
-    
-    .metric-item {
-        background: linear-gradient(135deg, #ffffff 0%, #f8fafc 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        text-align: center;
-        border: 2px solid #e2e8f0;
-        transition: all 0.3s ease;
-    }
-    
-    .metric-item:hover {
-        border-color: #32CD32;
-        transform: translateY(-5px);
-        box-shadow: 0 10px 25px rgba(50, 205, 50, 0.1);
-    }
-    
-    /* Data Frame Styling */
-    .dataframe {
-        border-radius: 15px;
-        overflow: hidden;
-        box-shadow: 0 10px 25px rgba(0,0,0,0.1);
-        border: none;
-    }
-    
-    .dataframe th {
-        background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%);
-        color: white;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-    }
-    
-    /* Success/Error Messages */
-    .stSuccess {
-        background: linear-gradient(135deg, #32CD32 0%, #90EE90 100%);
-        border-radius: 15px;
-        border: none;
-        color: white;
-        font-weight: 500;
-    }
-    
-    .stError {
-        background: linear-gradient(135deg, #FF6B6B 0%, #FFE66D 100%);
-        border-radius: 15px;
-        border: none;
-        color: white;
-        font-weight: 500;
-    }
-    
-    .stWarning {
-        background: linear-gradient(135deg, #FFA726 0%, #FFCC02 100%);
-        border-radius: 15px;
-        border: none;
-        color: white;
-        font-weight: 500;
-    }
-    
-    /* Animated Elements */
-    @keyframes slideIn {
-        from { 
-            opacity: 0; 
-            transform: translateX(-20px); 
-        }
-        to { 
-            opacity: 1; 
-            transform: translateX(0); 
-        }
-    }
-    
-    @keyframes fadeInUp {
-        from { 
-            opacity: 0; 
-            transform: translateY(30px); 
-        }
-        to { 
-            opacity: 1; 
-            transform: translateY(0); 
-        }
-    }
-    
-    .fade-in {
-        animation: fadeInUp 0.6s ease-out;
-    }
-    
-    /* Expander Styling */
-    .streamlit-expanderHeader {
-        background: linear-gradient(135deg, #f8fafc 0%, #e2e8f0 100%);
-        border-radius: 12px;
-        border: 2px solid #32CD32;
-        color: #2E8B57;
-        font-weight: 600;
-    }
-    
-    .streamlit-expanderContent {
-        border: 2px solid #e2e8f0;
-        border-top: none;
-        border-radius: 0 0 12px 12px;
-        background: white;
-    }
-    
-    /* File Uploader */
-    .stFileUploader {
-        background: linear-gradient(135deg, #f8fafc 0%, #ffffff 100%);
-        border: 2px dashed #32CD32;
-        border-radius: 15px;
-        padding: 2rem;
-        text-align: center;
-    }
-    
-    /* Progress Bar */
-    .stProgress > div > div > div {
-        background: linear-gradient(90deg, #2E8B57 0%, #32CD32 100%);
-        border-radius: 10px;
-    }
-    
-    /* Loading Spinner */
-    .stSpinner {
-        color: #32CD32;
-    }
-    
-    /* Footer */
-    .footer {
-        background: linear-gradient(135deg, #2E8B57 0%, #1e3a8a 100%);
-        color: white;
-        text-align: center;
-        padding: 3rem 2rem;
-        border-radius: 25px;
-        margin-top: 3rem;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .footer::before {
-        content: "🏆🏏⚡";
-        position: absolute;
-        font-size: 80px;
-        opacity: 0.1;
-        top: 50%;
-        left: 50%;
-        transform: translate(-50%, -50%);
-        letter-spacing: 30px;
-    }
-    
-    .footer h3 {
-        font-size: 2rem;
-        margin-bottom: 1rem;
-        z-index: 1;
-        position: relative;
-    }
-    
-    .footer p {
-        z-index: 1;
-        position: relative;
-        margin: 0.5rem 0;
-    }
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .custom-sidebar {
-            transform: translateX(-100%);
-            transition: transform 0.3s ease;
-        }
-        
-        .custom-sidebar.mobile-open {
-            transform: translateX(0);
-        }
-        
-        .sidebar-toggle {
-            display: block !important;
-        }
-        
-        .main .block-container {
-            margin-left: 0;
-            max-width: 100%;
-            padding-left: 1rem;
-        }
-        
-        .main-header h1 {
-            font-size: 2.5rem;
-        }
-        
-        .main-header p {
-            font-size: 1rem;
-        }
-        
-        .chat-message {
-            margin-left: 5% !important;
-            margin-right: 5% !important;
-        }
-        
-        .stat-value {
-            font-size: 2rem;
-        }
-    }
-</style>
-""", unsafe_allow_html=True)
+# Theme stylesheet lives in static/theme.css; minified once per server process. The <style> block
+# is re-emitted every run (the browser drops elements a run leaves out) but, above
+# global.minCachedMessageSize in .streamlit/config.toml, reruns send only its hash
+@st.cache_resource
+def load_theme_css():
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'theme.css')
+    with open(css_path, 'r', encoding='utf-8') as f:
+        css = f.read()
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{}:;,>])\s*', r'\1', css).replace(';}', '}').strip()
+    return f"<style>{css}</style>"
 
+# COMPLETELY NEW SIDEBAR SOLUTION - Always visible custom navigation
+st.markdown(load_theme_css(), unsafe_allow_html=True)
 
 
 # Page selection logic 
@@ -680,173 +241,668 @@ def load_price_model():
         st.error(f" Error loading model: {e}")
         return None, None
 
-# Helper functions for feature engineering (from price_predictor.py)
-def get_nationality_premium(country):
-    country = country.lower()
-    if country == 'india':
-        return 1.0
-    elif country in ['england', 'australia', 'south africa', 'new zealand']:
-        return 0.8
-    else:
-        return 0.6
-
-def get_experience_tier(ipl_matches):
-    if ipl_matches == 0:
-        return 0
-    elif ipl_matches <= 20:
-        return 1
-    elif ipl_matches <= 50:
-        return 2
-    else:
-        return 3
+@st.cache_resource
+def load_xgb_model():
+    """best_price_model.pkl unpacked for batched in-place prediction (None if unavailable)."""
+    try:
+        return load_xgb_price_model('best_price_model.pkl')
+    except Exception as e:
+        st.warning(f"⚠️ XGBoost model unavailable: {e}")
+        return None
 
-def get_age_bracket(age):
-    if age < 25:
-        return 'young_prospect'
-    elif age <= 32:
-        return 'prime'
-    else:
-        return 'veteran'
-
-def calculate_batting_impact(ipl_runs, ipl_sr, ipl_avg, t20_runs, t20_sr, t20_avg):
-    if ipl_runs > 0:
-        ipl_sr = ipl_sr if ipl_sr > 0 else 100
-        ipl_avg = ipl_avg if ipl_avg > 0 else 15
-        return (ipl_runs ** 0.7) * (ipl_sr / 130) * (ipl_avg / 25)
-    elif t20_runs > 0:
-        t20_sr = t20_sr if t20_sr > 0 else 100
-        t20_avg = t20_avg if t20_avg > 0 else 15
-        return (t20_runs ** 0.7) * (t20_sr / 130) * (t20_avg / 25) * 0.6
-    else:
-        return 0.0
-
-def calculate_bowling_impact(ipl_wkts, ipl_econ, ipl_sr, t20_wkts, t20_econ, t20_sr):
-    if ipl_wkts > 0:
-        ipl_econ = ipl_econ if ipl_econ > 0 else 8.5
-        ipl_sr = ipl_sr if ipl_sr > 0 else 20
-        return (ipl_wkts ** 0.7) * (8 / ipl_econ) * (20 / ipl_sr)
-    elif t20_wkts > 0:
-        t20_econ = t20_econ if t20_econ > 0 else 8.5
-        t20_sr = t20_sr if t20_sr > 0 else 20
-        return (t20_wkts ** 0.7) * (8 / t20_econ) * (20 / t20_sr) * 0.6
+PRICE_MODEL_PATHS = {"Ridge": 'ipl_price_model.pkl', "XGBoost": 'best_price_model.pkl'}
+PRICE_MODELS = list(PRICE_MODEL_PATHS)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _load_price_intervals(path, mtime):
+    return None if mtime is None else joblib.load(path)
+
+def load_price_intervals(model_name):
+    """Conformal calibration saved next to the model by train_price_model.py (None if uncalibrated).
+
+    Cached per file modification time, so a calibration written or replaced while the
+    server runs is picked up on the next call.
+    """
+    path = interval_path(PRICE_MODEL_PATHS[model_name])
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    try:
+        return _load_price_intervals(path, mtime)
+    except FileNotFoundError:
+        return None
+
+def log_prices_to_crore(model_name, log_prices):
+    prices = xgb_prices_crore(log_prices) if model_name == "XGBoost" else np.expm1(log_prices)
+    return np.clip(prices, 0.2, 30)
+
+def price_interval(model_name, log_prices, level):
+    """(lower, upper) prices (Cr) at the given coverage, or (None, None) without a calibration."""
+    calibration = load_price_intervals(model_name)
+    if calibration is None:
+        return None, None
+    lower, upper = conformal_bounds(np.asarray(log_prices, dtype=np.float64), calibration, level)
+    return log_prices_to_crore(model_name, lower), log_prices_to_crore(model_name, upper)
+
+def predict_price_batch(model_name, players, level=None):
+    """(prices, lower, upper) in Cr for a DataFrame of raw player fields, from one vectorized model call.
+
+    Bounds are None unless a coverage level is given and the model has a conformal calibration.
+    """
+    if model_name == "XGBoost":
+        log_prices = xgb_predict_log_prices(load_xgb_model(), players)
     else:
-        return 0.0
-
-def calculate_consistency(ipl_runs, ipl_avg, ipl_sr, ipl_wkts, ipl_econ, ipl_bowl_sr):
-    if ipl_runs > 50:
-        ipl_avg = ipl_avg if ipl_avg > 0 else 15
-        ipl_sr = ipl_sr if ipl_sr > 0 else 100
-        return ipl_avg / (ipl_sr / 100)
-    elif ipl_wkts > 5:
-        ipl_econ = ipl_econ if ipl_econ > 0 else 8.5
-        ipl_bowl_sr = ipl_bowl_sr if ipl_bowl_sr > 0 else 20
-        return 1 / (ipl_econ * ipl_bowl_sr / 100)
+        log_prices, _, _ = predict_with_contributions(price_model, engineer_features_batch(players, price_model_form))
+    lower, upper = price_interval(model_name, log_prices, level) if level else (None, None)
+    return log_prices_to_crore(model_name, log_prices), lower, upper
+
+# Feature store: one entry per distinct set of raw stats, shared by all sessions
+FEATURE_STORE_SIZE = int(os.getenv("FEATURE_STORE_SIZE", 4096))
+FEATURE_STORE_PERSIST = os.getenv("FEATURE_STORE_PERSIST", "0") == "1"
+
+@st.cache_resource
+def feature_store():
+    """Bounded LRU of engineered players; mirrored to the player DB when FEATURE_STORE_PERSIST=1."""
+    return FeatureStore(FEATURE_STORE_SIZE, init_player_db() if FEATURE_STORE_PERSIST else None)
+
+def price_model_tag(model_name):
+    """Model name plus file mtime, so a retrained model never serves stale stored predictions."""
+    return f"{model_name}@{os.path.getmtime(PRICE_MODEL_PATHS[model_name]):.0f}"
+
+@timed("predict.player")
+def player_prediction(model_name, player_data):
+    """Features, IPL-vs-T20I impact breakdown and the model's prediction for one player.
+
+    Served from the feature store when these exact stats were seen before; entries are
+    shared, so they are replaced rather than mutated.
+    """
+    store, key, tag = feature_store(), player_stats_key(player_data), price_model_tag(model_name)
+    entry = store.get(key)
+    if entry is not None and tag in entry['predictions']:
+        return entry
+    note_cache_miss("predict.player")
+    player = pd.DataFrame([player_data])
+    if entry is None:
+        entry = {'features': engineer_features_batch(player, price_model_form)[0].tolist(),
+                 'impact_breakdown': impact_breakdown_batch(player)[0].tolist(), 'predictions': {}}
+    if model_name == "XGBoost":
+        log_prices, contributions, intercept = xgb_predict_with_contributions(load_xgb_model(), player)
     else:
-        return 0.0
-
-def calculate_role_specialization(role, bat_impact, bowl_impact):
-    if role == 'batsman':
-        return bat_impact * 1.2
-    elif role == 'bowler':
-        return bowl_impact * 1.2
-    elif role == 'batting-allrounder':
-        return (bat_impact * 0.7) + (bowl_impact * 0.3)
-    elif role == 'bowling-allrounder':
-        return (bat_impact * 0.3) + (bowl_impact * 0.7)
-    elif role == 'wk-batsman':
-        return bat_impact * 1.1 + 10
+        log_prices, contributions, intercept = predict_with_contributions(price_model, [entry['features']])
+    prediction = {'log_price': float(log_prices[0]), 'contributions': contributions[0].tolist(),
+                  'intercept': float(intercept)}
+    entry = {**entry, 'predictions': {**entry['predictions'], tag: prediction}}
+    store.put(key, entry)
+    return entry
+
+# What-if sweeps: vary one or two raw inputs over a grid, predict in one call
+SWEEP_FIELDS = {
+    'IPL Matches': ('ipl_matches', 10), 'IPL Runs': ('ipl_runs', 500), 'IPL Batting Average': ('ipl_avg', 10.0),
+    'IPL Strike Rate': ('ipl_sr', 20.0), 'IPL Sixes': ('ipl_sixes', 20), 'IPL Wickets': ('ipl_wickets', 20),
+    'IPL Economy': ('ipl_economy', 2.0), 'IPL Bowling SR': ('ipl_bowl_sr', 10.0), 'T20I Matches': ('t20_matches', 20),
+    'T20I Runs': ('t20_runs', 500), 'T20I Strike Rate': ('t20_sr', 20.0), 'T20I Wickets': ('t20_wickets', 20),
+    'Age': ('age', 5),
+}
+
+@timed("predict.sweep", rows=lambda model_name, player_data, x_field, x_values, y_field=None, y_values=None,
+       level=None: len(x_values) * (len(y_values) if y_values is not None else 1))
+def sweep_price_grid(model_name, player_data, x_field, x_values, y_field=None, y_values=None, level=None):
+    """(prices, lower, upper) in Cr over a 1-D (len(x),) or 2-D (len(y), len(x)) grid of one or two inputs."""
+    if y_field is None:
+        grid = {x_field: np.asarray(x_values, dtype=np.float64)}
+        shape = (len(x_values),)
     else:
-        return bat_impact + bowl_impact
+        xx, yy = np.meshgrid(x_values, y_values)
+        grid = {x_field: xx.ravel(), y_field: yy.ravel()}
+        shape = xx.shape
+    rows = len(next(iter(grid.values())))
+    fields = RAW_PLAYER_FIELDS + [field for field in FORM_FIELDS if field in player_data]
+    players = pd.DataFrame({field: np.repeat(player_data[field], rows) for field in fields})
+    for field, values in grid.items():
+        players[field] = values
+    return tuple(None if values is None else values.reshape(shape)
+                 for values in predict_price_batch(model_name, players, level))
+
+def top_contributions(contributions, feature_names, limit=8):
+    """Largest |contribution| features for one player, remaining ones folded into 'Other'."""
+    order = np.argsort(-np.abs(contributions))
+    labels = [feature_names[i].replace('_', ' ').title() for i in order[:limit]]
+    values = contributions[order[:limit]].tolist()
+    if len(order) > limit:
+        labels.append('Other')
+        values.append(float(contributions[order[limit:]].sum()))
+    return tuple(zip(labels, values))
+
+# Dashboard figures, memoized on the (rounded) result payload
+def _round(values, digits=2):
+    return [round(float(v), digits) for v in values]
+
+@timed("plot.prediction_dashboard")
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_prediction_dashboard(features, predicted_price, player_name, impact_breakdown,
+                               contributions, intercept):
+    """Return the Price Predictor 2x2 dashboard as a plotly figure dict."""
+    note_cache_miss("plot.prediction_dashboard")
+    player_label = player_name or 'Player'
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Feature Contributions (log-price)', 'IPL vs T20I Impact',
+                        'Experience & Form', 'Price Category Gauge'),
+        specs=[[{"type": "xy"}, {"type": "bar"}],
+               [{"type": "scatter"}, {"type": "indicator"}]]
+    )
 
-def engineer_features(player_data):
-    """Engineer all 17 features from player data"""
-    
-    # Feature 1: Nationality Premium
-    nationality_premium = get_nationality_premium(player_data['country'])
-    
-    # Feature 2: Role Demand Score (simplified - use fixed value)
-    role_demand_score = 0.2  # Average value
-    
-    # Feature 3: Experience Tier
-    experience_tier = get_experience_tier(player_data['ipl_matches'])
-    
-    # Feature 4: International Exposure
-    international_exposure = np.log1p(player_data['t20_matches'])
-    
-    # Feature 5: Uncapped Flag
-    uncapped_flag = 1 if (player_data['ipl_runs'] == 0 and player_data['ipl_wickets'] == 0) else 0
-    
-    # Feature 6: Batting Impact Index
-    batting_impact_index = calculate_batting_impact(
-        player_data['ipl_runs'], player_data['ipl_sr'], player_data['ipl_avg'],
-        player_data['t20_runs'], player_data['t20_sr'], player_data['t20_avg']
+    # Chart 1: Waterfall from the model intercept to the predicted log-price
+    labels = ['Baseline'] + [label for label, _ in contributions] + ['Log Price']
+    values = _round([intercept] + [value for _, value in contributions] + [0], 3)
+    fig.add_trace(
+        go.Waterfall(x=labels, y=values,
+                     measure=['absolute'] + ['relative'] * len(contributions) + ['total'],
+                     increasing={'marker': {'color': '#2E8B57'}},
+                     decreasing={'marker': {'color': '#FF6B6B'}},
+                     totals={'marker': {'color': '#45B7D1'}},
+                     name='Contributions'),
+        row=1, col=1
     )
-    
-    # Feature 7: Bowling Impact Index
-    bowling_impact_index = calculate_bowling_impact(
-        player_data['ipl_wickets'], player_data['ipl_economy'], player_data['ipl_bowl_sr'],
-        player_data['t20_wickets'], player_data['t20_economy'], player_data['t20_bowl_sr']
+
+    # Chart 2: IPL vs T20I Impact Comparison
+    fig.add_trace(
+        go.Bar(x=['IPL Batting', 'T20I Batting', 'IPL Bowling', 'T20I Bowling'],
+               y=_round(impact_breakdown),
+               marker_color=['#FFD700', '#FFA500', '#4ECDC4', '#45B7D1'],
+               name='Performance'),
+        row=1, col=2
     )
-    
-    # Feature 8: Consistency Metric
-    consistency_metric = calculate_consistency(
-        player_data['ipl_runs'], player_data['ipl_avg'], player_data['ipl_sr'],
-        player_data['ipl_wickets'], player_data['ipl_economy'], player_data['ipl_bowl_sr']
+
+    # Chart 3: Experience vs Form Scatter
+    experience, form = round(float(features[2]), 2), round(float(features[9]), 2)
+    fig.add_trace(
+        go.Scatter(x=[experience], y=[form],
+                   mode='markers+text',
+                   marker=dict(size=round(predicted_price * 10, 1), color='#2E8B57',
+                               line=dict(width=2, color='white')),
+                   text=[player_label],
+                   textposition='top center',
+                   name=player_label),
+        row=2, col=1
     )
-    
-    # Feature 9: Role Specialization Score
-    role_specialization_score = calculate_role_specialization(
-        player_data['role'], batting_impact_index, bowling_impact_index
+    fig.add_hline(y=form, line_dash="dash", line_color="gray", opacity=0.5, row=2, col=1)
+    fig.add_vline(x=experience, line_dash="dash", line_color="gray", opacity=0.5, row=2, col=1)
+
+    # Chart 4: Price Category Gauge
+    fig.add_trace(
+        go.Indicator(
+            mode="gauge+number+delta",
+            value=round(predicted_price, 2),
+            domain={'x': [0, 1], 'y': [0, 1]},
+            title={'text': "Price (Cr)", 'font': {'size': 16}},
+            delta={'reference': 5, 'increasing': {'color': "#2E8B57"}},
+            gauge={
+                'axis': {'range': [None, 30], 'tickwidth': 1},
+                'bar': {'color': "#2E8B57"},
+                'steps': [
+                    {'range': [0, 2], 'color': "#FFE5E5"},
+                    {'range': [2, 10], 'color': "#E5F5FF"},
+                    {'range': [10, 30], 'color': "#E5FFE5"}
+                ],
+                'threshold': {
+                    'line': {'color': "red", 'width': 4},
+                    'thickness': 0.75,
+                    'value': round(predicted_price, 2)
+                }
+            }
+        ),
+        row=2, col=2
+    )
+
+    fig.update_xaxes(title_text="Features", row=1, col=1)
+    fig.update_yaxes(title_text="Contribution", row=1, col=1)
+    fig.update_xaxes(title_text="Performance Type", row=1, col=2)
+    fig.update_yaxes(title_text="Impact Score", row=1, col=2)
+    fig.update_xaxes(title_text="Experience Tier (0-3)", row=2, col=1)
+    fig.update_yaxes(title_text="Form Momentum", row=2, col=1)
+
+    fig.update_layout(
+        height=800,
+        showlegend=False,
+        title_text=f"Performance Analysis: {player_label}",
+        title_font_size=20
+    )
+    return fig.to_dict()
+
+TEAM_DASHBOARD_COLUMNS = ['player_name', 'role', 'is_overseas', 'batting_impact', 'bowling_impact',
+                          'impact', 'runs_scored', 'strike_rate', 'wickets', 'economy']
+
+def team_dashboard_payload(team_df):
+    """Hashable, rounded view of a selected team for build_team_dashboard."""
+    payload = team_df[TEAM_DASHBOARD_COLUMNS].copy()
+    numeric = payload.columns[2:]
+    payload[numeric] = payload[numeric].apply(pd.to_numeric, errors='coerce').fillna(0).round(2)
+    return tuple(payload.itertuples(index=False, name=None))
+
+@timed("plot.team_dashboard")
+@st.cache_data(show_spinner=False, max_entries=64)
+def build_team_dashboard(team_payload):
+    """Return the Best XI analytics dashboard as a plotly figure dict."""
+    note_cache_miss("plot.team_dashboard")
+    team = pd.DataFrame(list(team_payload), columns=TEAM_DASHBOARD_COLUMNS)
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=(
+            'Role Distribution',
+            'Batting vs Bowling Impact',
+            'Player Performance Radar',
+            'Impact Distribution'
+        ),
+        specs=[
+            [{"type": "pie"}, {"type": "scatter"}],
+            [{"type": "scatterpolar"}, {"type": "bar"}]
+        ]
+    )
+
+    # Role distribution pie chart
+    role_counts = team["role"].value_counts()
+    fig.add_trace(
+        go.Pie(
+            labels=role_counts.index.tolist(),
+            values=role_counts.values.tolist(),
+            marker_colors=['#2E8B57', '#32CD32', '#90EE90', '#98FB98']
+        ),
+        row=1, col=1
+    )
+
+    # Batting vs Bowling Impact scatter
+    fig.add_trace(
+        go.Scatter(
+            x=team["batting_impact"].tolist(),
+            y=team["bowling_impact"].tolist(),
+            mode='markers+text',
+            text=team["player_name"].tolist(),
+            textposition="top center",
+            marker=dict(
+                size=15,
+                color=team["is_overseas"].tolist(),
+                colorscale=['#2E8B57', '#FF6B6B'],
+                showscale=True,
+                colorbar=dict(title="Overseas")
+            ),
+            name="Players"
+        ),
+        row=1, col=2
     )
-    
-    # Feature 10: Form Momentum
-    form_momentum = batting_impact_index + bowling_impact_index
-    
-    # Feature 11: Star Player Flag
-    star_player_flag = 1 if (player_data['ipl_runs'] > 2000 or 
-                             player_data['ipl_wickets'] > 100 or 
-                             player_data['t20_matches'] > 50) else 0
-    
-    # Feature 12: Explosive Factor
-    explosive_factor = 1 if (player_data['ipl_sr'] > 150 or 
-                             player_data['ipl_sixes'] > 50 or
-                             (player_data['ipl_economy'] > 0 and player_data['ipl_economy'] < 7.5)) else 0
-    
-    # Feature 13: Retention Proxy
-    retention_proxy = 1 if player_data['ipl_matches'] > 20 else 0
-    
-    # Feature 14: Hype Prospect
-    hype_prospect = 1 if (uncapped_flag and player_data['age'] < 25 and 
-                          (player_data['t20_sr'] > 140 or player_data['t20_wickets'] > 20)) else 0
-    
-    # Feature 15-17: Age Brackets (one-hot encoded)
-    age_bracket = get_age_bracket(player_data['age'])
-    age_prime = 1 if age_bracket == 'prime' else 0
-    age_veteran = 1 if age_bracket == 'veteran' else 0
-    age_young_prospect = 1 if age_bracket == 'young_prospect' else 0
-    
-    # Return features in correct order
-    features = [
-        nationality_premium,
-        role_demand_score,
-        experience_tier,
-        international_exposure,
-        uncapped_flag,
-        batting_impact_index,
-        bowling_impact_index,
-        consistency_metric,
-        role_specialization_score,
-        form_momentum,
-        star_player_flag,
-        explosive_factor,
-        retention_proxy,
-        hype_prospect,
-        age_prime,
-        age_veteran,
-        age_young_prospect
-    ]
-    
-    return features
+
+    # Performance radar for top 3 players (normalized per axis)
+    top_players = team.nlargest(3, 'impact')
+    categories = ['Runs', 'Strike Rate', 'Wickets', 'Economy']
+    radar = np.column_stack([
+        top_players['runs_scored'] / 10,
+        top_players['strike_rate'] / 2,
+        top_players['wickets'] * 5,
+        np.maximum(0, 50 - top_players['economy'] * 5)
+    ]).round(2)
+    for name, values in zip(top_players['player_name'], radar):
+        fig.add_trace(
+            go.Scatterpolar(
+                r=values.tolist(),
+                theta=categories,
+                fill='toself',
+                name=name
+            ),
+            row=2, col=1
+        )
+
+    fig.update_layout(height=800, showlegend=True)
+    return fig.to_dict()
+
+# Player ingestion: canonical roles and entity resolution across datasets
+PLAYER_COLUMNS = ["player_name", "role", "is_overseas",
+                  "runs_scored", "innings_batted", "balls_faced", "strike_rate", "fours", "sixes",
+                  "wickets", "balls_bowled", "runs_conceded", "economy", "dot_balls"]
+PLAYER_COUNT_COLUMNS = ["runs_scored", "innings_batted", "balls_faced", "fours", "sixes",
+                        "wickets", "balls_bowled", "runs_conceded", "dot_balls"]
+
+# Canonical roles keyed by lower-case spelling with separators stripped
+ROLES = ("Batsman", "Bowler", "All-Rounder", "Wicketkeeper")
+ROLE_ALIASES = {
+    'batsman': 'Batsman', 'batter': 'Batsman', 'bat': 'Batsman',
+    'bowler': 'Bowler', 'bowl': 'Bowler',
+    'allrounder': 'All-Rounder', 'ar': 'All-Rounder',
+    'battingallrounder': 'All-Rounder', 'bowlingallrounder': 'All-Rounder',
+    'wicketkeeper': 'Wicketkeeper', 'keeper': 'Wicketkeeper', 'wk': 'Wicketkeeper',
+    'wkbatsman': 'Wicketkeeper', 'wkbatter': 'Wicketkeeper', 'wicketkeeperbatter': 'Wicketkeeper',
+}
+
+def canonical_role(role):
+    return ROLE_ALIASES.get(re.sub(r'[^a-z]', '', str(role).lower()), role)
+
+@timed("ingest.merge", rows=lambda *pools, **_: sum(len(pool) for pool in pools))
+def merge_player_pools(*pools, aliases=PLAYER_ALIASES):
+    """Concatenate player pools, combining each resolved player's stats into one row.
+
+    Counting stats are summed; strike rate and economy are averaged weighted by balls
+    faced / bowled; a player is overseas if any source says so.
+    """
+    combined = pd.concat([pool for pool in pools if not pool.empty] or [pd.DataFrame(columns=PLAYER_COLUMNS)],
+                         ignore_index=True).reindex(columns=PLAYER_COLUMNS)
+    if combined.empty:
+        return combined
+    numeric = combined.columns[2:]
+    combined[numeric] = combined[numeric].apply(pd.to_numeric, errors='coerce').fillna(0)
+    combined['role'] = combined['role'].map(canonical_role)
+
+    index = build_player_index(combined['player_name'].tolist(), aliases, combined['is_overseas'].tolist())
+    keys = pd.Series([resolve_player(index, name, overseas) for name, overseas
+                      in zip(combined['player_name'], combined['is_overseas'])], index=combined.index)
+    combined['_sr_weight'] = combined['strike_rate'] * combined['balls_faced']
+    combined['_econ_weight'] = combined['economy'] * combined['balls_bowled']
+
+    grouped = combined.groupby(keys.to_numpy(), sort=False)
+    merged = grouped[PLAYER_COUNT_COLUMNS + ['_sr_weight', '_econ_weight']].sum()
+    merged['player_name'] = [index['display'][key] for key in merged.index]
+    merged['role'] = grouped['role'].first()
+    merged['is_overseas'] = grouped['is_overseas'].max().astype(int)
+    single = (grouped.size() == 1).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        merged['strike_rate'] = np.where(single, grouped['strike_rate'].first(), np.where(
+            merged['balls_faced'] > 0, merged['_sr_weight'] / merged['balls_faced'], grouped['strike_rate'].mean()
+        ))
+        merged['economy'] = np.where(single, grouped['economy'].first(), np.where(
+            merged['balls_bowled'] > 0, merged['_econ_weight'] / merged['balls_bowled'], grouped['economy'].mean()
+        ))
+    return merged[PLAYER_COLUMNS].reset_index(drop=True)
+
+def index_pool(players, aliases=PLAYER_ALIASES):
+    """Player index over an already merged pool, plus each canonical key's row position."""
+    names, overseas = players['player_name'].tolist(), players['is_overseas'].tolist()
+    index = build_player_index(names, aliases, overseas)
+    index['positions'] = {resolve_player(index, name, flag): position
+                          for position, (name, flag) in enumerate(zip(names, overseas))}
+    return index
+
+def add_to_pool(players, new_row, index):
+    """Resolve one new player row against an indexed, merged pool.
+
+    Only the new row is resolved: it is appended, or merged with the one row its name
+    resolves to, and the index is updated in place. Returns (pool, position, appended).
+    """
+    name, overseas = new_row['player_name'].iloc[0], new_row['is_overseas'].iloc[0]
+    key = resolve_player(index, name, overseas)
+    position = index['positions'].get(key)
+    if position is None:
+        row = merge_player_pools(new_row, aliases=index['aliases'])
+        position, appended = len(players), True
+        players = pd.concat([players, row], ignore_index=True)
+    else:
+        row = merge_player_pools(players.iloc[[position]], new_row, aliases=index['aliases'])
+        if len(row) > 1:
+            # The key's row would not merge with the new one, so the key now names two rows:
+            # rebuild rather than repoint it and lose the existing row's position
+            players = pd.concat([players, row.iloc[[1]]], ignore_index=True)
+            _reindex(index, players)
+            return players, len(players) - 1, True
+        players = players.copy()
+        players.iloc[position] = row.iloc[0]
+        appended = False
+
+    # The row's name or overseas flag can be new to the index and link an initials row to a
+    # full name ("SD Hope" to "Shai Hope"); those rows need a full merge
+    display, flag = row['player_name'].iloc[0], row['is_overseas'].iloc[0]
+    register_player(index, display, flag)
+    if any(own in index['positions'] for own in initials_matches(index, display)):
+        players = merge_player_pools(players, aliases=index['aliases'])
+        _reindex(index, players)
+        return players, index['positions'][resolve_player(index, display, flag)], False
+    index['display'][key] = display
+    index['positions'][key] = position
+    return players, position, appended
+
+def _reindex(index, players):
+    """Replace the index's contents in place with a fresh index over players."""
+    rebuilt = index_pool(players, index['aliases'])
+    index.clear()
+    index.update(rebuilt)
+
+# Team builder impact scores for every format in one pass
+FORMATS = ["T20", "ODI", "Test"]
+
+@timed("impact", rows=len)
+def compute_format_impacts(df):
+    """Derived rate columns plus (players x formats) batting, bowling and total impact arrays."""
+    df = df.copy()
+    num = lambda column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=np.float64)
+    runs, innings, balls_faced = num('runs_scored'), num('innings_batted'), num('balls_faced')
+    strike_rate, fours, sixes = num('strike_rate'), num('fours'), num('sixes')
+    wickets, balls_bowled, runs_conceded = num('wickets'), num('balls_bowled'), num('runs_conceded')
+    economy, dot_balls = num('economy'), num('dot_balls')
+    role = df['role'].to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Shared intermediate columns
+        batting_avg = np.where(innings > 0, runs / innings, 0.0)
+        bowling_avg = np.where(wickets > 0, runs_conceded / wickets, 999.0)
+        bowler_sr = np.where(wickets > 0, balls_bowled / wickets, 999.0)
+        boundary_pct = np.where(balls_faced > 0, (fours + sixes) / balls_faced * 100, 0.0)
+        dot_pct = np.where(balls_bowled > 0, dot_balls / balls_bowled * 100, 0.0)
+
+        # Batting impact (Batsman, All-Rounder, Wicketkeeper); runs per innings == batting_avg
+        batting = np.column_stack([
+            (strike_rate * 0.7) + (batting_avg * 0.3) + 0.7 * (batting_avg + strike_rate),
+            np.sqrt(batting_avg * strike_rate) + (0.5 * boundary_pct),
+            (batting_avg * 0.75) + (batting_avg * 0.15) + ((strike_rate / 2) * 0.10),
+        ])
+
+        # Bowling impact (Bowler, All-Rounder) for players with wickets
+        limited_overs = np.where(economy > 0, (dot_pct * wickets) / (economy ** 2) * 100, 0.0)
+        test = np.where((bowling_avg > 0) & (bowler_sr > 0), (1000 / bowling_avg) + ((100 / bowler_sr) * 2), 0.0)
+        bowling = np.column_stack([limited_overs, limited_overs, test])
+
+    bats = np.isin(role, ['Batsman', 'All-Rounder', 'Wicketkeeper'])
+    bowls = np.isin(role, ['Bowler', 'All-Rounder']) & (wickets > 0)
+    batting = np.where(bats[:, None], batting, 0.0)
+    bowling = np.where(bowls[:, None], bowling, 0.0)
+
+    # Total Impact - For All-Rounders, use average
+    total = np.where((role == 'All-Rounder')[:, None], (batting + bowling) / 2, batting + bowling)
+
+    df['batting_avg'] = batting_avg
+    df['bowling_avg'] = bowling_avg
+    df['bowler_sr'] = bowler_sr
+    df['boundary_pct'] = boundary_pct
+    df['dot_pct'] = dot_pct
+    return {'frame': df, 'batting': batting, 'bowling': bowling, 'total': total}
+
+def format_weights(format_type):
+    """One-hot weights for a single format, or normalized (T20, ODI, Test) blend weights."""
+    if isinstance(format_type, str):
+        return np.eye(len(FORMATS))[FORMATS.index(format_type)]
+    weights = np.asarray(format_type, dtype=np.float64)
+    return weights / weights.sum() if weights.sum() > 0 else np.full(len(FORMATS), 1 / len(FORMATS))
+
+def select_format(scores, format_type):
+    """Attach batting/bowling/total impact for one format (or a blend) - no recomputation."""
+    df = scores['frame'].copy()
+    if isinstance(format_type, str):
+        column = FORMATS.index(format_type)
+        df['batting_impact'] = scores['batting'][:, column]
+        df['bowling_impact'] = scores['bowling'][:, column]
+        df['impact'] = scores['total'][:, column]
+    else:
+        weights = format_weights(format_type)
+        df['batting_impact'] = scores['batting'] @ weights
+        df['bowling_impact'] = scores['bowling'] @ weights
+        df['impact'] = scores['total'] @ weights
+    return df
+
+@timed("impact.score_pool", rows=len)
+@st.cache_data(show_spinner=False, max_entries=4)
+def score_pool(players_df):
+    """All-format impact scores for a pool, computed once per pool."""
+    note_cache_miss("impact.score_pool")
+    return compute_format_impacts(players_df)
+
+def compute_impact(df, format_type):
+    """Calculate impact score based on format (or blend weights) and role."""
+    return select_format(compute_format_impacts(df), format_type)
+
+# Shared on-disk player store: pools are stored once and shared by every session
+PLAYER_DB_PATH = os.getenv("PLAYER_DB_PATH", "players.db")
+
+@st.cache_resource
+def init_player_db():
+    """Create the SQLite schema once per server process."""
+    with closing(sqlite3.connect(PLAYER_DB_PATH)) as conn, conn:
+        stat_columns = ", ".join(f"{column} REAL" for column in PLAYER_COLUMNS[3:])
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS pools (name TEXT PRIMARY KEY, version INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS players (
+                pool TEXT NOT NULL, player_name TEXT NOT NULL, role TEXT, is_overseas INTEGER,
+                {stat_columns}, impact_t20 REAL, impact_odi REAL, impact_test REAL,
+                PRIMARY KEY (pool, player_name)
+            );
+            CREATE INDEX IF NOT EXISTS idx_players_role ON players (pool, role);
+            CREATE INDEX IF NOT EXISTS idx_players_overseas ON players (pool, is_overseas);
+            CREATE INDEX IF NOT EXISTS idx_players_impact_t20 ON players (pool, impact_t20);
+            CREATE INDEX IF NOT EXISTS idx_players_impact_odi ON players (pool, impact_odi);
+            CREATE INDEX IF NOT EXISTS idx_players_impact_test ON players (pool, impact_test);
+            CREATE TABLE IF NOT EXISTS scouted_players (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, player_name TEXT, features TEXT, price REAL,
+                revision INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Older stores kept a row per prediction: keep each player's latest and make names unique
+        if 'revision' not in {row[1] for row in conn.execute("PRAGMA table_info(scouted_players)")}:
+            conn.execute("ALTER TABLE scouted_players ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        conn.executescript("""
+            DELETE FROM scouted_players WHERE id NOT IN (SELECT MAX(id) FROM scouted_players GROUP BY player_name);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_scouted_name ON scouted_players (player_name);
+        """)
+    return PLAYER_DB_PATH
+
+def player_db():
+    return closing(sqlite3.connect(init_player_db()))
+
+def list_pools():
+    with player_db() as conn:
+        return [name for (name,) in conn.execute("SELECT name FROM pools ORDER BY name")]
+
+def save_pool(name, players_df):
+    """Replace a named pool with players_df, storing every format's impact alongside."""
+    players = merge_player_pools(players_df)
+    scores = compute_format_impacts(players)
+    rows = players.assign(**{f"impact_{fmt.lower()}": scores['total'][:, i] for i, fmt in enumerate(FORMATS)})
+    columns = PLAYER_COLUMNS + [f"impact_{fmt.lower()}" for fmt in FORMATS]
+    with player_db() as conn, conn:
+        conn.execute("DELETE FROM players WHERE pool = ?", (name,))
+        conn.executemany(
+            f"INSERT INTO players (pool, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})",
+            ((name, *row) for row in rows[columns].itertuples(index=False, name=None))
+        )
+        conn.execute("INSERT INTO pools (name, version) VALUES (?, 1) "
+                     "ON CONFLICT(name) DO UPDATE SET version = version + 1", (name,))
+
+def pool_version(name):
+    with player_db() as conn:
+        row = conn.execute("SELECT version FROM pools WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_pool(name, version):
+    with player_db() as conn:
+        return pd.read_sql_query(f"SELECT {', '.join(PLAYER_COLUMNS)} FROM players WHERE pool = ? "
+                                 "ORDER BY rowid", conn, params=(name,))
+
+def load_pool(name):
+    """DataFrame for a stored pool: the session's own copy of the server's one cached read.
+
+    The store and the cache are shared; the frame is not, so a session may edit it freely.
+    """
+    version = pool_version(name)
+    return None if version is None else _load_pool(name, version)
+
+def load_bundled_pool(name, json_path):
+    """Load a bundled JSON dataset into the store on first use and return the pool."""
+    if pool_version(name) is None:
+        with open(json_path, 'r') as f:
+            save_pool(name, pd.DataFrame(json.load(f)))
+    return load_pool(name)
+
+def query_pool_players(name, format_type, role=None, overseas=None, limit=10):
+    """Top players of a stored pool by format impact, served from the (pool, ...) indexes."""
+    impact_column = f"impact_{format_type.lower()}"
+    clauses, params = ["pool = ?"], [name]
+    if role is not None:
+        clauses.append("role = ?")
+        params.append(role)
+    if overseas is not None:
+        clauses.append("is_overseas = ?")
+        params.append(int(overseas))
+    with player_db() as conn:
+        return pd.read_sql_query(
+            f"SELECT player_name, role, is_overseas, {impact_column} AS impact FROM players "
+            f"WHERE {' AND '.join(clauses)} ORDER BY {impact_column} DESC LIMIT ?",
+            conn, params=(*params, limit)
+        )
+
+def record_scouted_player(name, features, price):
+    """Store a player's latest prediction, one row per name."""
+    with player_db() as conn, conn:
+        conn.execute("INSERT INTO scouted_players (player_name, features, price, revision) "
+                     "VALUES (?, ?, ?, (SELECT COALESCE(MAX(revision), 0) + 1 FROM scouted_players)) "
+                     "ON CONFLICT(player_name) DO UPDATE SET features = excluded.features, "
+                     "price = excluded.price, revision = excluded.revision",
+                     (name, json.dumps([float(f) for f in features]), float(price)))
+
+def scouted_players_version():
+    """(rows, latest revision): changes whenever a scouted player is added or re-predicted."""
+    with player_db() as conn:
+        return conn.execute("SELECT COUNT(*), COALESCE(MAX(revision), 0) FROM scouted_players").fetchone()
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def load_scouted_players(version):
+    """Every scouted player (names, prices, feature matrix), shared across sessions."""
+    with player_db() as conn:
+        rows = conn.execute("SELECT player_name, price, features FROM scouted_players ORDER BY id").fetchall()
+    return {
+        'names': [row[0] for row in rows],
+        'prices': np.array([row[1] for row in rows]),
+        'features': np.array([json.loads(row[2]) for row in rows], dtype=float),
+    }
+
+# Ball-by-ball aggregates written by ingest_scorecards.py
+SCORECARD_DB_PATH = os.getenv("SCORECARD_DB_PATH", "scorecards.db")
+SCORECARD_FORMS = {'career': "Career", 'decayed': f"Decayed form ({FORM_HALF_LIFE_DAYS}-day half-life)",
+                   'window': f"Last {FORM_WINDOW} matches", 'year': f"Last {FORM_YEAR_DAYS} days"}
+
+# Scenario grid: solver processes (0 = all cores) and the largest grid one click may solve
+SCENARIO_WORKERS = int(os.getenv("SCENARIO_WORKERS", 0)) or None
+MAX_SCENARIOS = 2000
+
+# Player similarity search over standardized feature vectors
+SIMILARITY_STAT_COLUMNS = ["runs_scored", "innings_batted", "balls_faced", "strike_rate", "fours", "sixes",
+                           "wickets", "balls_bowled", "runs_conceded", "economy", "dot_balls", "is_overseas"]
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def build_similarity_index(feature_matrix):
+    """Standardize the feature matrix once and fit a nearest-neighbour tree on it."""
+    matrix = np.nan_to_num(np.asarray(feature_matrix, dtype=np.float64))
+    mean = matrix.mean(axis=0)
+    scale = matrix.std(axis=0)
+    scale[scale == 0] = 1.0
+    tree = NearestNeighbors(algorithm='auto').fit((matrix - mean) / scale)
+    return {'mean': mean, 'scale': scale, 'tree': tree, 'size': len(matrix)}
+
+def find_similar_players(index, query, k=10, exclude=None):
+    """Return (positions, distances) of the k nearest pool rows to a query vector."""
+    query = np.nan_to_num(np.asarray(query, dtype=np.float64)).reshape(1, -1)
+    n_neighbors = min(k + (exclude is not None), index['size'])
+    distances, positions = index['tree'].kneighbors((query - index['mean']) / index['scale'],
+                                                    n_neighbors=n_neighbors)
+    positions, distances = positions[0], distances[0]
+    if exclude is not None:
+        keep = positions != exclude
+        positions, distances = positions[keep], distances[keep]
+    return positions[:k], distances[:k]
 
 # Initialize resources
 gemini_client = init_gemini()
@@ -855,6 +911,8 @@ if model_result[0] is not None:
     price_model, feature_columns = model_result
 else:
     price_model, feature_columns = None, None
+# Recent-form inputs only reach a Ridge model trained on them
+price_model_form = feature_columns is not None and uses_recent_form(feature_columns)
 
 # Enhanced Main Header
 st.markdown("""
@@ -895,18 +953,19 @@ if st.session_state.current_page == "🤖 Cricket AI Chatbot":
         with st.spinner("🏏 Cricket AI is analyzing your question..."):
             try:
                 if gemini_client:
-                    response = gemini_client.models.generate_content(
-                        model="gemini-2.5-flash",
-                        config=types.GenerateContentConfig(
-                            system_instruction=(
-                                "You are a Cricket AI expert with deep knowledge of IPL, international cricket, player statistics, team strategies, and match analysis. "
-                                "You ONLY reply to queries about cricket, IPL auctions, players, stats, team formations, match predictions, and cricket strategy. "
-                                "If the user asks anything unrelated to cricket, reply politely and shut down the unrelated conversation. "
-                                "If it is cricket-related, reply enthusiastically with detailed, insightful explanations including statistics where relevant."
-                            )
-                        ),
-                        contents=user_question
-                    )
+                    with timing("chat.gemini"):
+                        response = gemini_client.models.generate_content(
+                            model="gemini-2.5-flash",
+                            config=types.GenerateContentConfig(
+                                system_instruction=(
+                                    "You are a Cricket AI expert with deep knowledge of IPL, international cricket, player statistics, team strategies, and match analysis. "
+                                    "You ONLY reply to queries about cricket, IPL auctions, players, stats, team formations, match predictions, and cricket strategy. "
+                                    "If the user asks anything unrelated to cricket, reply politely and shut down the unrelated conversation. "
+                                    "If it is cricket-related, reply enthusiastically with detailed, insightful explanations including statistics where relevant."
+                                )
+                            ),
+                            contents=user_question
+                        )
                     ai_reply = response.text.strip() if response.text else "⚠️ No response from Gemini."
                 else:
                     ai_reply = "⚠️ Gemini AI not configured. Please add your GOOGLE_API_KEY to the .env file to unlock full AI capabilities."
@@ -917,32 +976,34 @@ if st.session_state.current_page == "🤖 Cricket AI Chatbot":
         st.session_state.chat_history.append(("ai", ai_reply))
         st.session_state.user_input = ""
 
-    # Display chat history with enhanced styling
-    if st.session_state.chat_history:
-        st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-        for role, msg in st.session_state.chat_history:
-            if role == "user":
-                st.markdown(f'<div class="chat-message user-message"><strong>You:</strong> {msg}</div>', unsafe_allow_html=True)
-            else:
-                st.markdown(f'<div class="chat-message ai-message"><strong>Cricket AI:</strong> {msg}</div>', unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+    @fragment
+    def chat_panel():
+        # Display chat history with enhanced styling
+        if st.session_state.chat_history:
+            st.markdown('<div class="chat-container">', unsafe_allow_html=True)
+            for role, msg in st.session_state.chat_history:
+                if role == "user":
+                    st.markdown(f'<div class="chat-message user-message"><strong>You:</strong> {msg}</div>', unsafe_allow_html=True)
+                else:
+                    st.markdown(f'<div class="chat-message ai-message"><strong>Cricket AI:</strong> {msg}</div>', unsafe_allow_html=True)
+            st.markdown('</div>', unsafe_allow_html=True)
 
-    # Enhanced input section
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        st.text_input(
-            "Ask your cricket question:",
-            key="user_input",
-            placeholder="e.g., 'Who is Virat Kohli?'",
-            on_change=handle_submit,
-            help="Press Enter to send your question to Cricket AI"
-        )
+        # Enhanced input section
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.text_input(
+                "Ask your cricket question:",
+                key="user_input",
+                placeholder="e.g., 'Who is Virat Kohli?'",
+                on_change=handle_submit,
+                help="Press Enter to send your question to Cricket AI"
+            )
     
-    with col2:
-        if st.button("🚀 Send", use_container_width=True):
-            handle_submit()
+        with col2:
+            st.button("🚀 Send", use_container_width=True, on_click=handle_submit)
+
+    chat_panel()
 
-    
 
 # ============================================================================
 # PRICE PREDICTOR 
@@ -962,324 +1023,348 @@ elif st.session_state.current_page == "💰 Price Predictor":
     else:
         # Display model info
         st.info("""
-        **🤖 Model:** Ridge Regression | **📊 Dataset:** 236 IPL Players (2024-2025)  
+        **🤖 Models:** Ridge Regression or XGBoost pipeline | **📊 Dataset:** 236 IPL Players (2024-2025)  
         **⚠️ Accuracy:** 15.7% within ±20% | **Premium Players:** 29-35% accuracy
         """)
         
-        # Enhanced input form with IPL + T20I stats
-        with st.form("player_form", clear_on_submit=False):
-            st.markdown("### 📊 Player Information")
-            
-            # Basic Info
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                player_name = st.text_input("🏏 Player Name", placeholder="e.g., Virat Kohli")
-            with col2:
-                country = st.selectbox("🌍 Country", 
-                    ['india', 'australia', 'england', 'south africa', 'new zealand', 
-                     'west indies', 'pakistan', 'sri lanka', 'bangladesh', 'afghanistan', 'other'])
-            with col3:
-                age = st.number_input("🎂 Age", min_value=16, max_value=45, value=30)
-            
-            role = st.selectbox("👤 Role", 
-                ['batsman', 'bowler', 'batting-allrounder', 'bowling-allrounder', 'wk-batsman'])
-            
-            st.markdown("---")
-            st.markdown("### 🏏 IPL Performance Stats")
-            
+        @fragment
+        def price_predictor_panel():
+            xgb_model = load_xgb_model()
             col1, col2 = st.columns(2)
-            
             with col1:
-                st.markdown("**Batting**")
-                ipl_matches = st.number_input("IPL Matches", min_value=0, max_value=2500, value=0, help="Total IPL matches played")
-                ipl_runs = st.number_input("IPL Runs", min_value=0, max_value=10000, value=0)
-                ipl_avg = st.number_input("IPL Batting Average", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
-                ipl_sr = st.number_input("IPL Strike Rate", min_value=0.0, max_value=3000.0, value=0.0, step=0.1)
-                ipl_sixes = st.number_input("IPL Sixes", min_value=0, max_value=5000, value=0)
-            
+                model_name = st.radio("🤖 Price Model", PRICE_MODELS if xgb_model else PRICE_MODELS[:1],
+                                      horizontal=True, key="price_model_choice",
+                                      help="XGBoost maps the career inputs onto the per-season IPL stats it was "
+                                           "trained on")
             with col2:
-                st.markdown("**Bowling**")
-                ipl_wickets = st.number_input("IPL Wickets", min_value=0, max_value=3000, value=0)
-                ipl_economy = st.number_input("IPL Economy", min_value=0.0, max_value=1500.0, value=0.0, step=0.1)
-                ipl_bowl_sr = st.number_input("IPL Bowling SR", min_value=0.0, max_value=5000.0, value=0.0, step=0.1)
+                coverage = st.select_slider("🎯 Interval Coverage", INTERVAL_LEVELS, value=0.9,
+                                            format_func=lambda level: f"{level:.0%}", key="interval_coverage",
+                                            help="Conformal intervals from held-out residuals of the model")
+            # Enhanced input form with IPL + T20I stats
+            with st.form("player_form", clear_on_submit=False):
+                st.markdown("### 📊 Player Information")
             
-            st.markdown("---")
-            st.markdown("### 🌏 T20 International Stats")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("**Batting**")
-                t20_matches = st.number_input("T20I Matches", min_value=0, max_value=15000, value=0)
-                t20_runs = st.number_input("T20I Runs", min_value=0, max_value=50000, value=0)
-                t20_avg = st.number_input("T20I Batting Average", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
-                t20_sr = st.number_input("T20I Strike Rate", min_value=0.0, max_value=3000.0, value=0.0, step=0.1)
-            
-            with col2:
-                st.markdown("**Bowling**")
-                t20_wickets = st.number_input("T20I Wickets", min_value=0, max_value=2000, value=0)
-                t20_economy = st.number_input("T20I Economy", min_value=0.0, max_value=1500.0, value=0.0, step=0.1)
-                t20_bowl_sr = st.number_input("T20I Bowling SR", min_value=0.0, max_value=5000.0, value=0.0, step=0.1)
-
-            submitted = st.form_submit_button("🔮 Predict Auction Price", use_container_width=True)
-
-        # Enhanced prediction results 
-        if submitted:
-            try:
-                # Prepare player data
-                player_data = {
-                    'country': country,
-                    'age': age,
-                    'role': role,
-                    'ipl_matches': ipl_matches,
-                    'ipl_runs': ipl_runs,
-                    'ipl_avg': ipl_avg,
-                    'ipl_sr': ipl_sr,
-                    'ipl_sixes': ipl_sixes,
-                    'ipl_wickets': ipl_wickets,
-                    'ipl_economy': ipl_economy,
-                    'ipl_bowl_sr': ipl_bowl_sr,
-                    't20_matches': t20_matches,
-                    't20_runs': t20_runs,
-                    't20_avg': t20_avg,
-                    't20_sr': t20_sr,
-                    't20_wickets': t20_wickets,
-                    't20_economy': t20_economy,
-                    't20_bowl_sr': t20_bowl_sr
-                }
-                
-                # Engineer features
-                features = engineer_features(player_data)
-                features_array = np.array(features).reshape(1, -1)
-                
-                # Make prediction
-                log_price = price_model.predict(features_array)[0]
-                predicted_price = np.expm1(log_price)
-                predicted_price = np.clip(predicted_price, 0.2, 30)
-                
-                # Calculate confidence range (±25%)
-                lower_bound = predicted_price * 0.75
-                upper_bound = predicted_price * 1.25
-                
-                # Results display
-                st.markdown("---")
-                st.markdown("### 🎯 Prediction Results")
-                
-                # Row 1: Main Metrics (3 columns only)
+                # Basic Info
                 col1, col2, col3 = st.columns(3)
-                
                 with col1:
-                    st.markdown(f"""
-                    <div class="stats-card">
-                        <div class="stat-value">₹{predicted_price:.2f}Cr</div>
-                        <div class="stat-label">Predicted Price</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
+                    player_name = st.text_input("🏏 Player Name", placeholder="e.g., Virat Kohli")
                 with col2:
-                    st.markdown(f"""
-                    <div class="stats-card">
-                        <div class="stat-value" style="font-size: 1.3rem;">₹{lower_bound:.2f}-{upper_bound:.2f}Cr</div>
-                        <div class="stat-label">Confidence Range (±25%)</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
+                    country = st.selectbox("🌍 Country", 
+                        ['india', 'australia', 'england', 'south africa', 'new zealand', 
+                         'west indies', 'pakistan', 'sri lanka', 'bangladesh', 'afghanistan', 'other'])
                 with col3:
-                    if predicted_price > 10:
-                        category = "💎 Premium Player"
-                        color = "#FFD700"
-                    elif predicted_price >= 2:
-                        category = "⭐ Core Player"
-                        color = "#4ECDC4"
-                    else:
-                        category = "🔧 Base Player"
-                        color = "#FF6B6B"
-                    
-                    st.markdown(f"""
-                    <div class="stats-card" style="background: linear-gradient(135deg, {color}22 0%, {color}44 100%);">
-                        <div class="stat-value" style="font-size: 1.5rem; color: {color};">{category}</div>
-                        <div class="stat-label" style="color: #333;">Player Category</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Row 2: Impact Analysis
+                    age = st.number_input("🎂 Age", min_value=16, max_value=45, value=30)
+            
+                role = st.selectbox("👤 Role", 
+                    ['batsman', 'bowler', 'batting-allrounder', 'bowling-allrounder', 'wk-batsman'])
+            
                 st.markdown("---")
-                st.markdown("### 📈 Impact Analysis")
+                st.markdown("### 🏏 IPL Performance Stats")
+            
                 col1, col2 = st.columns(2)
-                
+            
                 with col1:
-                    st.markdown(f"""
-                    <div class="feature-card" style="text-align: center; padding: 1.5rem; background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%); color: white; border-radius: 15px; box-shadow: 0 8px 20px rgba(46, 139, 87, 0.3);">
-                        <div style="font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem;">{features[5]:.2f}</div>
-                        <div style="font-size: 1rem; opacity: 0.9; font-weight: 500;">🏏 BATTING IMPACT</div>
-                        <div style="font-size: 0.85rem; opacity: 0.8; margin-top: 0.5rem;">Runs, Strike Rate & Average</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
+                    st.markdown("**Batting**")
+                    ipl_matches = st.number_input("IPL Matches", min_value=0, max_value=2500, value=0, help="Total IPL matches played")
+                    ipl_runs = st.number_input("IPL Runs", min_value=0, max_value=10000, value=0)
+                    ipl_avg = st.number_input("IPL Batting Average", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
+                    ipl_sr = st.number_input("IPL Strike Rate", min_value=0.0, max_value=3000.0, value=0.0, step=0.1)
+                    ipl_sixes = st.number_input("IPL Sixes", min_value=0, max_value=5000, value=0)
+            
                 with col2:
-                    st.markdown(f"""
-                    <div class="feature-card" style="text-align: center; padding: 1.5rem; background: linear-gradient(135deg, #4ECDC4 0%, #45B7D1 100%); color: white; border-radius: 15px; box-shadow: 0 8px 20px rgba(78, 205, 196, 0.3);">
-                        <div style="font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem;">{features[6]:.2f}</div>
-                        <div style="font-size: 1rem; opacity: 0.9; font-weight: 500;">🎳 BOWLING IMPACT</div>
-                        <div style="font-size: 0.85rem; opacity: 0.8; margin-top: 0.5rem;">Wickets, Economy & Strike Rate</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Row 3: Player Attributes
+                    st.markdown("**Bowling**")
+                    ipl_wickets = st.number_input("IPL Wickets", min_value=0, max_value=3000, value=0)
+                    ipl_economy = st.number_input("IPL Economy", min_value=0.0, max_value=1500.0, value=0.0, step=0.1)
+                    ipl_bowl_sr = st.number_input("IPL Bowling SR", min_value=0.0, max_value=5000.0, value=0.0, step=0.1)
+            
                 st.markdown("---")
-                st.markdown("### 🏆 Player Attributes")
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    star_badge = " Yes" if features[10] else " No"
-                    star_color = "#32CD32" if features[10] else "#FF6B6B"
-                    st.markdown(f"""
-                    <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {star_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
-                        <div style="font-size: 2rem; margin-bottom: 0.5rem;">{star_badge}</div>
-                        <div style="font-size: 0.95rem; color: {star_color}; font-weight: 600;">⭐ STAR PLAYER</div>
-                        <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">2000+ runs or 100+ wickets</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
+                st.markdown("### 🌏 T20 International Stats")
+            
+                col1, col2 = st.columns(2)
+            
+                with col1:
+                    st.markdown("**Batting**")
+                    t20_matches = st.number_input("T20I Matches", min_value=0, max_value=15000, value=0)
+                    t20_runs = st.number_input("T20I Runs", min_value=0, max_value=50000, value=0)
+                    t20_avg = st.number_input("T20I Batting Average", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
+                    t20_sr = st.number_input("T20I Strike Rate", min_value=0.0, max_value=3000.0, value=0.0, step=0.1)
+            
                 with col2:
-                    explosive_badge = " Yes" if features[11] else " No"
-                    explosive_color = "#FF6347" if features[11] else "#999"
-                    st.markdown(f"""
-                    <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {explosive_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
-                        <div style="font-size: 2rem; margin-bottom: 0.5rem;">{explosive_badge}</div>
-                        <div style="font-size: 0.95rem; color: {explosive_color}; font-weight: 600;">💥 EXPLOSIVE FACTOR</div>
-                        <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">SR > 150 or 50+ sixes</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col3:
-                    exp_tier = int(features[2])
-                    exp_color = ["#999", "#4ECDC4", "#32CD32", "#FFD700"][exp_tier]
-                    st.markdown(f"""
-                    <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {exp_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
-                        <div style="font-size: 2.5rem; font-weight: 700; color: {exp_color}; margin-bottom: 0.5rem;">{exp_tier}/3</div>
-                        <div style="font-size: 0.95rem; color: {exp_color}; font-weight: 600;">📊 EXPERIENCE TIER</div>
-                        <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">IPL Matches Played</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col4:
-                    intl_exposure = features[3]
-                    intl_color = "#2E8B57" if intl_exposure > 3 else "#4ECDC4" if intl_exposure > 1 else "#999"
-                    st.markdown(f"""
-                    <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {intl_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
-                        <div style="font-size: 2.5rem; font-weight: 700; color: {intl_color}; margin-bottom: 0.5rem;">{intl_exposure:.1f}</div>
-                        <div style="font-size: 0.95rem; color: {intl_color}; font-weight: 600;">🌏 INT'L EXPOSURE</div>
-                        <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">T20I Experience</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                # Visualization using Plotly 
-                st.markdown("### 📊 Performance Analysis Dashboard")
+                    st.markdown("**Bowling**")
+                    t20_wickets = st.number_input("T20I Wickets", min_value=0, max_value=2000, value=0)
+                    t20_economy = st.number_input("T20I Economy", min_value=0.0, max_value=1500.0, value=0.0, step=0.1)
+                    t20_bowl_sr = st.number_input("T20I Bowling SR", min_value=0.0, max_value=5000.0, value=0.0, step=0.1)
+
+                with st.expander("📈 Recent Form (optional)"):
+                    use_recent_form = st.checkbox(
+                        "Score Form Momentum from recent form", key="use_recent_form", disabled=not price_model_form,
+                        help="e.g. the last 10 IPL innings, instead of career impact" if price_model_form else
+                        "The loaded price model was trained on career impact; retrain with form_* columns "
+                        "(train_price_model.py) to use recent form")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        form_runs = st.number_input("Recent Runs", min_value=0, max_value=5000, value=0)
+                        form_avg = st.number_input("Recent Batting Average", min_value=0.0, max_value=1000.0, value=0.0, step=0.1)
+                        form_sr = st.number_input("Recent Strike Rate", min_value=0.0, max_value=3000.0, value=0.0, step=0.1)
+                    with col2:
+                        form_wickets = st.number_input("Recent Wickets", min_value=0, max_value=500, value=0)
+                        form_economy = st.number_input("Recent Economy", min_value=0.0, max_value=1500.0, value=0.0, step=0.1)
+                        form_bowl_sr = st.number_input("Recent Bowling SR", min_value=0.0, max_value=5000.0, value=0.0, step=0.1)
+
+                submitted = st.form_submit_button("🔮 Predict Auction Price", use_container_width=True)
+
+            # Enhanced prediction results 
+            if submitted:
+                try:
+                    # Prepare player data
+                    player_data = {
+                        'country': country,
+                        'age': age,
+                        'role': role,
+                        'ipl_matches': ipl_matches,
+                        'ipl_runs': ipl_runs,
+                        'ipl_avg': ipl_avg,
+                        'ipl_sr': ipl_sr,
+                        'ipl_sixes': ipl_sixes,
+                        'ipl_wickets': ipl_wickets,
+                        'ipl_economy': ipl_economy,
+                        'ipl_bowl_sr': ipl_bowl_sr,
+                        't20_matches': t20_matches,
+                        't20_runs': t20_runs,
+                        't20_avg': t20_avg,
+                        't20_sr': t20_sr,
+                        't20_wickets': t20_wickets,
+                        't20_economy': t20_economy,
+                        't20_bowl_sr': t20_bowl_sr
+                    }
+                    if use_recent_form and price_model_form:
+                        player_data.update(form_runs=form_runs, form_avg=form_avg, form_sr=form_sr,
+                                           form_wickets=form_wickets, form_economy=form_economy,
+                                           form_bowl_sr=form_bowl_sr)
                 
-                # Create 2x2 subplot
-                fig = make_subplots(
-                    rows=2, cols=2,
-                    subplot_titles=('Feature Contributions', 'IPL vs T20I Impact', 
-                                  'Experience & Form', 'Price Category Gauge'),
-                    specs=[[{"type": "bar"}, {"type": "bar"}],
-                           [{"type": "scatter"}, {"type": "indicator"}]]
-                )
+                    with timing(f"predict.{model_name.lower()}", rows=1):
+                        # Features, impact breakdown and prediction (with contributions) from the feature store
+                        entry = player_prediction(model_name, player_data)
+                        features = entry['features']
+                        prediction = entry['predictions'][price_model_tag(model_name)]
+                        log_prices = np.array([prediction['log_price']])
+                        contributions, intercept = np.array([prediction['contributions']]), prediction['intercept']
+                        contribution_names = xgb_model['columns'] if model_name == "XGBoost" else feature_columns
+                        predicted_price = log_prices_to_crore(model_name, log_prices)[0]
+                        lower_bound, upper_bound = price_interval(model_name, log_prices, coverage)
                 
-                # Chart 1: Top Feature Contributions
-                feature_names = ['Batting Impact', 'Bowling Impact', 'Role Spec', 'Form Momentum', 
-                               'Consistency', 'Int\'l Exposure']
-                feature_values = [features[5], features[6], features[8], features[9], 
-                                features[7], features[3]]
+                    # Results display
+                    st.markdown("---")
+                    st.markdown("### 🎯 Prediction Results")
                 
-                fig.add_trace(
-                    go.Bar(x=feature_names, y=feature_values,
-                          marker_color=['#2E8B57', '#32CD32', '#90EE90', '#98FB98', '#3CB371', '#20B2AA'],
-                          name='Features'),
-                    row=1, col=1
-                )
+                    # Row 1: Main Metrics (3 columns only)
+                    col1, col2, col3 = st.columns(3)
                 
-                # Chart 2: IPL vs T20I Impact Comparison
-                batting_impact_ipl = calculate_batting_impact(ipl_runs, ipl_sr, ipl_avg, 0, 0, 0)
-                batting_impact_t20 = calculate_batting_impact(0, 0, 0, t20_runs, t20_sr, t20_avg)
-                bowling_impact_ipl = calculate_bowling_impact(ipl_wickets, ipl_economy, ipl_bowl_sr, 0, 0, 0)
-                bowling_impact_t20 = calculate_bowling_impact(0, 0, 0, t20_wickets, t20_economy, t20_bowl_sr)
+                    with col1:
+                        st.markdown(f"""
+                        <div class="stats-card">
+                            <div class="stat-value">₹{predicted_price:.2f}Cr</div>
+                            <div class="stat-label">Predicted Price</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
-                fig.add_trace(
-                    go.Bar(x=['IPL Batting', 'T20I Batting', 'IPL Bowling', 'T20I Bowling'],
-                          y=[batting_impact_ipl, batting_impact_t20, bowling_impact_ipl, bowling_impact_t20],
-                          marker_color=['#FFD700', '#FFA500', '#4ECDC4', '#45B7D1'],
-                          name='Performance'),
-                    row=1, col=2
-                )
+                    with col2:
+                        if lower_bound is None:
+                            interval_text, interval_label = "Not calibrated", "Prediction Interval"
+                        else:
+                            interval_text = f"₹{lower_bound[0]:.2f}-{upper_bound[0]:.2f}Cr"
+                            interval_label = f"{coverage:.0%} Prediction Interval"
+                        st.markdown(f"""
+                        <div class="stats-card">
+                            <div class="stat-value" style="font-size: 1.3rem;">{interval_text}</div>
+                            <div class="stat-label">{interval_label}</div>
+                        </div>
+                        """, unsafe_allow_html=True)
+                        if lower_bound is None:
+                            st.caption(f"No `{interval_path(PRICE_MODEL_PATHS[model_name])}` found; "
+                                       f"`train_price_model.py holdout.csv --calibrate "
+                                       f"{PRICE_MODEL_PATHS[model_name]}` writes one from a priced hold-out set.")
                 
-                # Chart 3: Experience vs Form Scatter
-                fig.add_trace(
-                    go.Scatter(x=[features[2]], y=[features[9]], 
-                              mode='markers+text',
-                              marker=dict(size=predicted_price*10, color='#2E8B57', 
-                                        line=dict(width=2, color='white')),
-                              text=[player_name or 'Player'],
-                              textposition='top center',
-                              name=player_name or 'Player'),
-                    row=2, col=1
-                )
+                    with col3:
+                        if predicted_price > 10:
+                            category = "💎 Premium Player"
+                            color = "#FFD700"
+                        elif predicted_price >= 2:
+                            category = "⭐ Core Player"
+                            color = "#4ECDC4"
+                        else:
+                            category = "🔧 Base Player"
+                            color = "#FF6B6B"
+                    
+                        st.markdown(f"""
+                        <div class="stats-card" style="background: linear-gradient(135deg, {color}22 0%, {color}44 100%);">
+                            <div class="stat-value" style="font-size: 1.5rem; color: {color};">{category}</div>
+                            <div class="stat-label" style="color: #333;">Player Category</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
-                # Add reference lines
-                fig.add_hline(y=features[9], line_dash="dash", line_color="gray", 
-                            opacity=0.5, row=2, col=1)
-                fig.add_vline(x=features[2], line_dash="dash", line_color="gray", 
-                            opacity=0.5, row=2, col=1)
+                    # Row 2: Impact Analysis
+                    st.markdown("---")
+                    st.markdown("### 📈 Impact Analysis")
+                    col1, col2 = st.columns(2)
                 
-                # Chart 4: Price Category Gauge
-                fig.add_trace(
-                    go.Indicator(
-                        mode="gauge+number+delta",
-                        value=predicted_price,
-                        domain={'x': [0, 1], 'y': [0, 1]},
-                        title={'text': "Price (Cr)", 'font': {'size': 16}},
-                        delta={'reference': 5, 'increasing': {'color': "#2E8B57"}},
-                        gauge={
-                            'axis': {'range': [None, 30], 'tickwidth': 1},
-                            'bar': {'color': "#2E8B57"},
-                            'steps': [
-                                {'range': [0, 2], 'color': "#FFE5E5"},
-                                {'range': [2, 10], 'color': "#E5F5FF"},
-                                {'range': [10, 30], 'color': "#E5FFE5"}
-                            ],
-                            'threshold': {
-                                'line': {'color': "red", 'width': 4},
-                                'thickness': 0.75,
-                                'value': predicted_price
-                            }
-                        }
-                    ),
-                    row=2, col=2
-                )
+                    with col1:
+                        st.markdown(f"""
+                        <div class="feature-card" style="text-align: center; padding: 1.5rem; background: linear-gradient(135deg, #2E8B57 0%, #32CD32 100%); color: white; border-radius: 15px; box-shadow: 0 8px 20px rgba(46, 139, 87, 0.3);">
+                            <div style="font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem;">{features[5]:.2f}</div>
+                            <div style="font-size: 1rem; opacity: 0.9; font-weight: 500;">🏏 BATTING IMPACT</div>
+                            <div style="font-size: 0.85rem; opacity: 0.8; margin-top: 0.5rem;">Runs, Strike Rate & Average</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
-                # Update layout
-                fig.update_xaxes(title_text="Features", row=1, col=1)
-                fig.update_yaxes(title_text="Value", row=1, col=1)
-                fig.update_xaxes(title_text="Performance Type", row=1, col=2)
-                fig.update_yaxes(title_text="Impact Score", row=1, col=2)
-                fig.update_xaxes(title_text="Experience Tier (0-3)", row=2, col=1)
-                fig.update_yaxes(title_text="Form Momentum", row=2, col=1)
+                    with col2:
+                        st.markdown(f"""
+                        <div class="feature-card" style="text-align: center; padding: 1.5rem; background: linear-gradient(135deg, #4ECDC4 0%, #45B7D1 100%); color: white; border-radius: 15px; box-shadow: 0 8px 20px rgba(78, 205, 196, 0.3);">
+                            <div style="font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem;">{features[6]:.2f}</div>
+                            <div style="font-size: 1rem; opacity: 0.9; font-weight: 500;">🎳 BOWLING IMPACT</div>
+                            <div style="font-size: 0.85rem; opacity: 0.8; margin-top: 0.5rem;">Wickets, Economy & Strike Rate</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
-                fig.update_layout(
-                    height=800, 
-                    showlegend=False,
-                    title_text=f"Performance Analysis: {player_name or 'Player'}",
-                    title_font_size=20
-                )
+                    # Row 3: Player Attributes
+                    st.markdown("---")
+                    st.markdown("### 🏆 Player Attributes")
+                    col1, col2, col3, col4 = st.columns(4)
                 
-                st.plotly_chart(fig, use_container_width=True)
+                    with col1:
+                        star_badge = " Yes" if features[10] else " No"
+                        star_color = "#32CD32" if features[10] else "#FF6B6B"
+                        st.markdown(f"""
+                        <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {star_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
+                            <div style="font-size: 2rem; margin-bottom: 0.5rem;">{star_badge}</div>
+                            <div style="font-size: 0.95rem; color: {star_color}; font-weight: 600;">⭐ STAR PLAYER</div>
+                            <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">2000+ runs or 100+ wickets</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
+                    with col2:
+                        explosive_badge = " Yes" if features[11] else " No"
+                        explosive_color = "#FF6347" if features[11] else "#999"
+                        st.markdown(f"""
+                        <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {explosive_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
+                            <div style="font-size: 2rem; margin-bottom: 0.5rem;">{explosive_badge}</div>
+                            <div style="font-size: 0.95rem; color: {explosive_color}; font-weight: 600;">💥 EXPLOSIVE FACTOR</div>
+                            <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">SR > 150 or 50+ sixes</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
+                    with col3:
+                        exp_tier = int(features[2])
+                        exp_color = ["#999", "#4ECDC4", "#32CD32", "#FFD700"][exp_tier]
+                        st.markdown(f"""
+                        <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {exp_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
+                            <div style="font-size: 2.5rem; font-weight: 700; color: {exp_color}; margin-bottom: 0.5rem;">{exp_tier}/3</div>
+                            <div style="font-size: 0.95rem; color: {exp_color}; font-weight: 600;">📊 EXPERIENCE TIER</div>
+                            <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">IPL Matches Played</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
+                    with col4:
+                        intl_exposure = features[3]
+                        intl_color = "#2E8B57" if intl_exposure > 3 else "#4ECDC4" if intl_exposure > 1 else "#999"
+                        st.markdown(f"""
+                        <div class="feature-card" style="text-align: center; padding: 1.5rem; background: white; border: 2px solid {intl_color}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
+                            <div style="font-size: 2.5rem; font-weight: 700; color: {intl_color}; margin-bottom: 0.5rem;">{intl_exposure:.1f}</div>
+                            <div style="font-size: 0.95rem; color: {intl_color}; font-weight: 600;">🌏 INT'L EXPOSURE</div>
+                            <div style="font-size: 0.8rem; color: #666; margin-top: 0.3rem;">T20I Experience</div>
+                        </div>
+                        """, unsafe_allow_html=True)
                 
-            except Exception as e:
-                st.error(f" Prediction failed: {e}")
-                st.exception(e)
+                    # Visualization using Plotly
+                    st.markdown("### 📊 Performance Analysis Dashboard")
+
+                    dashboard = build_prediction_dashboard(
+                        tuple(round(float(f), 4) for f in features),
+                        round(float(predicted_price), 2),
+                        player_name,
+                        tuple(round(float(v), 4) for v in entry['impact_breakdown']),
+                        top_contributions(contributions[0].round(4), contribution_names),
+                        round(intercept, 4)
+                    )
+                    st.plotly_chart(dashboard, use_container_width=True)
+
+                    # Similar players among everyone scouted so far (shared player store)
+                    scouted = load_scouted_players(scouted_players_version())
+                    # A re-predicted player is not their own nearest neighbour
+                    own = scouted['names'].index(player_name) if player_name in scouted['names'] else None
+                    if len(scouted['names']) > (own is not None):
+                        st.markdown("### 🔍 Most Similar Scouted Players")
+                        similarity_index = build_similarity_index(scouted['features'])
+                        positions, distances = find_similar_players(similarity_index, features, k=10, exclude=own)
+                        st.dataframe(
+                            pd.DataFrame({
+                                'Player': [scouted['names'][i] for i in positions],
+                                'Predicted Price (Cr)': scouted['prices'][positions],
+                                'Distance': distances,
+                            }),
+                            use_container_width=True,
+                            column_config={
+                                "Predicted Price (Cr)": st.column_config.NumberColumn(format="₹%.2f"),
+                                "Distance": st.column_config.NumberColumn(format="%.2f"),
+                            }
+                        )
+                    if player_name:
+                        record_scouted_player(player_name, features, predicted_price)
+                    st.session_state.sweep_player = player_data
+
+                except Exception as e:
+                    st.error(f" Prediction failed: {e}")
+                    st.exception(e)
+
+            # What-if sweep around the last predicted player
+            if st.session_state.get("sweep_player"):
+                base_player = st.session_state.sweep_player
+                st.markdown("---")
+                st.markdown("### 🔬 What-If Price Sweep")
+                sweep_labels = list(SWEEP_FIELDS)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    x_label = st.selectbox("Vary", sweep_labels, key="sweep_x")
+                with col2:
+                    y_label = st.selectbox("And (optional)", ["None"] + [l for l in sweep_labels if l != x_label],
+                                           key="sweep_y")
+                with col3:
+                    steps = st.number_input("Grid Steps", 2, 100, 50, key="sweep_steps")
+
+                axes = []
+                for label in [x_label] + ([y_label] if y_label != "None" else []):
+                    field, span = SWEEP_FIELDS[label]
+                    start = float(base_player[field])
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        low = st.number_input(f"{label} From", 0.0, value=start, key=f"sweep_{field}_from")
+                    with col2:
+                        high = st.number_input(f"{label} To", 0.0, value=start + span, key=f"sweep_{field}_to")
+                    axes.append((label, field, np.linspace(low, high, int(steps))))
+
+                (x_label, x_field, x_values) = axes[0]
+                if len(axes) == 1:
+                    prices, lower, upper = sweep_price_grid(model_name, base_player, x_field, x_values,
+                                                            level=coverage)
+                    sweep_fig = go.Figure()
+                    if lower is not None:
+                        sweep_fig.add_trace(go.Scatter(
+                            x=np.concatenate([x_values, x_values[::-1]]).round(2),
+                            y=np.concatenate([upper, lower[::-1]]).round(3), fill='toself',
+                            fillcolor='rgba(46, 139, 87, 0.15)', line=dict(width=0), hoverinfo='skip',
+                            name=f"{coverage:.0%} interval"))
+                    sweep_fig.add_trace(go.Scatter(x=x_values.round(2), y=prices.round(3), mode='lines',
+                                                   line=dict(color='#2E8B57', width=3), name="Predicted"))
+                    sweep_fig.update_layout(xaxis_title=x_label, yaxis_title="Predicted Price (Cr)", height=450)
+                else:
+                    (y_label, y_field, y_values) = axes[1]
+                    prices, _, _ = sweep_price_grid(model_name, base_player, x_field, x_values, y_field, y_values)
+                    sweep_fig = go.Figure(go.Heatmap(x=x_values.round(2), y=y_values.round(2), z=prices.round(3),
+                                                     colorscale='Greens', colorbar=dict(title="Cr")))
+                    sweep_fig.update_layout(xaxis_title=x_label, yaxis_title=y_label, height=550)
+                st.plotly_chart(sweep_fig, use_container_width=True)
+
+        price_predictor_panel()
 
 
 # ============================================================================
@@ -1296,108 +1381,190 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
     """, unsafe_allow_html=True)
 
     # Team constraints in main area instead of sidebar
-    st.markdown("### ⚙️ Team Configuration")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        team_size = st.number_input("👥 Team Size", 0, 30, 11)
-        max_overseas = st.slider("🌍 Max Overseas", 0, 10, 4)
-        min_batsmen = st.slider("🏏 Min Batsmen", 0, 20, 3)
-    
-    with col2:
-        min_bowlers = st.slider("🎳 Min Bowlers", 0, 20, 3)
-        min_allrounders = st.slider("⚡ Min All-Rounders", 0, 20, 2)
-        min_wk = st.slider("🧤 Min Wicketkeepers", 0, 20, 1)
+    ROLE_MINIMUM_KEYS = {"Batsman": "min_batsmen", "Bowler": "min_bowlers", "All-Rounder": "min_allrounders",
+                         "Wicketkeeper": "min_wk"}
+    RULES_PLACEHOLDER = """roles:
+  Batsman: {max: 6}
+batting_slots:
+  openers: {count: 2, roles: [Batsman, Wicketkeeper]}
+bowling: {overs: 20, max_overs_per_bowler: 4}
+must_include: [Virat Kohli]
+must_exclude: []
+conflicts: [[Player A, Player B]]"""
+
+    def constraint_spec():
+        """Slider settings as a constraint spec, overlaid with the advanced YAML rules."""
+        base = {
+            'team_size': int(st.session_state.team_size),
+            'max_overseas': int(st.session_state.max_overseas),
+            'roles': {role: {'min': int(st.session_state[key])} for role, key in ROLE_MINIMUM_KEYS.items()},
+        }
+        if st.session_state.captaincy:
+            base['captaincy'] = {'captain': 2.0, 'vice_captain': 1.5}
+        return merge_specs(base, parse_spec(st.session_state.constraint_rules))
+
+    def solver_settings():
+        return {
+            'backend': st.session_state.solver_backend,
+            'time_limit': st.session_state.solver_time_limit or None,
+            'gap': st.session_state.solver_gap / 100 if st.session_state.solver_gap else None,
+        }
 
-    
+    @fragment
+    def team_configuration():
+        st.markdown("### ⚙️ Team Configuration")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.number_input("👥 Team Size", 0, 30, 11, key="team_size")
+            st.slider("🌍 Max Overseas", 0, 10, 4, key="max_overseas")
+            st.slider("🏏 Min Batsmen", 0, 20, 3, key="min_batsmen")
+
+        with col2:
+            st.slider("🎳 Min Bowlers", 0, 20, 3, key="min_bowlers")
+            st.slider("⚡ Min All-Rounders", 0, 20, 2, key="min_allrounders")
+            st.slider("🧤 Min Wicketkeepers", 0, 20, 1, key="min_wk")
+
+        st.checkbox("🎖️ Pick captain (2×) and vice-captain (1.5×) with the XI", value=True, key="captaincy")
+
+        with st.expander("🧮 Solver Settings"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.selectbox("Backend", available_backends(), key="solver_backend")
+            with col2:
+                st.number_input("Time Limit (s)", 0.0, 600.0, 10.0, help="0 = no limit", key="solver_time_limit")
+            with col3:
+                st.number_input("Relative Gap (%)", 0.0, 50.0, 0.0, help="Stop once within this gap of the optimum",
+                                key="solver_gap")
+
+        with st.expander("📜 Advanced Rules (YAML)"):
+            st.text_area("Rules", "", height=200, placeholder=RULES_PLACEHOLDER, key="constraint_rules",
+                         help="Role maximums, batting slots, bowling overs, must-include/exclude players and "
+                              "conflicting pairs. Overrides the sliders above.")
+
+    team_configuration()
 
     # Session state initialization 
     if "players" not in st.session_state:
-        st.session_state.players = pd.DataFrame(columns=[
-            "player_name", "role", "is_overseas",
-            "runs_scored", "innings_batted", "balls_faced", "strike_rate", "fours", "sixes",
-            "wickets", "balls_bowled", "runs_conceded", "economy", "dot_balls"
-        ])
+        st.session_state.players = pd.DataFrame(columns=PLAYER_COLUMNS)
+    if "team_state" not in st.session_state:
+        st.session_state.team_state = None
+
+    # Pool index for server-side filtering, sorting and paging
+    @st.cache_data(show_spinner=False)
+    def build_pool_index(players_df, format_type):
+        """Score the pool once and precompute sort orders for paged queries."""
+        scored = select_format(score_pool(players_df), format_type).reset_index(drop=True)
+        names = scored['player_name'].astype(str).str.lower().to_numpy().astype(str)
+        impacts = scored['impact'].to_numpy(dtype=float)
+        name_order = np.argsort(names, kind='stable')
+        impact_order = np.argsort(impacts, kind='stable')
+        return {
+            'scored': scored,
+            'name_order': name_order,
+            'sorted_names': names[name_order],
+            'impact_order': impact_order,
+            'sorted_impacts': impacts[impact_order],
+        }
+
+    def query_pool(index, roles, overseas_filter, name_prefix, impact_range, sort_by, ascending):
+        """Return row positions of the filtered pool in display order."""
+        scored = index['scored']
+        mask = scored['role'].isin(roles).to_numpy()
+
+        if overseas_filter == "Local Only":
+            mask &= scored['is_overseas'].to_numpy() == 0
+        elif overseas_filter == "Overseas Only":
+            mask &= scored['is_overseas'].to_numpy() == 1
+
+        # Name prefix: contiguous range of the sorted name index
+        prefix = name_prefix.strip().lower()
+        if prefix:
+            lo = np.searchsorted(index['sorted_names'], prefix, side='left')
+            hi = np.searchsorted(index['sorted_names'], prefix + '\uffff', side='left')
+            prefix_mask = np.zeros(len(scored), dtype=bool)
+            prefix_mask[index['name_order'][lo:hi]] = True
+            mask &= prefix_mask
+
+        # Impact range: contiguous range of the sorted impact index
+        if impact_range is not None:
+            lo = np.searchsorted(index['sorted_impacts'], impact_range[0], side='left')
+            hi = np.searchsorted(index['sorted_impacts'], impact_range[1], side='right')
+            range_mask = np.zeros(len(scored), dtype=bool)
+            range_mask[index['impact_order'][lo:hi]] = True
+            mask &= range_mask
+
+        order = index['impact_order'] if sort_by == "Impact" else index['name_order']
+        if not ascending:
+            order = order[::-1]
+        return order[mask[order]]
+
+
+    # Incremental re-optimization state for the last solved XI
+    def build_team_state(scored_df, best_team, format_type, constraints):
+        """Keep the optimal XI plus a min-heap of the top team_size impacts per (role, overseas) bucket."""
+        team_size = constraints['team_size']
+        buckets = {}
+        for key, impacts in scored_df.groupby(['role', 'is_overseas'])['impact']:
+            buckets[key] = heapq.nlargest(team_size, impacts.tolist())
+            heapq.heapify(buckets[key])
+        return {
+            'format_type': format_type,
+            'constraints': dict(constraints),
+            'team': best_team,
+            'selected': set(best_team.index),
+            'buckets': buckets,
+            'pool_size': len(scored_df),
+        }
+
+    def team_state_matches(state, format_type, constraints):
+        return (state is not None and state['format_type'] == format_type
+                and state['constraints'] == constraints
+                and state['pool_size'] == len(st.session_state.players))
+
+    def team_state_on_insert(new_row):
+        """Keep the cached XI if the inserted player is dominated within its bucket.
+
+        A player with at least team_size bucket-mates of equal or higher impact can
+        always be swapped for one of them, so the previous optimum still holds. The
+        bucket heap holds only the top team_size impacts, so the check reads its root.
+        """
+        state = st.session_state.team_state
+        if state is None:
+            return
+        if state['constraints'].get('must_exclude') or state['constraints'].get('conflicts'):
+            # Excluded or conflicting bucket-mates cannot stand in for the new player
+            st.session_state.team_state = None
+            return
+        player = compute_impact(new_row, state['format_type']).iloc[0]
+        top = state['buckets'].get((player['role'], player['is_overseas']), [])
+        if len(top) >= state['constraints']['team_size'] and top[0] >= player['impact']:
+            # The top team_size impacts are unchanged
+            state['pool_size'] += 1
+        else:
+            st.session_state.team_state = None
+
+    def team_state_on_delete(position):
+        """Keep the cached XI if the removed player was not selected."""
+        state = st.session_state.team_state
+        if state is None:
+            return
+        if position in state['selected']:
+            st.session_state.team_state = None
+            return
+        player = compute_impact(st.session_state.players.iloc[[position]], state['format_type']).iloc[0]
+        top = state['buckets'].get((player['role'], player['is_overseas']), [])
+        if top and player['impact'] >= top[0]:
+            # The player may hold a top slot; the next best is unknown, so the bucket
+            # stays one short and any later insert into it re-solves
+            top.remove(player['impact'] if player['impact'] in top else top[0])
+            heapq.heapify(top)
+        # Rows after the removed one shift up by one position
+        state['selected'] = {i - (i > position) for i in state['selected']}
+        state['team'] = state['team'].set_axis([i - (i > position) for i in state['team'].index])
+        state['pool_size'] -= 1
 
-    # Impact Score function with format-specific formulas
-    def compute_impact(df, format_type):
-        """Calculate impact score based on format and role."""
-        df = df.copy()
-        
-        # Calculate derived metrics
-        df['batting_avg'] = df.apply(
-            lambda x: x['runs_scored'] / x['innings_batted'] if x['innings_batted'] > 0 else 0,
-            axis=1
-        )
-        df['bowling_avg'] = df.apply(
-            lambda x: x['runs_conceded'] / x['wickets'] if x['wickets'] > 0 else 999,
-            axis=1
-        )
-        df['bowler_sr'] = df.apply(
-            lambda x: x['balls_bowled'] / x['wickets'] if x['wickets'] > 0 else 999,
-            axis=1
-        )
-        df['boundary_pct'] = df.apply(
-            lambda x: ((x['fours'] + x['sixes']) / x['balls_faced'] * 100) if x['balls_faced'] > 0 else 0,
-            axis=1
-        )
-        df['dot_pct'] = df.apply(
-            lambda x: (x['dot_balls'] / x['balls_bowled'] * 100) if x['balls_bowled'] > 0 else 0,
-            axis=1
-        )
-        
-        # Initialize impact columns
-        df['batting_impact'] = 0.0
-        df['bowling_impact'] = 0.0
-        
-        # Calculate Batting Impact (for Batsman, All-Rounder, Wicketkeeper)
-        for idx, row in df.iterrows():
-            if row['role'] in ['Batsman', 'All-Rounder', 'Wicketkeeper']:
-                if format_type == 'Test':
-                    df.loc[idx, 'batting_impact'] = (
-                        (row['batting_avg'] * 0.75) +
-                        ((row['runs_scored'] / row['innings_batted'] if row['innings_batted'] > 0 else 0) * 0.15) +
-                        ((row['strike_rate'] / 2) * 0.10)
-                    )
-                elif format_type == 'ODI':
-                    df.loc[idx, 'batting_impact'] = (
-                        np.sqrt(row['batting_avg'] * row['strike_rate']) +
-                        (0.5 * row['boundary_pct'])
-                    )
-                elif format_type == 'T20':
-                    df.loc[idx, 'batting_impact'] = (
-                        (row['strike_rate'] * 0.7) +
-                        (row['batting_avg'] * 0.3) +
-                        (0.7 * (row['batting_avg'] + row['strike_rate']))
-                    )
-        
-        # Calculate Bowling Impact (for Bowler, All-Rounder)
-        for idx, row in df.iterrows():
-            if row['role'] in ['Bowler', 'All-Rounder']:
-                if row['wickets'] > 0:
-                    if format_type == 'Test':
-                        # Prevent division by zero
-                        if row['bowling_avg'] > 0 and row['bowler_sr'] > 0:
-                            df.loc[idx, 'bowling_impact'] = (
-                                (1000 / row['bowling_avg']) +
-                                ((100 / row['bowler_sr']) * 2)
-                            )
-                    else:  # ODI or T20
-                        if row['economy'] > 0:
-                            df.loc[idx, 'bowling_impact'] = (
-                                ((row['dot_pct'] * row['wickets']) / (row['economy'] ** 2)) * 100
-                            )
-        
-        # Total Impact - For All-Rounders, use average
-        df['impact'] = df.apply(
-            lambda x: (x['batting_impact'] + x['bowling_impact']) / 2 if x['role'] == 'All-Rounder' 
-            else x['batting_impact'] + x['bowling_impact'],
-            axis=1
-        )
-        
-        return df
 
-    
     # Input section
     col1, col2 = st.columns([3, 1])
     
@@ -1407,10 +1574,17 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
         # Format selector
         format_type = st.selectbox(
             "🏏 Cricket Format",
-            options=["T20", "ODI", "Test"],
+            options=FORMATS + ["Blended"],
             index=0,
             help="Select format - impact formulas will adjust automatically"
         )
+        impact_format = format_type
+        if format_type == "Blended":
+            weight_cols = st.columns(len(FORMATS))
+            impact_format = tuple(
+                weight_col.slider(f"{fmt} Weight", 0.0, 1.0, round(1 / len(FORMATS), 2), 0.05, key=f"weight_{fmt}")
+                for weight_col, fmt in zip(weight_cols, FORMATS)
+            )
         st.markdown("---")
         
         # File upload 
@@ -1420,9 +1594,12 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
             help="Upload a CSV file with player statistics"
         )
 
-        if uploaded:
+        # Load each uploaded file once so later additions/removals are kept across reruns
+        if uploaded and st.session_state.get("uploaded_file_id") != uploaded.file_id:
+            st.session_state.uploaded_file_id = uploaded.file_id
             df = pd.read_csv(uploaded)
-            st.session_state.players = df
+            st.session_state.players = merge_player_pools(df)
+            st.session_state.team_state = None
             st.success(f" Successfully loaded {len(df)} players from CSV file!")
             
             # Show data preview
@@ -1476,7 +1653,18 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
                             "wickets": wkts, "balls_bowled": balls_bowled, "runs_conceded": runs_conceded,
                             "economy": eco, "dot_balls": dot_balls
                         }])
-                        st.session_state.players = pd.concat([st.session_state.players, new_row], ignore_index=True)
+                        players = st.session_state.players
+                        cached = st.session_state.get('pool_index')
+                        if cached is None or cached[0] is not players:
+                            cached = (players, index_pool(players))
+                        players, position, appended = add_to_pool(players, new_row, cached[1])
+                        if appended:
+                            team_state_on_insert(players.iloc[[position]])
+                        else:
+                            # Stats were combined into an existing player's row
+                            st.session_state.team_state = None
+                        st.session_state.players = players
+                        st.session_state.pool_index = (players, cached[1])
                         st.success(f"🎉 Added {name}!")
                         st.rerun()
                     else:
@@ -1489,23 +1677,13 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
         # Load ODI Players
         if st.button("📊 Load ODI Players", use_container_width=True, help="Load ODI player data"):
             try:
-                import json
-                with open('ODI_output.json', 'r') as f:
-                    odi_data = json.load(f)
-                
-                # Map role names to match app format
-                role_mapping = {
-                    'Batter': 'Batsman',
-                    'Allrounder': 'All-Rounder',
-                    'Bowler': 'Bowler',
-                    'All Rounder': 'All-Rounder'
-                }
-                
-                for player in odi_data:
-                    player['role'] = role_mapping.get(player['role'], player['role'])
-                
-                odi_players = pd.DataFrame(odi_data)
-                st.session_state.players = pd.concat([st.session_state.players, odi_players], ignore_index=True)
+                # Stored once in the shared player store; an empty session takes it without a merge
+                odi_players = load_bundled_pool("ODI", 'ODI_output.json')
+                if st.session_state.players.empty:
+                    st.session_state.players = odi_players
+                else:
+                    st.session_state.players = merge_player_pools(st.session_state.players, odi_players)
+                st.session_state.team_state = None
                 st.success(f" Loaded {len(odi_players)} ODI players!")
                 st.rerun()
             except FileNotFoundError:
@@ -1516,22 +1694,13 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
         # Load Test Players
         if st.button("🏏 Load Test Players", use_container_width=True, help="Load Test player data"):
             try:
-                import json
-                with open('test_output.json', 'r') as f:
-                    test_data = json.load(f)
-                
-                # Map role names to match app format
-                role_mapping = {
-                    'Batsman': 'Batsman',
-                    'All Rounder': 'All-Rounder',
-                    'Bowler': 'Bowler'
-                }
-                
-                for player in test_data:
-                    player['role'] = role_mapping.get(player['role'], player['role'])
-                
-                test_players = pd.DataFrame(test_data)
-                st.session_state.players = pd.concat([st.session_state.players, test_players], ignore_index=True)
+                # Stored once in the shared player store; an empty session takes it without a merge
+                test_players = load_bundled_pool("Test", 'test_output.json')
+                if st.session_state.players.empty:
+                    st.session_state.players = test_players
+                else:
+                    st.session_state.players = merge_player_pools(st.session_state.players, test_players)
+                st.session_state.team_state = None
                 st.success(f" Loaded {len(test_players)} Test players!")
                 st.rerun()
             except FileNotFoundError:
@@ -1540,16 +1709,68 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
                 st.error(f" Error loading Test data: {e}")
         
         
+        # Saved pools in the shared player store (survive refreshes, shared across sessions)
+        with st.expander("💾 Saved Player Pools"):
+            pool_name = st.text_input("Pool Name", placeholder="e.g., IPL 2025 shortlist")
+            if st.button("💾 Save Current Pool", use_container_width=True) and pool_name.strip():
+                if st.session_state.players.empty:
+                    st.error("⚠️ The current pool is empty!")
+                else:
+                    save_pool(pool_name.strip(), st.session_state.players)
+                    st.success(f" Saved {len(st.session_state.players)} players as '{pool_name.strip()}'!")
+
+            saved_pools = list_pools()
+            if saved_pools:
+                open_name = st.selectbox("Open Saved Pool", saved_pools)
+                top_players = query_pool_players(open_name, FORMATS[0], limit=5)
+                st.caption("Top T20 impact: " + ", ".join(top_players['player_name']))
+                if st.button("📂 Open Pool", use_container_width=True):
+                    st.session_state.players = load_pool(open_name)
+                    st.session_state.team_state = None
+                    st.rerun()
+
+        # Pools built from ball-by-ball scorecards (ingest_scorecards.py), career or recent form
+        if os.path.exists(SCORECARD_DB_PATH):
+            with st.expander("🏟️ Ball-by-Ball Pools"):
+                scorecard_format = st.selectbox("Format", FORMATS, key="scorecard_format")
+                scorecard_form = st.radio("Stats", list(SCORECARD_FORMS), key="scorecard_form",
+                                          format_func=SCORECARD_FORMS.get)
+                home_team = st.text_input("Home Team", "India", help="Players who never played for it count as overseas")
+                if st.button("🏟️ Load Scorecard Players", use_container_width=True):
+                    with timing("ingest.scorecards"):
+                        scorecard_players = load_aggregates(SCORECARD_DB_PATH, scorecard_format,
+                                                            home_team.strip() or None, scorecard_form)
+                    if st.session_state.players.empty:
+                        st.session_state.players = merge_player_pools(scorecard_players)
+                    else:
+                        st.session_state.players = merge_player_pools(st.session_state.players, scorecard_players)
+                    st.session_state.team_state = None
+                    st.success(f" Loaded {len(scorecard_players)} {scorecard_format} players "
+                               f"({SCORECARD_FORMS[scorecard_form].lower()})!")
+                    st.rerun()
+
         # Clear database button
         if st.button("🗑️ Clear Database", use_container_width=True, help="Remove all players from database"):
-            st.session_state.players = pd.DataFrame(columns=[
-                "player_name", "role", "is_overseas",
-                "runs_scored", "innings_batted", "balls_faced", "strike_rate", "fours", "sixes",
-                "wickets", "balls_bowled", "runs_conceded", "economy", "dot_balls"
-            ])
+            st.session_state.players = pd.DataFrame(columns=PLAYER_COLUMNS)
+            st.session_state.team_state = None
             st.success("🗑️ Player database cleared!")
             st.rerun()
         
+        # Remove a single player by name
+        if not st.session_state.players.empty:
+            remove_name = st.text_input("➖ Remove Player", placeholder="Exact player name")
+            if st.button("Remove Player", use_container_width=True) and remove_name.strip():
+                matches = np.flatnonzero(st.session_state.players['player_name'].to_numpy() == remove_name.strip())
+                if len(matches) == 0:
+                    st.error(f" {remove_name} is not in the player database!")
+                else:
+                    team_state_on_delete(int(matches[0]))
+                    st.session_state.players = st.session_state.players.drop(
+                        st.session_state.players.index[matches[0]]
+                    ).reset_index(drop=True)
+                    st.success(f"🗑️ Removed {remove_name}!")
+                    st.rerun()
+
         # Database stats
         if not st.session_state.players.empty:
             st.markdown("### 📊 Database Stats")
@@ -1563,256 +1784,523 @@ elif st.session_state.current_page == "🏆 Best XI Team Builder":
                 st.metric("Overseas Players", overseas_count)
 
     # Enhanced current player pool display
-    if not st.session_state.players.empty:
-        st.markdown("### 👥 Current Player Pool")
-        
-        # Add filters
-        col1, col2 = st.columns(2)
-        with col1:
-            role_filter = st.multiselect("Filter by Role", 
-                options=st.session_state.players['role'].unique(),
-                default=st.session_state.players['role'].unique())
-        with col2:
-            overseas_filter = st.selectbox("Overseas Filter", 
-                ["All Players", "Local Only", "Overseas Only"])
-        
-        # Apply filters
-        filtered_df = st.session_state.players.copy()
-        filtered_df = filtered_df[filtered_df['role'].isin(role_filter)]
-        
-        if overseas_filter == "Local Only":
-            filtered_df = filtered_df[filtered_df['is_overseas'] == 0]
-        elif overseas_filter == "Overseas Only":
-            filtered_df = filtered_df[filtered_df['is_overseas'] == 1]
-        
-        # Calculate and display impact scores using format-specific formulas
-        display_df = compute_impact(filtered_df.copy(), format_type)
-        display_df = display_df.sort_values('impact', ascending=False)
+    @fragment
+    def player_pool_table(format_type):
+        if not st.session_state.players.empty:
+            st.markdown("### 👥 Current Player Pool")
         
-        st.dataframe(
-            display_df[[
-                'player_name', 'role', 'batting_impact', 'bowling_impact', 'impact'
-            ]],
-            use_container_width=True,
-            column_config={
-                "player_name": "Player",
-                "role": "Role",
-                "batting_impact": st.column_config.NumberColumn("Batting Impact", format="%.1f"),
-                "bowling_impact": st.column_config.NumberColumn("Bowling Impact", format="%.1f"),
-                "impact": st.column_config.NumberColumn("Total Impact", format="%.1f")
-            }
-        )
-
-    # Team selection logic with strategy
-    def select_best_team(players_df, format_type):
-        players_df = compute_impact(players_df.copy(), format_type)
-
-        prob = LpProblem("BestXI", LpMaximize)
-        choices = LpVariable.dicts("select", players_df.index, cat="Binary")
-
-        # Objective: maximize impact
-        prob += lpSum(players_df.loc[i, "impact"] * choices[i] for i in players_df.index)
+            # Impact scores and sort orders are computed once per pool/format
+            pool_index = build_pool_index(st.session_state.players, format_type)
+            impact_min = float(np.nanmin(pool_index['sorted_impacts']))
+            impact_max = float(np.nanmax(pool_index['sorted_impacts']))
 
-        # Constraints (removed budget constraint)
-        prob += lpSum(choices[i] for i in players_df.index) == team_size, "TeamSize"
-        prob += lpSum(players_df.loc[i, "is_overseas"] * choices[i] for i in players_df.index) <= max_overseas, "OverseasLimit"
-        prob += lpSum(choices[i] for i in players_df.index if players_df.loc[i, "role"] == "Batsman") >= min_batsmen, "MinBatsmen"
-        prob += lpSum(choices[i] for i in players_df.index if players_df.loc[i, "role"] == "Bowler") >= min_bowlers, "MinBowlers"
-        prob += lpSum(choices[i] for i in players_df.index if players_df.loc[i, "role"] == "All-Rounder") >= min_allrounders, "MinAllRounders"
-        prob += lpSum(choices[i] for i in players_df.index if players_df.loc[i, "role"] == "Wicketkeeper") >= min_wk, "MinWicketkeepers"
+            # Add filters
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                role_filter = st.multiselect("Filter by Role",
+                    options=st.session_state.players['role'].unique(),
+                    default=st.session_state.players['role'].unique())
+            with col2:
+                overseas_filter = st.selectbox("Overseas Filter",
+                    ["All Players", "Local Only", "Overseas Only"])
+            with col3:
+                name_prefix = st.text_input("Player Name Starts With", placeholder="e.g., Sh")
 
-        prob.solve()
+            col1, col2, col3 = st.columns([2, 1, 1])
+            with col1:
+                if impact_min < impact_max:
+                    impact_range = st.slider("Impact Range", impact_min, impact_max, (impact_min, impact_max))
+                else:
+                    impact_range = None
+            with col2:
+                sort_by = st.selectbox("Sort By", ["Impact", "Name"])
+                ascending = st.checkbox("Ascending", value=sort_by == "Name")
+            with col3:
+                page_size = st.selectbox("Rows per Page", [25, 50, 100, 250], index=1)
+
+            # Only the requested page is materialized and sent to the browser
+            positions = query_pool(
+                pool_index, role_filter, overseas_filter, name_prefix, impact_range, sort_by, ascending
+            )
+            total_matches = len(positions)
+            page_count = max(1, -(-total_matches // page_size))
+            page = st.number_input(f"Page (of {page_count})", 1, page_count, 1) - 1
+            start_row = page * page_size
+            display_df = pool_index['scored'].iloc[positions[start_row:start_row + page_size]]
+            st.caption(f"Showing {min(start_row + 1, total_matches)}–{start_row + len(display_df)} "
+                       f"of {total_matches} players")
+
+            st.dataframe(
+                display_df[[
+                    'player_name', 'role', 'batting_impact', 'bowling_impact', 'impact'
+                ]],
+                use_container_width=True,
+                column_config={
+                    "player_name": "Player",
+                    "role": "Role",
+                    "batting_impact": st.column_config.NumberColumn("Batting Impact", format="%.1f"),
+                    "bowling_impact": st.column_config.NumberColumn("Bowling Impact", format="%.1f"),
+                    "impact": st.column_config.NumberColumn("Total Impact", format="%.1f")
+                }
+            )
+
+            # Nearest neighbours on the raw stat columns
+            similar_to = st.text_input("🔍 Find Players Similar To", placeholder="Exact player name")
+            if similar_to.strip():
+                scored = pool_index['scored']
+                matches = np.flatnonzero(scored['player_name'].to_numpy() == similar_to.strip())
+                if len(matches) == 0:
+                    st.error(f" {similar_to} is not in the player database!")
+                else:
+                    stats = scored[SIMILARITY_STAT_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy()
+                    similarity_index = build_similarity_index(stats)
+                    positions, distances = find_similar_players(
+                        similarity_index, stats[matches[0]], k=10, exclude=matches[0]
+                    )
+                    similar_df = scored.iloc[positions][['player_name', 'role', 'impact']].assign(distance=distances)
+                    st.dataframe(
+                        similar_df,
+                        use_container_width=True,
+                        column_config={
+                            "player_name": "Player",
+                            "role": "Role",
+                            "impact": st.column_config.NumberColumn("Total Impact", format="%.1f"),
+                            "distance": st.column_config.NumberColumn("Distance", format="%.2f")
+                        }
+                    )
 
-        violated = []
+    player_pool_table(impact_format)
 
-        # Check constraint satisfaction
-        if prob.status != 1:  # not optimal
-            for cname, c in prob.constraints.items():
-                if c.value() is not None and c.value() < -1e-6:  # constraint violated
-                    violated.append(cname)
+    # Team selection logic with strategy
+    @timed("solve", rows=lambda players_df, constraints, solver: len(players_df))
+    def select_best_team(players_df, constraints, solver):
+        """Solve the XI over a pool already scored by compute_impact."""
+        try:
+            with timing(f"solve.{solver['backend']}", rows=len(players_df)):
+                result = select_team(players_df, constraints, **solver)
+        except ValueError as e:
+            st.error(f" {e}")
+            return pd.DataFrame()
 
-        if violated:
-            st.error(f" Cannot build a valid team. Violated constraints: {', '.join(violated)}")
+        if result['status'] == "infeasible":
+            st.error(" Cannot build a valid team. Conflicting constraints:\n"
+                     + "\n".join(f"- **{', '.join(c['constraints'])}**: {c['message']}" for c in result['conflicts']))
+            return pd.DataFrame()
+        if result['picked'] is None:
+            st.error(f" {result['backend']} stopped without a team ({result['status']}). Try a longer time limit.")
             return pd.DataFrame()
 
-        selected = players_df[[choices[i].value() == 1 for i in players_df.index]]
-        return selected
+        gap = f", gap {result['gap']:.2%}" if result['gap'] is not None else ""
+        st.caption(f"🧮 {result['backend']}: {result['status']} in {result['seconds'] * 1000:.0f} ms{gap}, "
+                   f"objective {result['objective']:.1f} · {result['candidates']:,} of {result['pool_size']:,} "
+                   f"players after pruning")
+        captaincy = np.full(len(players_df), "", dtype=object)
+        if result['captain'] is not None:
+            captaincy[result['captain']], captaincy[result['vice_captain']] = "C", "VC"
+        return players_df.assign(captaincy=captaincy)[result['picked']]
+
+    # Match simulator: the last optimal XI against an opponent XI, ball by ball
+    @timed("simulate", rows=lambda team_a, team_b, simulations: simulations)
+    def simulate_matchup(team_a, team_b, simulations):
+        return simulate_match(team_a, team_b, simulations)
+
+    def opponent_xi(scored_pool, state):
+        """Default opponent: the best XI under the same rules from everyone the optimal XI left out."""
+        rest = scored_pool[~scored_pool.index.isin(state['selected'])]
+        try:
+            result = select_team(rest, {key: value for key, value in state['constraints'].items()
+                                        if key not in ('must_include', 'conflicts')})
+        except ValueError:
+            result = {'picked': None}
+        if result['picked'] is None:
+            return rest.nlargest(len(state['team']), 'impact')
+        return rest[result['picked']]
+
+    @fragment
+    def match_simulator_panel(impact_format):
+        state = st.session_state.team_state
+        if state is None or state['format_type'] != impact_format:
+            return
+        with st.expander("🎲 Match Simulator"):
+            st.caption("Simulate T20 matches ball by ball between your optimal XI and an opponent XI, using each "
+                       "player's strike rate, boundaries, dismissals, economy, dots and wickets.")
+            scored_pool = select_format(score_pool(st.session_state.players), impact_format)
+            names = scored_pool['player_name'].tolist()
+            if "sim_opponent" not in st.session_state:
+                st.session_state.sim_opponent = opponent_xi(scored_pool, state)['player_name'].tolist()
+            else:
+                st.session_state.sim_opponent = [name for name in st.session_state.sim_opponent if name in set(names)]
+            opponent = st.multiselect("🆚 Opponent XI", names, key="sim_opponent",
+                                      help="Defaults to the best XI from the players your team left out")
+            simulations = st.number_input("🎲 Simulations", 1_000, 100_000, 10_000, step=1_000, key="sim_count")
+
+            if st.button("🎲 Simulate Matches", use_container_width=True):
+                if len(opponent) < 2:
+                    st.error("⚠️ Pick at least two opponent players.")
+                else:
+                    team_b = scored_pool[scored_pool['player_name'].isin(opponent)]
+                    st.session_state.sim_result = simulate_matchup(state['team'], team_b, int(simulations))
 
-    # Team building button
-    st.markdown("### 🚀 Team Generation")
+            result = st.session_state.get("sim_result")
+            if result is None:
+                return
+            win = result['win_probability']
+            col1, col2, col3 = st.columns(3)
+            for column, value, label in ((col1, win['team_a'], "Your XI Wins"), (col2, win['team_b'], "Opponent Wins"),
+                                         (col3, win['tie'], "Tied")):
+                with column:
+                    st.markdown(f"""
+                    <div class="stats-card">
+                        <div class="stat-value">{value:.1%}</div>
+                        <div class="stat-label">{label}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+            st.caption(f"🎲 {result['simulations']:,} matches in {result['seconds'] * 1000:.0f} ms")
+
+            sim_fig = go.Figure()
+            for team, label, color in (('team_a', "Your XI", '#2E8B57'), ('team_b', "Opponent", '#FF6B6B')):
+                sim_fig.add_trace(go.Histogram(x=result['runs'][team], name=label, marker_color=color, opacity=0.6,
+                                               xbins=dict(size=5)))
+            sim_fig.update_layout(barmode='overlay', xaxis_title="Runs in 20 overs", yaxis_title="Matches", height=400)
+            st.plotly_chart(sim_fig, use_container_width=True)
+            st.dataframe(
+                score_summary(result).replace({'team': {'team_a': "Your XI", 'team_b': "Opponent"}}),
+                use_container_width=True, hide_index=True,
+                column_config={
+                    "team": "🏏 Team",
+                    "mean runs": st.column_config.NumberColumn("Mean Runs", format="%.1f"),
+                    "p10": st.column_config.NumberColumn("10th %ile", format="%.0f"),
+                    "median": st.column_config.NumberColumn("Median", format="%.0f"),
+                    "p90": st.column_config.NumberColumn("90th %ile", format="%.0f"),
+                    "mean wickets": st.column_config.NumberColumn("Mean Wickets", format="%.1f"),
+                    "win share": st.column_config.NumberColumn("Win Share (½ ties)", format="%.3f"),
+                }
+            )
 
-    # Single column layout
-    col1 = st.container()
+    # Team building button
+    @fragment
+    def team_generation(format_type, impact_format):
+        try:
+            constraints = constraint_spec()
+        except ValueError as e:
+            st.error(f"⚠️ Invalid advanced rules: {e}")
+            return
+        solver = solver_settings()
+        st.markdown("### 🚀 Team Generation")
 
-    with col1:
-        if st.button("🏆 Build Optimal Team", use_container_width=True, type="primary"):
-            if st.session_state.players.empty:
-                st.error("⚠️ Please add players to your database first!")
-            else:
-                with st.spinner("🔮 AI is optimizing your dream team..."):
-                    best_team = select_best_team(st.session_state.players, format_type)
+        # Single column layout
+        col1 = st.container()
 
-                if best_team.empty:
-                    st.error(" No valid team found with current constraints. Please adjust your requirements.")
+        with col1:
+            if st.button("🏆 Build Optimal Team", use_container_width=True, type="primary"):
+                if st.session_state.players.empty:
+                    st.error("⚠️ Please add players to your database first!")
                 else:
-                    st.balloons()  # Celebration effect
-                    st.success("🎉 Your optimal team has been assembled!")
-                    st.info(f"🏏 Team optimized for **{format_type}** format using format-specific impact formulas")
-
-                    # Team metrics
-                    total_impact = best_team["impact"].sum()
-                    overseas_count = best_team["is_overseas"].sum()
-                    avg_sr = best_team[best_team["strike_rate"] > 0]["strike_rate"].mean()
+                    state = st.session_state.team_state
+                    if team_state_matches(state, impact_format, constraints):
+                        # No insert or delete since the last solve could change the optimum
+                        best_team = state['team']
+                        st.caption("♻️ Previous optimal XI still holds - skipped re-solving.")
+                    else:
+                        with st.spinner("🔮 AI is optimizing your dream team..."):
+                            scored_pool = select_format(score_pool(st.session_state.players), impact_format)
+                            best_team = select_best_team(scored_pool, constraints, solver)
+                        if not best_team.empty:
+                            st.session_state.team_state = build_team_state(
+                                scored_pool, best_team, impact_format, constraints
+                            )
+                            # a new XI gets a fresh default opponent in the match simulator
+                            st.session_state.pop("sim_opponent", None)
+                            st.session_state.pop("sim_result", None)
+
+                    if best_team.empty:
+                        st.error(" No valid team found with current constraints. Please adjust your requirements.")
+                    else:
+                        st.balloons()  # Celebration effect
+                        st.success("🎉 Your optimal team has been assembled!")
+                        st.info(f"🏏 Team optimized for **{format_type}** format using format-specific impact formulas")
+
+                        # Team metrics
+                        total_impact = best_team["impact"].sum()
+                        overseas_count = best_team["is_overseas"].sum()
+                        avg_sr = best_team[best_team["strike_rate"] > 0]["strike_rate"].mean()
                     
-                    # Team summary cards
-                    col1, col2, col3, col4 = st.columns(4)
+                        # Team summary cards
+                        col1, col2, col3, col4 = st.columns(4)
                     
-                    with col1:
-                        st.markdown(f"""
-                        <div class="stats-card">
-                            <div class="stat-value">{len(best_team)}</div>
-                            <div class="stat-label">Players</div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        with col1:
+                            st.markdown(f"""
+                            <div class="stats-card">
+                                <div class="stat-value">{len(best_team)}</div>
+                                <div class="stat-label">Players</div>
+                            </div>
+                            """, unsafe_allow_html=True)
                     
-                    with col2:
-                        st.markdown(f"""
-                        <div class="stats-card">
-                            <div class="stat-value">{total_impact:.0f}</div>
-                            <div class="stat-label">Team Impact</div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        with col2:
+                            st.markdown(f"""
+                            <div class="stats-card">
+                                <div class="stat-value">{total_impact:.0f}</div>
+                                <div class="stat-label">Team Impact</div>
+                            </div>
+                            """, unsafe_allow_html=True)
                     
-                    with col3:
-                        st.markdown(f"""
-                        <div class="stats-card">
-                            <div class="stat-value">{overseas_count}/{max_overseas}</div>
-                            <div class="stat-label">Overseas Quota</div>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        with col3:
+                            st.markdown(f"""
+                            <div class="stats-card">
+                                <div class="stat-value">{overseas_count}/{constraints['max_overseas']}</div>
+                                <div class="stat-label">Overseas Quota</div>
+                            </div>
+                            """, unsafe_allow_html=True)
                     
-                    with col4:
-                        st.markdown(f"""
-                        <div class="stats-card">
-                            <div class="stat-value">{avg_sr:.1f}</div>
-                            <div class="stat-label">Avg Strike Rate</div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                    # Team composition table 
-                    st.markdown("### 🏏 Your Dream Team XI")
-                    team_display = best_team.copy()
-                    team_display['Captain Potential'] = team_display.apply(
-                        lambda x: '⭐ Captain' if x['impact'] == team_display['impact'].max() else '👤 Player', axis=1
-                    )
+                        with col4:
+                            st.markdown(f"""
+                            <div class="stats-card">
+                                <div class="stat-value">{avg_sr:.1f}</div>
+                                <div class="stat-label">Avg Strike Rate</div>
+                            </div>
+                            """, unsafe_allow_html=True)
+
+                        # Team composition table 
+                        st.markdown("### 🏏 Your Dream Team XI")
+                        team_display = best_team.copy()
+                        team_display['Captain Potential'] = team_display['captaincy'].map(
+                            {'C': '⭐ Captain', 'VC': '🎖️ Vice-Captain'}).fillna('👤 Player')
                     
-                    st.dataframe(
-                        team_display[['player_name', 'role', 'batting_impact', 'bowling_impact', 'impact', 'Captain Potential']],
-                        use_container_width=True,
-                        column_config={
-                            "player_name": "🏏 Player",
-                            "role": "👤 Role",
-                            "batting_impact": st.column_config.NumberColumn("🏏 Batting Impact", format="%.1f"),
-                            "bowling_impact": st.column_config.NumberColumn("🎳 Bowling Impact", format="%.1f"),
-                            "impact": st.column_config.NumberColumn("🔥 Total Impact", format="%.1f"),
-                            "Captain Potential": "🎖️ Role"
-                        }
-                    )
+                        st.dataframe(
+                            team_display[['player_name', 'role', 'batting_impact', 'bowling_impact', 'impact', 'Captain Potential']],
+                            use_container_width=True,
+                            column_config={
+                                "player_name": "🏏 Player",
+                                "role": "👤 Role",
+                                "batting_impact": st.column_config.NumberColumn("🏏 Batting Impact", format="%.1f"),
+                                "bowling_impact": st.column_config.NumberColumn("🎳 Bowling Impact", format="%.1f"),
+                                "impact": st.column_config.NumberColumn("🔥 Total Impact", format="%.1f"),
+                                "Captain Potential": "🎖️ Role"
+                            }
+                        )
 
 
-                    # Analytics with Plotly
-                    st.markdown("### 📊 Team Analytics Dashboard")
+                        # Analytics with Plotly
+                        st.markdown("### 📊 Team Analytics Dashboard")
+                        dashboard = build_team_dashboard(team_dashboard_payload(best_team))
+                        st.plotly_chart(dashboard, use_container_width=True)
                     
-                    # Create comprehensive subplot
-                    fig = make_subplots(
-                        rows=2, cols=2,
-                        subplot_titles=(
-                            'Role Distribution', 
-                            'Batting vs Bowling Impact', 
-                            'Player Performance Radar',
-                            'Impact Distribution'
-                        ),
-                        specs=[
-                            [{"type": "pie"}, {"type": "scatter"}],
-                            [{"type": "scatterpolar"}, {"type": "bar"}]
-                        ]
-                    )
                     
-                    # Role distribution pie chart
-                    role_counts = best_team["role"].value_counts()
-                    fig.add_trace(
-                        go.Pie(
-                            labels=role_counts.index, 
-                            values=role_counts.values,
-                            marker_colors=['#2E8B57', '#32CD32', '#90EE90', '#98FB98']
-                        ),
-                        row=1, col=1
-                    )
                     
-                    # Batting vs Bowling Impact scatter
-                    fig.add_trace(
-                        go.Scatter(
-                            x=best_team["batting_impact"], 
-                            y=best_team["bowling_impact"],
-                            mode='markers+text',
-                            text=best_team["player_name"],
-                            textposition="top center",
-                            marker=dict(
-                                size=15,
-                                color=best_team["is_overseas"],
-                                colorscale=['#2E8B57', '#FF6B6B'],
-                                showscale=True,
-                                colorbar=dict(title="Overseas")
-                            ),
-                            name="Players"
-                        ),
-                        row=1, col=2
-                    )
+                        # Download CSV
+                        enhanced_csv = best_team.copy()
+                        enhanced_csv['selection_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
                     
-                    best_team["impact"] = pd.to_numeric(best_team["impact"], errors="coerce")
+                        csv_data = enhanced_csv.to_csv(index=False).encode("utf-8")
+                        st.download_button(
+                            "⬇️ Download Team Sheet", 
+                            data=csv_data, 
+                            file_name=f"best_xi_team.csv", 
+                            mime="text/csv", 
+                            use_container_width=True
+                        )
+
+        # Rendered from this fragment so a build's fragment-only rerun brings it up; nested, it
+        # still reruns on its own widgets
+        match_simulator_panel(impact_format)
+
+    team_generation(format_type, impact_format)
+
+    # Scenario grid: every combination of slider ranges, solved across a process pool
+    SCENARIO_LABELS = {"team_size": ("👥 Team Size", 30), "max_overseas": ("🌍 Max Overseas", 10),
+                       "min_batsmen": ("🏏 Min Batsmen", 20), "min_bowlers": ("🎳 Min Bowlers", 20),
+                       "min_allrounders": ("⚡ Min All-Rounders", 20), "min_wk": ("🧤 Min Wicketkeepers", 20)}
+
+    @timed("solve.grid", rows=lambda players_df, constraints, scenarios, solver: len(scenarios))
+    def solve_scenario_grid(players_df, constraints, scenarios, solver):
+        """Scenario results as a table: grid fields, status, objective and the XI's names."""
+        results = solve_scenarios(players_df, constraints, scenarios, workers=SCENARIO_WORKERS, **solver)
+        names = players_df['player_name'].to_numpy(dtype=object)
+        rows = []
+        for result in results:
+            marks = {result['captain']: " (C)", result['vice_captain']: " (VC)"}
+            picked = [] if result['picked'] is None else result['picked'][np.argsort(
+                -players_df['impact'].to_numpy()[result['picked']], kind='stable')]
+            rows.append({**{field: result[field] for field in scenarios[0]}, 'status': result['status'],
+                         'objective': result['objective'],
+                         'players': ", ".join(f"{names[i]}{marks.get(i, '')}" for i in picked)})
+        return pd.DataFrame(rows)
+
+    def reset_scenario_ranges():
+        """Collapse every grid range onto the current main constraint."""
+        st.session_state.scenario_ranges = {field: (int(st.session_state[field]),) * 2 for field in SCENARIO_LABELS}
+        for field, value in st.session_state.scenario_ranges.items():
+            st.session_state[f"grid_{field}"] = value
+
+    def keep_scenario_range(field):
+        st.session_state.scenario_ranges[field] = st.session_state[f"grid_{field}"]
+
+    @fragment
+    def scenario_grid_panel(impact_format):
+        with st.expander("🧪 Scenario Grid"):
+            st.caption("Solve every combination of these ranges at once; the advanced rules and solver settings "
+                       "above still apply.")
+            # The ranges live in their own state (widget keys are dropped on runs that skip them) and
+            # follow the main constraints only on a reset
+            if "scenario_ranges" not in st.session_state:
+                reset_scenario_ranges()
+            ranges = {}
+            columns = st.columns(3)
+            for i, (field, (label, highest)) in enumerate(SCENARIO_LABELS.items()):
+                if f"grid_{field}" not in st.session_state:
+                    st.session_state[f"grid_{field}"] = st.session_state.scenario_ranges[field]
+                with columns[i % 3]:
+                    low, high = st.slider(label, 0, highest, key=f"grid_{field}",
+                                          on_change=keep_scenario_range, args=(field,))
+                ranges[field] = range(low, high + 1)
+            st.button("↺ Reset to current constraints", on_click=reset_scenario_ranges, key="grid_reset")
+            scenarios = scenario_grid(ranges)
+            st.caption(f"{len(scenarios):,} scenarios")
+
+            if st.button("🧪 Solve Scenario Grid", use_container_width=True):
+                if st.session_state.players.empty:
+                    st.error("⚠️ Please add players to your database first!")
+                elif len(scenarios) > MAX_SCENARIOS:
+                    st.error(f"⚠️ {len(scenarios):,} scenarios is too many; narrow the ranges to {MAX_SCENARIOS:,} "
+                             f"or fewer.")
+                else:
+                    try:
+                        constraints = constraint_spec()
+                        scored_pool = select_format(score_pool(st.session_state.players), impact_format)
+                        start = time.perf_counter()
+                        with st.spinner(f"🔮 Solving {len(scenarios):,} scenarios..."):
+                            st.session_state.scenario_results = solve_scenario_grid(
+                                scored_pool, constraints, scenarios, solver_settings())
+                        st.session_state.scenario_seconds = time.perf_counter() - start
+                    except ValueError as e:
+                        st.error(f"⚠️ {e}")
+
+            grid = st.session_state.get("scenario_results")
+            if grid is None or grid.empty:
+                return
+            solved = grid['objective'].notna()
+            st.caption(f"🧮 {len(grid):,} scenarios in {st.session_state.scenario_seconds:.1f} s · "
+                       f"{solved.sum():,} feasible")
+            varied = [field for field in GRID_FIELDS if field in grid and grid[field].nunique() > 1]
+            if varied:
+                col1, col2 = st.columns(2)
+                with col1:
+                    x_field = st.selectbox("Heatmap X", varied, format_func=lambda f: SCENARIO_LABELS[f][0],
+                                           key="grid_x")
+                with col2:
+                    y_options = ["None"] + [field for field in varied if field != x_field]
+                    y_field = st.selectbox("Heatmap Y", y_options,
+                                           format_func=lambda f: SCENARIO_LABELS[f][0] if f != "None" else f,
+                                           key="grid_y")
+                # Best objective per cell over the fields not on an axis; infeasible cells stay blank
+                if y_field == "None":
+                    best = grid.groupby(x_field)['objective'].max()
+                    grid_fig = go.Figure(go.Bar(x=best.index, y=best.round(1), marker_color='#2E8B57'))
+                    grid_fig.update_layout(xaxis_title=SCENARIO_LABELS[x_field][0], yaxis_title="Best Objective",
+                                           height=400)
+                else:
+                    best = grid.pivot_table(index=y_field, columns=x_field, values='objective', aggfunc='max',
+                                            dropna=False)
+                    grid_fig = go.Figure(go.Heatmap(x=best.columns, y=best.index, z=best.to_numpy().round(1),
+                                                    colorscale='Greens', colorbar=dict(title="Objective")))
+                    grid_fig.update_layout(xaxis_title=SCENARIO_LABELS[x_field][0],
+                                           yaxis_title=SCENARIO_LABELS[y_field][0], height=500)
+                st.plotly_chart(grid_fig, use_container_width=True)
+            st.dataframe(
+                grid.sort_values('objective', ascending=False, na_position='last'),
+                use_container_width=True, hide_index=True,
+                column_config={
+                    **{field: SCENARIO_LABELS[field][0] for field in GRID_FIELDS if field in grid},
+                    "objective": st.column_config.NumberColumn("🔥 Objective", format="%.1f"),
+                    "players": "🏏 XI",
+                }
+            )
+
+    scenario_grid_panel(impact_format)
+
+    # Season planner: one squad plus an XI per fixture under bowler workload limits
+    @timed("solve.season", rows=lambda players_df, constraints, fixtures, settings: len(players_df))
+    def plan_season_squad(players_df, constraints, fixtures, settings):
+        """Plan the season and lay it out as a squad table with one tick column per fixture."""
+        plan = plan_season(players_df, constraints, fixtures, **settings)
+        if plan['squad'] is None:
+            return plan, pd.DataFrame()
+        squad = players_df.iloc[plan['squad']][['player_name', 'role', 'is_overseas', 'impact']].reset_index(drop=True)
+        squad['is_overseas'] = squad['is_overseas'].astype(bool)
+        for f, lineup in enumerate(plan['lineups']):
+            squad[f"M{f + 1}"] = np.where(np.isin(plan['squad'], lineup), "✅", "")
+        squad.insert(4, 'appearances', sum(np.isin(plan['squad'], lineup) for lineup in plan['lineups']))
+        return plan, squad.sort_values(['appearances', 'impact'], ascending=False)
+
+    @fragment
+    def season_planner_panel(impact_format):
+        with st.expander("📅 Season Planner"):
+            st.caption("Pick a squad and an XI for every fixture at once. Each XI follows the configuration and "
+                       "advanced rules above; captaincy is left to the single-match builder.")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.number_input("🗓️ Fixtures", 1, 60, 14, key="season_matches")
+                st.number_input("📆 Days Between Fixtures", 1, 14, 3, key="season_days_between")
+            with col2:
+                st.number_input("👥 Squad Size", 11, 40, 20, key="season_squad_size")
+                st.number_input("🌍 Squad Overseas Cap", 0, 20, 8, key="season_squad_overseas")
+            with col3:
+                st.number_input("🔁 Max Consecutive (bowlers)", 1, 60, 3, key="season_max_consecutive")
+                st.number_input("🎳 Max Matches (bowlers, 0 = no cap)", 0, 60, 0, key="season_max_matches")
+            st.number_input("😴 Bowler Rest Days", 0, 14, 0, key="season_rest_days",
+                            help="No bowler plays two fixtures within this many days of each other")
+            st.text_input("Fixture Dates (optional)", placeholder="2026-03-22, 2026-03-25, 2026-03-28",
+                          key="season_fixture_dates", help="Overrides the fixture count and spacing above")
+
+            if st.button("📅 Plan Season", use_container_width=True):
+                if st.session_state.players.empty:
+                    st.error("⚠️ Please add players to your database first!")
+                    return
+                try:
+                    constraints = constraint_spec()
+                    dates = [d.strip() for d in st.session_state.season_fixture_dates.split(",") if d.strip()]
+                    fixtures = ([pd.Timestamp(d).date() for d in dates] if dates else
+                                list(range(0, st.session_state.season_matches * st.session_state.season_days_between,
+                                           st.session_state.season_days_between)))
+                    solver = solver_settings()
+                    settings = {
+                        'squad_size': int(st.session_state.season_squad_size),
+                        'squad_overseas': int(st.session_state.season_squad_overseas),
+                        'workload': {'max_consecutive': int(st.session_state.season_max_consecutive),
+                                     'max_matches': int(st.session_state.season_max_matches) or None,
+                                     'rest_days': int(st.session_state.season_rest_days)},
+                        'time_limit': solver['time_limit'],
+                        'gap': solver['gap'],
+                    }
+                    scored_pool = select_format(score_pool(st.session_state.players), impact_format)
+                    with st.spinner(f"🔮 Planning {len(fixtures)} fixtures..."):
+                        st.session_state.season_plan = plan_season_squad(scored_pool, constraints, fixtures, settings)
+                except ValueError as e:
+                    st.error(f"⚠️ {e}")
+
+            if not st.session_state.get("season_plan"):
+                return
+            plan, squad = st.session_state.season_plan
+            if squad.empty:
+                st.error(" Cannot plan this season:\n"
+                         + "\n".join(f"- **{', '.join(c['constraints'])}**: {c['message']}" for c in plan['conflicts']))
+                return
+            st.caption(f"🧮 HiGHS: {plan['status']} in {plan['seconds'] * 1000:.0f} ms over {plan['windows']} "
+                       f"rolling window(s), objective {plan['objective']:.1f} (within {plan['gap']:.2%} of the "
+                       f"LP bound) · {plan['candidates']:,} of {plan['pool_size']:,} players after pruning")
+            st.dataframe(
+                squad, use_container_width=True, hide_index=True,
+                column_config={
+                    "player_name": "🏏 Player",
+                    "role": "👤 Role",
+                    "is_overseas": st.column_config.CheckboxColumn("🌍 Overseas"),
+                    "impact": st.column_config.NumberColumn("🔥 Impact", format="%.1f"),
+                    "appearances": st.column_config.NumberColumn("🗓️ Matches"),
+                }
+            )
 
-                    # Performance radar for top 3 players
-                    top_players = best_team.nlargest(3, 'impact')
+    season_planner_panel(impact_format)
 
-                    # Performance radar for top 3 players
-                    top_players = best_team.nlargest(3, 'impact')
-                    categories = ['Runs', 'Strike Rate', 'Wickets', 'Economy']
-                    
-                    for _, player in top_players.iterrows():
-                        values = [
-                            player['runs_scored']/10,  # Normalize
-                            player['strike_rate']/2,
-                            player['wickets']*5,
-                            max(0, 50 - player['economy']*5)
-                        ]
-                        
-                        fig.add_trace(
-                            go.Scatterpolar(
-                                r=values,
-                                theta=categories,
-                                fill='toself',
-                                name=player['player_name']
-                            ),
-                            row=2, col=1
-                        )
-                    
-                    fig.update_layout(height=800, showlegend=True)
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    
-                    
-                    # Download CSV
-                    enhanced_csv = best_team.copy()
-                    enhanced_csv['selection_date'] = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    csv_data = enhanced_csv.to_csv(index=False).encode("utf-8")
-                    st.download_button(
-                        "⬇️ Download Team Sheet", 
-                        data=csv_data, 
-                        file_name=f"best_xi_team.csv", 
-                        mime="text/csv", 
-                        use_container_width=True
-                    )
 
 
 # Footer
@@ -1828,3 +2316,31 @@ st.markdown("""
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+# Per-rerun timing breakdown (see the instrumentation switches at the top)
+if INSTRUMENTATION:
+    rerun_seconds = time.perf_counter() - _RERUN['started']
+    log_rerun("full", rerun_seconds, _RERUN['spans'])
+    _RERUN['finished'] = True
+    if os.getenv("APP_INSTRUMENTATION") == "1":
+        with st.expander(f"⏱️ Rerun Timings ({rerun_seconds * 1000:.0f} ms)"):
+            if _RERUN['spans']:
+                stages = pd.DataFrame(_RERUN['spans']).groupby('stage', sort=False).agg(
+                    ms=('ms', 'sum'), calls=('ms', 'size'), rows=('rows', 'sum'))
+                st.dataframe(stages.round(2), use_container_width=True)
+            else:
+                st.caption("No instrumented stages ran in this rerun.")
+
+            registry = metrics_registry()
+            with registry['lock']:
+                totals = pd.DataFrame({
+                    'calls': pd.Series(registry['calls'], dtype=float),
+                    'total ms': pd.Series(registry['seconds'], dtype=float) * 1000,
+                    'rows': pd.Series(registry['rows'], dtype=float),
+                    'cache misses': pd.Series(registry['cache_misses'], dtype=float),
+                }).fillna(0)
+            if not totals.empty:
+                st.markdown("**Since server start**")
+                st.dataframe(totals.round(1), use_container_width=True)
+            st.download_button("⬇️ Prometheus Metrics", data=prometheus_text(registry),
+                               file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,97 @@
+"""Latency and throughput of the price models at batch sizes 1, 100 and 10k.
+
+    python benchmark_price_models.py --sizes 1 100 10000 --repeats 50
+
+Compares the Ridge model (vectorized feature engineering + coefficient dot
+product), the XGBoost fast path (float32 matrix + booster.inplace_predict) and
+the same XGBoost pipeline called through sklearn's Pipeline.predict.
+"""
+import argparse
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from price_models import (XGB_THREADS, engineer_features_batch, load_xgb_price_model, predict_with_contributions,
+                          season_stats_batch, xgb_predict_log_prices)
+
+
+def synthetic_players(n, seed=0):
+    rng = np.random.default_rng(seed)
+    matches = rng.integers(0, 250, n)
+    return pd.DataFrame({
+        'country': rng.choice(['India', 'Australia', 'England', 'Afghanistan'], n),
+        'age': rng.integers(18, 40, n),
+        'role': rng.choice(['batsman', 'bowler', 'batting-allrounder', 'bowling-allrounder', 'wk-batsman'], n),
+        'ipl_matches': matches,
+        'ipl_runs': matches * rng.uniform(0, 35, n),
+        'ipl_avg': rng.uniform(0, 50, n),
+        'ipl_sr': rng.uniform(0, 190, n),
+        'ipl_sixes': matches * rng.uniform(0, 1.5, n),
+        'ipl_wickets': matches * rng.uniform(0, 1.3, n),
+        'ipl_economy': rng.uniform(0, 11, n),
+        'ipl_bowl_sr': rng.uniform(0, 30, n),
+        't20_matches': rng.integers(0, 120, n),
+        't20_runs': rng.uniform(0, 3500, n),
+        't20_avg': rng.uniform(0, 50, n),
+        't20_sr': rng.uniform(0, 180, n),
+        't20_wickets': rng.uniform(0, 120, n),
+        't20_economy': rng.uniform(0, 10, n),
+        't20_bowl_sr': rng.uniform(0, 30, n),
+    })
+
+
+def time_call(fn, repeats):
+    fn()  # warm-up
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds))
+
+
+def run(sizes, repeats):
+    ridge = joblib.load('ipl_price_model.pkl')
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # pickled with an older XGBoost
+        xgb_model = load_xgb_price_model('best_price_model.pkl')
+    pipeline = xgb_model['pipeline']
+
+    def pipeline_predict(players):
+        frame = season_stats_batch(xgb_model, players)
+        for column in set(pipeline.feature_names_in_) - set(frame.columns):
+            frame[column] = ""  # dropped by the ColumnTransformer
+        return pipeline.predict(frame[pipeline.feature_names_in_])
+
+    paths = {
+        'Ridge': lambda players: predict_with_contributions(ridge, engineer_features_batch(players))[0],
+        'XGBoost inplace_predict': lambda players: xgb_predict_log_prices(xgb_model, players),
+        'XGBoost Pipeline.predict': pipeline_predict,
+    }
+
+    rows = []
+    for n in sizes:
+        players = synthetic_players(n)
+        fast, slow = paths['XGBoost inplace_predict'](players), paths['XGBoost Pipeline.predict'](players)
+        for name, predict in paths.items():
+            seconds = time_call(lambda: predict(players), repeats if n < 10_000 else max(3, repeats // 10))
+            rows.append({
+                'batch': n,
+                'model': name,
+                'latency ms': round(seconds * 1000, 3),
+                'rows/s': round(n / seconds),
+                'max |fast - pipeline|': float(np.abs(fast - slow).max()) if name.startswith('XGBoost') else None,
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+    print(f"XGBoost threads: {XGB_THREADS}")
+    print(run(args.sizes, args.repeats).to_string(index=False))
@@ -0,0 +1,65 @@
+"""Compare Best XI solver backends on large synthetic player pools.
+
+    python benchmark_solvers.py --sizes 1000 10000 50000 --repeats 3
+    python benchmark_solvers.py --sizes 500 50000 500000 --prune
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from team_solver import ROLES, available_backends, build_team_model, prune_pool, solve_model
+
+DEFAULT_SPEC = {
+    "team_size": 11,
+    "max_overseas": 4,
+    "roles": {"Batsman": {"min": 3}, "Bowler": {"min": 3}, "All-Rounder": {"min": 2}, "Wicketkeeper": {"min": 1}},
+}
+
+
+def synthetic_pool(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'player_name': [f"Player {i}" for i in range(n)],
+        'role': rng.choice(ROLES, size=n, p=[0.35, 0.35, 0.2, 0.1]),
+        'is_overseas': (rng.random(n) < 0.3).astype(int),
+        'impact': rng.lognormal(4.5, 0.6, size=n),
+    })
+
+
+def run(sizes, repeats, time_limit, gap, prune=False):
+    rows = []
+    for n in sizes:
+        players = synthetic_pool(n)
+        start = time.perf_counter()
+        candidates, spec = players, DEFAULT_SPEC
+        if prune:
+            _, candidates, spec = prune_pool(players, DEFAULT_SPEC)
+        model = build_team_model(candidates, spec)
+        build_ms = (time.perf_counter() - start) * 1000
+        for backend in available_backends():
+            results = [solve_model(model, backend, time_limit, gap) for _ in range(repeats)]
+            seconds = [result['seconds'] for result in results]
+            rows.append({
+                'players': n,
+                'candidates': len(candidates['player_name']),
+                'backend': backend,
+                'status': results[-1]['status'],
+                'objective': results[-1]['objective'],
+                'build ms': round(build_ms, 2),
+                'best solve ms': round(min(seconds) * 1000, 2),
+                'median solve ms': round(float(np.median(seconds)) * 1000, 2),
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per solve")
+    parser.add_argument("--gap", type=float, default=None, help="relative MIP gap")
+    parser.add_argument("--prune", action="store_true", help="solve over prune_pool's candidates, as the app does")
+    args = parser.parse_args()
+    print(run(args.sizes, args.repeats, args.time_limit, args.gap, args.prune).to_string(index=False))
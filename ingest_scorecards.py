@@ -0,0 +1,431 @@
+"""Build per-player, per-format career aggregates from Cricsheet ball-by-ball files.
+
+    python ingest_scorecards.py matches/ t20s_json.zip --db scorecards.db --workers 4
+    python ingest_scorecards.py --db scorecards.db --export T20=t20_players.csv --home-team India
+
+Reads Cricsheet JSON (current) and YAML (legacy) match files from directories,
+single files or the zip archives Cricsheet distributes. Each file is parsed in a
+worker process into one small per-player summary, and the summaries stream back
+into SQLite upserts, so memory stays bounded by the flush batch rather than the
+archive. Matches already in the database are skipped before parsing, so rerunning
+over a growing archive only adds the new matches.
+
+Players are keyed by their Cricsheet registry id (info.registry.people), so two
+players sharing a name stay apart and a renamed one stays together. Files without a
+registry (legacy YAML) key players by their player_names.resolve_player key. Each
+player's teams are counted per match, and --home-team makes a player domestic if
+they ever played for it.
+
+Alongside career totals every player keeps three recency views, each updated in
+(amortized) O(1) per new match without touching older history:
+
+- decayed: totals weighted by 2 ** (age in days / FORM_HALF_LIFE_DAYS). Weights are
+  stored relative to a fixed epoch, so they are plain sums and arrival order doesn't
+  matter; reading them rescales to the latest match date.
+- window: the player's last FORM_WINDOW matches, kept as a small sorted ring.
+- year: the player's matches in the last FORM_YEAR_DAYS days, kept the same way.
+  A match leaves once it is FORM_YEAR_DAYS older than the player's latest, and
+  reading keeps only those inside the year up to the format's latest match.
+
+--export writes a format's aggregates (career or one of the form views) in the team
+builder's 14-column player schema (CSV or JSON by extension), ready for the app's
+player upload.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from contextlib import closing
+from datetime import date
+from multiprocessing import Pool
+
+import pandas as pd
+import yaml
+
+from player_names import build_player_index, register_player, resolve_player
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # pyyaml built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
+MATCH_FORMATS = {'T20': 'T20', 'IT20': 'T20', 'ODI': 'ODI', 'ODM': 'ODI', 'Test': 'Test', 'MDM': 'Test'}
+MATCH_SUFFIXES = ('.json', '.yaml', '.yml')
+# Dismissals credited to the bowler
+BOWLER_WICKETS = {'bowled', 'caught', 'caught and bowled', 'lbw', 'stumped', 'hit wicket'}
+AGGREGATE_COLUMNS = ['matches', 'innings_batted', 'runs_scored', 'balls_faced', 'fours', 'sixes',
+                     'wickets', 'balls_bowled', 'runs_conceded', 'dot_balls', 'stumpings']
+FLUSH_EVERY = 500
+FORMS = ('career', 'decayed', 'window', 'year')
+FORM_HALF_LIFE_DAYS = 365
+FORM_WINDOW = 10
+FORM_YEAR_DAYS = 365
+FORM_EPOCH = date(2000, 1, 1).toordinal()
+_archives = {}  # per-process open zip files, so workers don't re-read the central directory per match
+
+
+def iter_match_sources(paths):
+    """Yield (path, zip member or None) for every match file under the given paths, lazily."""
+    for path in paths:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.namelist():
+                    if member.lower().endswith(MATCH_SUFFIXES):
+                        yield path, member
+        elif os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(MATCH_SUFFIXES):
+                        yield os.path.join(root, name), None
+        elif path.lower().endswith(MATCH_SUFFIXES):
+            yield path, None
+
+
+def match_id(source):
+    path, member = source
+    return os.path.splitext(os.path.basename(member or path))[0]
+
+
+def read_match(source):
+    path, member = source
+    if member is None:
+        with open(path, 'rb') as handle:
+            raw = handle.read()
+    else:
+        if path not in _archives:
+            _archives[path] = zipfile.ZipFile(path)
+        raw = _archives[path].read(member)
+    if (member or path).lower().endswith('.json'):
+        return json.loads(raw)
+    return yaml.load(raw, Loader=YamlLoader)
+
+
+def iter_deliveries(match):
+    """Yield (innings number, batting team, delivery) for the JSON and legacy YAML layouts alike."""
+    for number, innings in enumerate(match.get('innings') or []):
+        if innings.get('super_over'):
+            continue
+        if 'overs' in innings:
+            for over in innings['overs']:
+                for delivery in over.get('deliveries', []):
+                    yield number, innings.get('team'), delivery
+        else:
+            (innings,) = innings.values()  # legacy: [{'1st innings': {'team': ..., 'deliveries': [...]}}]
+            for ball in innings.get('deliveries', []):
+                (delivery,) = ball.values()
+                yield number, innings.get('team'), {
+                    'batter': delivery.get('batsman'), 'bowler': delivery.get('bowler'),
+                    'non_striker': delivery.get('non_striker'),
+                    'runs': {'batter': delivery['runs'].get('batsman', 0), 'total': delivery['runs'].get('total', 0),
+                             'non_boundary': delivery['runs'].get('non_boundary')},
+                    'extras': delivery.get('extras', {}),
+                    'wickets': [delivery['wicket']] if 'wicket' in delivery else delivery.get('wickets', []),
+                }
+
+
+def match_day(info):
+    """Ordinal day of the match's first date (FORM_EPOCH if the file has none)."""
+    dates = info.get('dates') or []
+    if not dates:
+        return FORM_EPOCH
+    first = dates[0]
+    return (first if isinstance(first, date) else date.fromisoformat(str(first))).toordinal()
+
+
+def summarize_match(source):
+    """Parse one match file into (match id, format, day, {player: (registry id, team, aggregate counts...)}).
+
+    Runs in a worker process. The registry id is None when the file has no registry,
+    and team is the side the player played for in this match. Formats the team
+    builder doesn't use come back with format None and no players, so they are still
+    recorded as seen.
+    """
+    match = read_match(source)
+    info = match.get('info', {})
+    fmt = MATCH_FORMATS.get(info.get('match_type'))
+    if fmt is None:
+        return match_id(source), None, match_day(info), {}
+
+    stats = {}
+    teams = {}
+    batted = set()
+    sides = list(info.get('teams') or [])
+
+    def player(name):
+        if name not in stats:
+            stats[name] = dict.fromkeys(AGGREGATE_COLUMNS, 0)
+            stats[name]['matches'] = 1
+        return stats[name]
+
+    for team, names in (info.get('players') or {}).items():
+        for name in names:
+            player(name)
+            teams[name] = team
+
+    for number, team, delivery in iter_deliveries(match):
+        batter, bowler, non_striker = delivery['batter'], delivery['bowler'], delivery.get('non_striker')
+        runs, extras = delivery['runs'], delivery.get('extras') or {}
+        for name in (batter, non_striker):
+            if name is not None:
+                batted.add((name, number))
+                teams.setdefault(name, team)
+        # Files without squads: the bowler plays for the side that isn't batting
+        fielding = [side for side in sides if side != team]
+        if len(fielding) == 1:
+            teams.setdefault(bowler, fielding[0])
+
+        striker = player(batter)
+        striker['runs_scored'] += runs['batter']
+        if 'wides' not in extras:
+            striker['balls_faced'] += 1
+        if not runs.get('non_boundary'):
+            striker['fours'] += runs['batter'] == 4
+            striker['sixes'] += runs['batter'] == 6
+
+        attack = player(bowler)
+        conceded = runs['batter'] + extras.get('wides', 0) + extras.get('noballs', 0)
+        attack['runs_conceded'] += conceded
+        if 'wides' not in extras and 'noballs' not in extras:
+            attack['balls_bowled'] += 1
+            attack['dot_balls'] += conceded == 0
+        for wicket in delivery.get('wickets') or []:
+            if wicket.get('kind') in BOWLER_WICKETS:
+                attack['wickets'] += 1
+            if wicket.get('kind') == 'stumped':
+                for fielder in wicket.get('fielders') or []:
+                    name = fielder.get('name') if isinstance(fielder, dict) else fielder
+                    if name:
+                        player(name)['stumpings'] += 1
+
+    for name, _ in batted:
+        player(name)['innings_batted'] += 1
+    people = (info.get('registry') or {}).get('people') or {}
+    summary = {name: (people.get(name), teams.get(name), *(counts[column] for column in AGGREGATE_COLUMNS))
+               for name, counts in stats.items()}
+    return match_id(source), fmt, match_day(info), summary
+
+
+DECAYED_COLUMNS = [f"{column}_decayed" for column in AGGREGATE_COLUMNS]
+
+
+def decay_weight(day):
+    return 2.0 ** ((day - FORM_EPOCH) / FORM_HALF_LIFE_DAYS)
+
+
+def init_db(db_path):
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        # Databases keyed by player name: forget their matches so the next ingest rebuilds them by id
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'player_aggregates'").fetchone() and \
+                'player_id' not in {row[1] for row in conn.execute("PRAGMA table_info(player_aggregates)")}:
+            conn.executescript("""
+                DROP TABLE player_aggregates; DROP TABLE IF EXISTS player_form_window;
+                DROP TABLE IF EXISTS player_form_year; DROP TABLE IF EXISTS ingested_matches;
+            """)
+        counts = ", ".join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in AGGREGATE_COLUMNS)
+        decayed = ", ".join(f"{column} REAL NOT NULL DEFAULT 0" for column in DECAYED_COLUMNS)
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS ingested_matches (match_id TEXT PRIMARY KEY, format TEXT, day INTEGER);
+            CREATE TABLE IF NOT EXISTS player_aggregates (
+                player_id TEXT NOT NULL, format TEXT NOT NULL, player_name TEXT NOT NULL, {counts}, {decayed},
+                PRIMARY KEY (player_id, format)
+            );
+            CREATE TABLE IF NOT EXISTS player_teams (
+                player_id TEXT NOT NULL, format TEXT NOT NULL, team TEXT NOT NULL, matches INTEGER NOT NULL,
+                PRIMARY KEY (player_id, format, team)
+            );
+            CREATE TABLE IF NOT EXISTS player_form_window (
+                player_id TEXT NOT NULL, format TEXT NOT NULL, matches TEXT NOT NULL,
+                PRIMARY KEY (player_id, format)
+            );
+            CREATE TABLE IF NOT EXISTS player_form_year (
+                player_id TEXT NOT NULL, format TEXT NOT NULL, matches TEXT NOT NULL,
+                PRIMARY KEY (player_id, format)
+            );
+        """)
+
+
+def last_matches(rows):
+    return rows[-FORM_WINDOW:]
+
+
+def last_year(rows):
+    return [row for row in rows if row[0] > rows[-1][0] - FORM_YEAR_DAYS]
+
+
+# Rolling form tables and how each trims a player's sorted (day, counts...) rows
+FORM_TABLES = {'player_form_window': last_matches, 'player_form_year': last_year}
+
+
+def merge_windows(conn, windows, table='player_form_window'):
+    """Fold new (day, counts...) rows into each player's rows in one rolling form table."""
+    keys = list(windows)
+    stored = {}
+    for start in range(0, len(keys), 400):
+        chunk = keys[start:start + 400]
+        rows = conn.execute(
+            f"SELECT player_id, format, matches FROM {table} WHERE (player_id, format) IN "
+            f"(VALUES {', '.join(['(?, ?)'] * len(chunk))})", [value for key in chunk for value in key])
+        stored.update({(key, fmt): json.loads(matches) for key, fmt, matches in rows})
+    trim = FORM_TABLES[table]
+    return [(key, fmt, json.dumps(trim(sorted(stored.get((key, fmt), []) + rows))))
+            for (key, fmt), rows in windows.items()]
+
+
+def flush(conn, matches, aggregates, teams, windows):
+    """Upsert buffered per-player deltas and mark their matches ingested, in one transaction."""
+    columns = AGGREGATE_COLUMNS + DECAYED_COLUMNS
+    updates = ", ".join(f"{column} = {column} + excluded.{column}" for column in columns)
+    with conn:
+        conn.executemany("INSERT OR IGNORE INTO ingested_matches (match_id, format, day) VALUES (?, ?, ?)",
+                         matches)
+        conn.executemany(
+            f"INSERT INTO player_aggregates (player_id, format, player_name, {', '.join(columns)}) "
+            f"VALUES (?, ?, ?, {', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(player_id, format) DO UPDATE SET player_name = excluded.player_name, {updates}",
+            ((key, fmt, name, *counts) for (key, fmt), (name, *counts) in aggregates.items())
+        )
+        conn.executemany(
+            "INSERT INTO player_teams (player_id, format, team, matches) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(player_id, format, team) DO UPDATE SET matches = matches + excluded.matches",
+            ((key, fmt, team, count) for (key, fmt, team), count in teams.items())
+        )
+        for table in FORM_TABLES:
+            conn.executemany(f"INSERT OR REPLACE INTO {table} (player_id, format, matches) VALUES (?, ?, ?)",
+                             merge_windows(conn, windows, table))
+    matches.clear()
+    aggregates.clear()
+    teams.clear()
+    windows.clear()
+
+
+def ingest(paths, db_path='scorecards.db', workers=None, chunksize=8):
+    """Stream every new match under paths into the aggregate tables; returns (new matches, seconds)."""
+    init_db(db_path)
+    start = time.perf_counter()
+    with closing(sqlite3.connect(db_path)) as conn:
+        seen = {row[0] for row in conn.execute("SELECT match_id FROM ingested_matches")}
+        # Players from files without a registry are keyed by resolved name
+        index = build_player_index([row[0] for row in conn.execute(
+            "SELECT DISTINCT player_name FROM player_aggregates")])
+        sources = (source for source in iter_match_sources(paths) if match_id(source) not in seen)
+        matches, aggregates, teams, windows, ingested = [], {}, {}, {}, 0
+        with Pool(workers) as pool:
+            for identifier, fmt, day, summary in pool.imap_unordered(summarize_match, sources, chunksize):
+                if identifier in seen:  # the same match in two sources
+                    continue
+                seen.add(identifier)
+                matches.append((identifier, fmt, day))
+                ingested += 1
+                weight = decay_weight(day)
+                for name, (person, team, *counts) in summary.items():
+                    register_player(index, name)
+                    key = (person or resolve_player(index, name), fmt)
+                    deltas = counts + [count * weight for count in counts]
+                    previous = aggregates.get(key)
+                    aggregates[key] = (name, *deltas) if previous is None else (
+                        name, *(a + b for a, b in zip(previous[1:], deltas)))
+                    if team is not None:
+                        teams[(*key, team)] = teams.get((*key, team), 0) + 1
+                    windows.setdefault(key, []).append([day, *counts])
+                if len(matches) >= FLUSH_EVERY:
+                    flush(conn, matches, aggregates, teams, windows)
+        flush(conn, matches, aggregates, teams, windows)
+    return ingested, time.perf_counter() - start
+
+
+def infer_role(frame):
+    """Wicketkeeper if they made stumpings; otherwise from how much they bowl and how well they bat."""
+    bowls = frame['balls_bowled'] >= 9 * frame['matches']
+    bats = frame['runs_scored'] >= 15 * frame['innings_batted'].clip(lower=1)
+    role = pd.Series('Batsman', index=frame.index)
+    role[bowls] = 'Bowler'
+    role[bowls & bats] = 'All-Rounder'
+    role[frame['stumpings'] > 0] = 'Wicketkeeper'
+    return role
+
+
+def form_totals(conn, fmt, frame, form):
+    """The counting columns for one form view, aligned with frame's rows."""
+    if form == 'career':
+        return frame[AGGREGATE_COLUMNS]
+    if form == 'decayed':
+        latest = conn.execute("SELECT MAX(day) FROM ingested_matches WHERE format = ?", (fmt,)).fetchone()[0]
+        totals = frame[DECAYED_COLUMNS] / decay_weight(latest or FORM_EPOCH)
+        return totals.set_axis(AGGREGATE_COLUMNS, axis=1)
+    table, since = 'player_form_window', None
+    if form == 'year':
+        latest = conn.execute("SELECT MAX(day) FROM ingested_matches WHERE format = ?", (fmt,)).fetchone()[0]
+        table, since = 'player_form_year', (latest or FORM_EPOCH) - FORM_YEAR_DAYS
+    windows = dict(((key, json.loads(matches)) for key, matches in conn.execute(
+        f"SELECT player_id, matches FROM {table} WHERE format = ?", (fmt,))))
+    sums = [[sum(column) for column in zip(*(row[1:] for row in windows.get(key, [])
+                                             if since is None or row[0] > since))] or
+            [0] * len(AGGREGATE_COLUMNS) for key in frame['player_id']]
+    return pd.DataFrame(sums, columns=AGGREGATE_COLUMNS, index=frame.index)
+
+
+def load_aggregates(db_path, fmt, home_team=None, form='career'):
+    """One format's aggregates in the team builder's player schema.
+
+    form picks the counting stats: 'career' totals, 'decayed' (half-life weighted as of
+    the format's latest match), 'window' (each player's last FORM_WINDOW matches) or
+    'year' (matches in the FORM_YEAR_DAYS up to the format's latest match).
+    Roles are always inferred from the career totals. With home_team, players who
+    never played for it in this format are overseas.
+    """
+    if form not in FORMS:
+        raise ValueError(f"form must be one of {', '.join(FORMS)}, got {form!r}")
+    with closing(sqlite3.connect(db_path)) as conn:
+        career = pd.read_sql_query("SELECT * FROM player_aggregates WHERE format = ? ORDER BY player_name",
+                                   conn, params=(fmt,))
+        frame = form_totals(conn, fmt, career, form)
+        home = {row[0] for row in conn.execute("SELECT player_id FROM player_teams WHERE format = ? AND team = ?",
+                                               (fmt, home_team))} if home_team else set()
+    balls_faced, balls_bowled = frame['balls_faced'], frame['balls_bowled']
+    return pd.DataFrame({
+        'player_name': career['player_name'],
+        'role': infer_role(career),
+        'is_overseas': (~career['player_id'].isin(home)).astype(int) if home_team else 0,
+        'runs_scored': frame['runs_scored'],
+        'innings_batted': frame['innings_batted'],
+        'balls_faced': balls_faced,
+        'strike_rate': (frame['runs_scored'] * 100 / balls_faced.where(balls_faced > 0)).fillna(0.0),
+        'fours': frame['fours'],
+        'sixes': frame['sixes'],
+        'wickets': frame['wickets'],
+        'balls_bowled': balls_bowled,
+        'runs_conceded': frame['runs_conceded'],
+        'economy': (frame['runs_conceded'] * 6 / balls_bowled.where(balls_bowled > 0)).fillna(0.0),
+        'dot_balls': frame['dot_balls'],
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="match files, directories or Cricsheet zip archives")
+    parser.add_argument("--db", default="scorecards.db", help="SQLite file holding the running aggregates")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    parser.add_argument("--export", action="append", default=[], metavar="FORMAT=PATH",
+                        help="write T20/ODI/Test aggregates to a .csv or .json player file")
+    parser.add_argument("--home-team", help="team whose players are not overseas (e.g. India)")
+    parser.add_argument("--form", choices=FORMS, default="career",
+                        help=f"export career totals, {FORM_HALF_LIFE_DAYS}-day half-life decayed totals, "
+                             f"each player's last {FORM_WINDOW} matches or the last {FORM_YEAR_DAYS} days")
+    args = parser.parse_args()
+
+    if args.paths:
+        ingested, seconds = ingest(args.paths, args.db, args.workers)
+        print(f"ingested {ingested} new matches in {seconds:.1f} s ({ingested / max(seconds, 1e-9):.0f} matches/s)")
+    for export in args.export:
+        fmt, _, path = export.partition('=')
+        if fmt not in set(MATCH_FORMATS.values()) or not path:
+            parser.error(f"--export expects T20=PATH, ODI=PATH or Test=PATH, got {export!r}")
+        init_db(args.db)
+        players = load_aggregates(args.db, fmt, args.home_team, args.form)
+        if path.lower().endswith('.json'):
+            players.to_json(path, orient='records', indent=2)
+        else:
+            players.to_csv(path, index=False)
+        print(f"wrote {len(players)} {fmt} players ({args.form}) to {path}")
@@ -0,0 +1,218 @@
+"""Monte Carlo T20 match simulator for comparing two XIs.
+
+    python match_simulator.py test_output.json --simulations 10000
+
+Every delivery has one of six outcomes (OUTCOMES: wicket, 0, 1, 2, 4, 6). Each
+player's career counts become per-ball rates, shrunk by PRIOR_BALLS towards the
+match environment (both XIs' pooled counts, themselves shrunk towards a T20
+BASELINE) so thin records stay sensible:
+
+- batting: dismissals (innings batted), fours and sixes per ball faced. The rest
+  of the strike rate goes to singles and twos.
+- bowling: wickets and dots per ball bowled, with the scoring balls tilted
+  towards boundaries until the runs match the bowler's economy. A zero dot count
+  is treated as missing, because several bundled pools never record dots.
+
+A batter meets a bowler through the odds ratio against the environment,
+p ∝ batter * bowler / environment, so Test or ODI pools keep their own scoring
+level rather than being read against T20 norms.
+
+An innings is a (simulations, 120) array of uniform draws resolved against
+those distributions. There is no loop over balls. The loop runs over wickets,
+at most ten steps. Each step settles, for every simulation at once, the balls
+up to the next dismissal and sends in the next batter. Strike is taken at
+random by the two batters at the crease. The five busiest specialist bowlers
+bowl four overs each, in rotation.
+
+Extras and chase pressure are not modelled. Each side's innings is
+independent, so a side wins when it outscores the other. win_probability
+keeps wins and ties apart (they sum to 1). win_share splits ties evenly,
+for a single number per side.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+OUTCOMES = ("W", "0", "1", "2", "4", "6")
+RUNS = np.array([0, 0, 1, 2, 4, 6])
+# League-average T20 ball (wicket, dot, single, two, four, six): about 8 an over, a wicket every 18 balls
+BASELINE = np.array([0.055, 0.355, 0.37, 0.06, 0.11, 0.05])
+PRIOR_BALLS = 60          # baseline balls blended into every player's record
+TWO_SHARE = 0.14          # twos as a share of non-boundary scoring balls
+BALLS, OVERS, WICKETS = 120, 20, 10
+OVERS_PER_BOWLER = 4
+BOWLERS = OVERS // OVERS_PER_BOWLER
+BATTING_ROLE_ORDER = {"Batsman": 0, "Wicketkeeper": 1, "All-Rounder": 2, "Bowler": 3}
+SIMULATION_CHUNK = 2_500  # simulations resolved per block, bounding the (chunk, 120) working arrays
+
+
+def _column(players, name):
+    return np.asarray(players[name], dtype=float) if name in players else np.zeros(len(players['player_name']))
+
+
+def batting_rates(players, prior=BASELINE):
+    """(n, 6) per-ball outcome probabilities for each batter."""
+    balls = _column(players, 'balls_faced') + PRIOR_BALLS
+    out = (_column(players, 'innings_batted') + prior[0] * PRIOR_BALLS) / balls
+    fours = (_column(players, 'fours') + prior[4] * PRIOR_BALLS) / balls
+    sixes = (_column(players, 'sixes') + prior[5] * PRIOR_BALLS) / balls
+    runs = (_column(players, 'runs_scored') + (RUNS @ prior) * PRIOR_BALLS) / balls
+    out = np.clip(out, 0.005, 0.5)
+    boundaries = np.minimum(fours + sixes, 0.95 - out)
+    fours, sixes = fours * boundaries / (fours + sixes), sixes * boundaries / (fours + sixes)
+    rest = 1 - out - fours - sixes
+    scoring = np.clip((runs - 4 * fours - 6 * sixes) / (1 + TWO_SHARE), 0, rest)
+    return np.column_stack([out, rest - scoring, (1 - TWO_SHARE) * scoring, TWO_SHARE * scoring, fours, sixes])
+
+
+def bowling_rates(players, prior=BASELINE):
+    """(n, 6) per-ball outcome probabilities for each bowler."""
+    bowled = _column(players, 'balls_bowled')
+    dots = _column(players, 'dot_balls')
+    wickets = (_column(players, 'wickets') + prior[0] * PRIOR_BALLS) / (bowled + PRIOR_BALLS)
+    dot_balls = np.where(dots > 0, bowled, 0) + PRIOR_BALLS
+    dot = (dots + prior[1] * PRIOR_BALLS) / dot_balls
+    economy = (_column(players, 'runs_conceded') + (RUNS @ prior) * PRIOR_BALLS) / (bowled + PRIOR_BALLS)
+    wickets, dot = np.clip(wickets, 0.005, 0.3), np.clip(dot, 0.05, 0.8)
+    scoring = 1 - wickets - dot
+
+    # Tilt the baseline scoring mix by exp(theta * runs) until scoring * E[runs] hits the economy
+    shape, runs = prior[2:], RUNS[2:].astype(float)
+    target = np.clip(economy / scoring, 1.05, 5.5)
+    low, high = np.full(len(target), -5.0), np.full(len(target), 5.0)
+    for _ in range(40):
+        theta = (low + high) / 2
+        weights = shape * np.exp(np.outer(theta, runs))
+        too_high = (weights @ runs) / weights.sum(1) > target
+        high, low = np.where(too_high, theta, high), np.where(too_high, low, theta)
+    weights = shape * np.exp(np.outer((low + high) / 2, runs))
+    return np.column_stack([wickets, dot, scoring[:, None] * weights / weights.sum(1, keepdims=True)])
+
+
+def environment(*teams):
+    """The match's average ball: both sides' pooled batting and bowling counts, averaged."""
+    pooled = {column: [sum(_column(team, column).sum() for team in teams)]
+              for column in ('balls_faced', 'innings_batted', 'fours', 'sixes', 'runs_scored',
+                             'balls_bowled', 'wickets', 'dot_balls', 'runs_conceded')}
+    pooled['player_name'] = ["pool"]
+    average = (batting_rates(pooled) + bowling_rates(pooled))[0] / 2
+    return average / average.sum()
+
+
+def matchup_cdf(batters, bowlers, baseline=BASELINE):
+    """(batters, bowlers, 6) cumulative outcome probabilities from the odds ratio against a baseline ball."""
+    p = batters[:, None, :] * bowlers[None, :, :] / baseline
+    return np.cumsum(p / p.sum(-1, keepdims=True), axis=-1)
+
+
+def batting_order(players):
+    """Positions in batting order: specialists first, then by runs per innings."""
+    roles = np.asarray(players['role']).astype(str)
+    rank = np.array([BATTING_ROLE_ORDER.get(role, 2) for role in roles])
+    average = _column(players, 'runs_scored') / np.maximum(_column(players, 'innings_batted'), 1)
+    return np.lexsort((-average, rank))
+
+
+def bowling_plan(players):
+    """Bowler position for each over: the BOWLERS busiest bowlers, OVERS_PER_BOWLER each in rotation."""
+    bowled = _column(players, 'balls_bowled')
+    roles = np.asarray(players['role']).astype(str)
+    specialists = np.isin(roles, ["Bowler", "All-Rounder"])
+    bowlers = np.lexsort((-bowled, ~specialists))[:BOWLERS]
+    return np.resize(bowlers, OVERS)
+
+
+def simulate_innings(batting, bowling, simulations, rng, baseline=BASELINE):
+    """Runs and wickets for `simulations` innings of `batting` against `bowling`."""
+    order = batting_order(batting)
+    cdf = matchup_cdf(batting_rates(batting, baseline)[order], bowling_rates(bowling, baseline), baseline)
+    over_bowler = np.repeat(bowling_plan(bowling), BALLS // OVERS)
+    # thresholds[j][batter * BALLS + ball]: P(outcome <= j) for that batter against that ball's bowler
+    thresholds = np.moveaxis(cdf[:, over_bowler, :-1], -1, 0).reshape(len(OUTCOMES) - 1, -1)
+    last = min(len(order), WICKETS + 1) - 1
+    ball = np.arange(BALLS)
+    runs, wickets = np.zeros(simulations, dtype=np.int64), np.zeros(simulations, dtype=np.int64)
+
+    for first in range(0, simulations, SIMULATION_CHUNK):
+        n = min(SIMULATION_CHUNK, simulations - first)
+        draws = rng.random((n, BALLS))
+        strike = rng.random((n, BALLS)) < 0.5
+        crease = np.tile([0, min(1, last)], (n, 1))
+        start = np.zeros(n, dtype=np.int64)
+        total, fallen = np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+        live = np.arange(n)
+        # each pass settles every live innings up to its next dismissal; only innings with a wicket carry on
+        while len(live):
+            key = np.where(strike[live], crease[live, 1:], crease[live, :1]) * BALLS + ball
+            batch = draws[live]
+            outcome = np.zeros(batch.shape, dtype=np.int8)
+            for threshold in thresholds:
+                outcome += batch > threshold[key]
+            pending = ball >= start[live, None]
+            dismissed = pending & (outcome == 0)
+            ends = np.where(dismissed.any(1), dismissed.argmax(1), BALLS)
+            total[live] += np.where(pending & (ball <= ends[:, None]), RUNS[outcome], 0).sum(1)
+
+            # the striker at the fatal ball walks off and the next batter comes in, while there is one
+            out = ends < BALLS
+            live, ends = live[out], ends[out]
+            fallen[live] += 1
+            crease[live, strike[live, ends].astype(np.int64)] = np.minimum(fallen[live] + 1, last)
+            start[live] = ends + 1
+            live = live[(fallen[live] < last) & (ends + 1 < BALLS)]
+        runs[first:first + n], wickets[first:first + n] = total, fallen
+    return runs, wickets
+
+
+def simulate_match(team_a, team_b, simulations=10_000, seed=None):
+    """Win probabilities and score distributions for team_a vs team_b over `simulations` matches.
+
+    Teams need player_name and role plus the pool's batting/bowling count columns.
+    """
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    baseline = environment(team_a, team_b)
+    runs_a, wickets_a = simulate_innings(team_a, team_b, simulations, rng, baseline)
+    runs_b, wickets_b = simulate_innings(team_b, team_a, simulations, rng, baseline)
+    win_a, win_b = float(np.mean(runs_a > runs_b)), float(np.mean(runs_b > runs_a))
+    tie = float(np.mean(runs_a == runs_b))
+    return {
+        'win_probability': {'team_a': win_a, 'team_b': win_b, 'tie': tie},
+        'win_share': {'team_a': win_a + tie / 2, 'team_b': win_b + tie / 2},
+        'runs': {'team_a': runs_a, 'team_b': runs_b},
+        'wickets': {'team_a': wickets_a, 'team_b': wickets_b},
+        'simulations': simulations,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def score_summary(result):
+    """Per-team score percentiles, mean runs, mean wickets and win share (ties split) as a table."""
+    rows = []
+    for team in ('team_a', 'team_b'):
+        runs = result['runs'][team]
+        p10, p50, p90 = np.percentile(runs, [10, 50, 90])
+        rows.append({'team': team, 'mean runs': runs.mean(), 'p10': p10, 'median': p50, 'p90': p90,
+                     'mean wickets': result['wickets'][team].mean(),
+                     'win share': result['win_share'][team]})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("pool", help="player JSON in the team builder's schema (e.g. test_output.json)")
+    parser.add_argument("--simulations", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.pool) as handle:
+        pool = pd.DataFrame(json.load(handle))
+    # two XIs from the pool's most experienced players, alternating picks
+    ranked = pool.iloc[np.argsort(-(pool['balls_faced'] + pool['balls_bowled']).to_numpy(), kind='stable')]
+    team_a, team_b = ranked.iloc[0:22:2], ranked.iloc[1:22:2]
+    result = simulate_match(team_a, team_b, args.simulations, args.seed)
+    print(f"{args.simulations:,} matches in {result['seconds']:.2f} s")
+    print(score_summary(result).round(3).to_string(index=False))
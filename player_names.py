@@ -0,0 +1,109 @@
+"""Resolve player names from different datasets to one canonical key per player.
+
+Exact normalized names and the PLAYER_ALIASES table resolve directly. An
+initials-style name ("SD Hope") falls back to the single full name that shares
+its surname and agrees with it on every initial both spell out ("Shai Hope",
+"Shai Diego Hope", but never "Stuart Dominic Hope" for "SJ Hope"). When the full
+name is too short to check all the initials ("Shai Hope" for "SD Hope"), the
+match also needs the overseas flag, the pools' only country signal, on both
+sides and equal. Otherwise a lone "Sam Hope" would absorb a different SD Hope.
+"""
+import re
+import unicodedata
+
+# Known spelling variants (normalized alias -> normalized canonical name)
+PLAYER_ALIASES = {
+    'ebadot hossain': 'ebadat hossain',
+}
+
+
+def normalize_player_name(name):
+    """Lower-case ASCII name with punctuation dropped and whitespace collapsed."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^a-z ]', ' ', name.lower()).split())
+
+
+def _initials_key(name):
+    """'SD Hope' -> ('s hope', 'sd', True); 'Shai Hope' -> ('s hope', 's', False).
+
+    Lower-case particles ('de', 'van') are not given names. None for single-token names.
+    """
+    tokens = str(name).replace('.', ' ').split()
+    given = [token for token in tokens[:-1] if not token[:1].islower()]
+    if not given:
+        return None, '', False
+    is_initials = all(token.isupper() for token in given)
+    initials = normalize_player_name(''.join(given) if is_initials else ''.join(token[0] for token in given))
+    return f"{initials[:1]} {normalize_player_name(tokens[-1])}", initials.replace(' ', ''), is_initials
+
+
+def _overseas(value):
+    return None if value is None or value != value else int(value)
+
+
+def build_player_index(names, aliases=PLAYER_ALIASES, overseas=None):
+    """Hash index resolving raw names to one canonical key per player.
+
+    overseas, if given, is each name's overseas flag and gates initials matches
+    that cannot check every initial (see the module docstring).
+    """
+    overseas = [None] * len(names) if overseas is None else [_overseas(value) for value in overseas]
+    index = {'aliases': dict(aliases), 'full_names': {}, 'initials_names': {}, 'display': {}}
+    for name, flag in zip(names, overseas):
+        register_player(index, name, flag)
+    for name, flag in zip(names, overseas):
+        index['display'].setdefault(resolve_player(index, name, flag), name)
+    return index
+
+
+def register_player(index, name, overseas=None):
+    """Add a name to the index; full names become initials-match targets. Returns its canonical key."""
+    key = index['aliases'].get(normalize_player_name(name), normalize_player_name(name))
+    initials_key, initials, is_initials = _initials_key(name)
+    if initials_key and not is_initials:
+        index['full_names'].setdefault(initials_key, {})[key] = (initials, _overseas(overseas))
+        index['display'][key] = name
+    elif initials_key:
+        index['initials_names'].setdefault(initials_key, {})[key] = (name, _overseas(overseas))
+    return key
+
+
+def initials_matches(index, name):
+    """Registered initials-style names now matched to a full name, given `name` was just registered.
+
+    For a full name, the initials names sharing its initials key; for an initials name,
+    itself. Returns {initials name's own key: full-name key it resolves to}.
+    """
+    initials_key, _, is_initials = _initials_key(name)
+    names = index['initials_names'].get(initials_key, {})
+    if is_initials:
+        key = index['aliases'].get(normalize_player_name(name), normalize_player_name(name))
+        names = {key: names[key]} if key in names else {}
+    matched = {key: _initials_match(index, raw, overseas) for key, (raw, overseas) in names.items()}
+    return {key: target for key, target in matched.items() if target is not None}
+
+
+def resolve_player(index, name, overseas=None):
+    """O(1) lookup of a raw player name to its canonical key."""
+    key = index['aliases'].get(normalize_player_name(name), normalize_player_name(name))
+    if key in index['display']:
+        return key
+    return _initials_match(index, name, overseas) or key
+
+
+def _initials_match(index, name, overseas):
+    """The one registered full name an initials-style name stands for, else None."""
+    initials_key, initials, is_initials = _initials_key(name)
+    if not is_initials:
+        return None
+    overseas = _overseas(overseas)
+    candidates = []
+    for full_key, (full_initials, full_overseas) in index['full_names'].get(initials_key, {}).items():
+        if not (full_initials.startswith(initials) or initials.startswith(full_initials)):
+            continue
+        same_country = overseas is not None and overseas == full_overseas
+        if overseas is not None and full_overseas is not None and not same_country:
+            continue
+        if full_initials.startswith(initials) or same_country:
+            candidates.append(full_key)
+    return candidates[0] if len(candidates) == 1 else None
@@ -0,0 +1,325 @@
+"""Price model inference shared by the app and offline scripts.
+
+Vectorized feature engineering for the Ridge model (ipl_price_model.pkl), its
+exact linear contributions, and a fast batched path for the XGBoost pipeline
+(best_price_model.pkl) that skips the per-call sklearn pipeline overhead.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+RAW_PLAYER_FIELDS = ['country', 'age', 'role', 'ipl_matches', 'ipl_runs', 'ipl_avg', 'ipl_sr', 'ipl_sixes',
+                     'ipl_wickets', 'ipl_economy', 'ipl_bowl_sr', 't20_matches', 't20_runs', 't20_avg',
+                     't20_sr', 't20_wickets', 't20_economy', 't20_bowl_sr']
+
+# Optional recent-form inputs (e.g. last 10 IPL innings); they drive form_momentum only for
+# models trained on them, whose feature columns name it RECENT_FORM_COLUMN
+FORM_FIELDS = ['form_runs', 'form_sr', 'form_avg', 'form_wickets', 'form_economy', 'form_bowl_sr']
+
+FEATURE_COLUMNS = ['nationality_premium', 'role_demand_score', 'experience_tier', 'international_exposure',
+                   'uncapped_flag', 'batting_impact_index', 'bowling_impact_index', 'consistency_metric',
+                   'role_specialization_score', 'form_momentum', 'star_player_flag', 'explosive_factor',
+                   'retention_proxy', 'hype_prospect', 'age_prime', 'age_veteran', 'age_young_prospect']
+RECENT_FORM_COLUMN = 'recent_form_momentum'
+FORM_FEATURE_COLUMNS = [RECENT_FORM_COLUMN if column == 'form_momentum' else column for column in FEATURE_COLUMNS]
+
+def uses_recent_form(feature_columns):
+    """Whether a model with these feature columns was trained on recent-form momentum."""
+    return RECENT_FORM_COLUMN in list(feature_columns)
+
+def _or_default(values, default):
+    return np.where(values > 0, values, default)
+
+def _batting_impact(runs, strike_rate, average):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(runs) ** 0.7 * (_or_default(strike_rate, 100) / 130) * (_or_default(average, 15) / 25)
+
+def _bowling_impact(wickets, economy, strike_rate):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(wickets) ** 0.7 * (8 / _or_default(economy, 8.5)) * (20 / _or_default(strike_rate, 20))
+
+def recent_form_momentum(players):
+    """Batting + bowling impact over the recent-form window, scored like the IPL career impact."""
+    col = lambda name: players[name].to_numpy(dtype=np.float64)
+    runs, wickets = col('form_runs'), col('form_wickets')
+    with np.errstate(invalid='ignore'):
+        return (np.where(runs > 0, _batting_impact(runs, col('form_sr'), col('form_avg')), 0.0)
+                + np.where(wickets > 0, _bowling_impact(wickets, col('form_economy'), col('form_bowl_sr')), 0.0))
+
+def engineer_features_batch(players, recent_form=False):
+    """Vectorized engineer_features: DataFrame of raw player fields -> (n, 17) feature matrix.
+
+    form_momentum is career batting + bowling impact, or the recent-form impact when
+    recent_form is set and the frame carries all FORM_FIELDS. Set it only for a model
+    trained that way (uses_recent_form); the bundled model was trained on career impact.
+    """
+    col = lambda name: players[name].to_numpy(dtype=np.float64)
+    country = players['country'].str.lower().to_numpy()
+    role = players['role'].to_numpy()
+    age, ipl_matches, t20_matches = col('age'), col('ipl_matches'), col('t20_matches')
+    ipl_runs, ipl_avg, ipl_sr, ipl_sixes = col('ipl_runs'), col('ipl_avg'), col('ipl_sr'), col('ipl_sixes')
+    ipl_wkts, ipl_econ, ipl_bowl_sr = col('ipl_wickets'), col('ipl_economy'), col('ipl_bowl_sr')
+    t20_runs, t20_avg, t20_sr = col('t20_runs'), col('t20_avg'), col('t20_sr')
+    t20_wkts, t20_econ, t20_bowl_sr = col('t20_wickets'), col('t20_economy'), col('t20_bowl_sr')
+
+    nationality_premium = np.select(
+        [country == 'india', np.isin(country, ['england', 'australia', 'south africa', 'new zealand'])],
+        [1.0, 0.8], 0.6
+    )
+    experience_tier = np.select([ipl_matches == 0, ipl_matches <= 20, ipl_matches <= 50], [0, 1, 2], 3)
+    uncapped_flag = (ipl_runs == 0) & (ipl_wkts == 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        batting_impact = np.select(
+            [ipl_runs > 0, t20_runs > 0],
+            [_batting_impact(ipl_runs, ipl_sr, ipl_avg), _batting_impact(t20_runs, t20_sr, t20_avg) * 0.6],
+            0.0
+        )
+        bowling_impact = np.select(
+            [ipl_wkts > 0, t20_wkts > 0],
+            [_bowling_impact(ipl_wkts, ipl_econ, ipl_bowl_sr), _bowling_impact(t20_wkts, t20_econ, t20_bowl_sr) * 0.6],
+            0.0
+        )
+        consistency = np.select(
+            [ipl_runs > 50, ipl_wkts > 5],
+            [_or_default(ipl_avg, 15) / (_or_default(ipl_sr, 100) / 100),
+             1 / (_or_default(ipl_econ, 8.5) * _or_default(ipl_bowl_sr, 20) / 100)],
+            0.0
+        )
+
+    role_specialization = np.select(
+        [role == 'batsman', role == 'bowler', role == 'batting-allrounder',
+         role == 'bowling-allrounder', role == 'wk-batsman'],
+        [batting_impact * 1.2, bowling_impact * 1.2, batting_impact * 0.7 + bowling_impact * 0.3,
+         batting_impact * 0.3 + bowling_impact * 0.7, batting_impact * 1.1 + 10],
+        batting_impact + bowling_impact
+    )
+
+    return np.column_stack([
+        nationality_premium,
+        np.full(len(players), 0.2),
+        experience_tier,
+        np.log1p(t20_matches),
+        uncapped_flag,
+        batting_impact,
+        bowling_impact,
+        consistency,
+        role_specialization,
+        recent_form_momentum(players) if recent_form and all(field in players for field in FORM_FIELDS)
+        else batting_impact + bowling_impact,
+        (ipl_runs > 2000) | (ipl_wkts > 100) | (t20_matches > 50),
+        (ipl_sr > 150) | (ipl_sixes > 50) | ((ipl_econ > 0) & (ipl_econ < 7.5)),
+        ipl_matches > 20,
+        uncapped_flag & (age < 25) & ((t20_sr > 140) | (t20_wkts > 20)),
+        (age >= 25) & (age <= 32),
+        age > 32,
+        age < 25,
+    ]).astype(np.float64)
+
+def impact_breakdown_batch(players):
+    """(n, 4) IPL batting, T20I batting, IPL bowling, T20I bowling impact, each scored on its own."""
+    col = lambda name: players[name].to_numpy(dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        return np.column_stack([
+            np.where(col('ipl_runs') > 0, _batting_impact(col('ipl_runs'), col('ipl_sr'), col('ipl_avg')), 0.0),
+            np.where(col('t20_runs') > 0, _batting_impact(col('t20_runs'), col('t20_sr'), col('t20_avg')) * 0.6, 0.0),
+            np.where(col('ipl_wickets') > 0,
+                     _bowling_impact(col('ipl_wickets'), col('ipl_economy'), col('ipl_bowl_sr')), 0.0),
+            np.where(col('t20_wickets') > 0,
+                     _bowling_impact(col('t20_wickets'), col('t20_economy'), col('t20_bowl_sr')) * 0.6, 0.0),
+        ])
+
+# Exact per-feature contributions for the linear (Ridge) price model
+def predict_with_contributions(model, feature_matrix):
+    """Return (log_prices, contributions, intercept) for a batch of feature rows.
+
+    contributions[i, j] = coef_j * x_ij, so each row plus the intercept sums to the
+    model's log-price prediction; this replaces model.predict rather than adding to it.
+    """
+    X = np.atleast_2d(np.asarray(feature_matrix, dtype=np.float64))
+    contributions = X * model.coef_
+    intercept = float(model.intercept_)
+    return contributions.sum(axis=1) + intercept, contributions, intercept
+
+
+# XGBoost pipeline: StandardScaler over per-season IPL stats -> XGBRegressor on log(price in INR)
+XGB_THREADS = int(os.getenv("XGB_THREADS", min(4, os.cpu_count() or 1)))
+XGB_SEASON = 2025
+MATCHES_PER_SEASON = 14
+RUPEES_PER_CRORE = 1e7
+
+def load_xgb_price_model(path='best_price_model.pkl', threads=XGB_THREADS):
+    """Unpack the pipeline into float32 scaler arrays plus the booster for in-place prediction."""
+    pipeline = joblib.load(path)
+    preprocessor, regressor = pipeline.steps[0][1], pipeline.steps[-1][1]
+    scaled = [(name, transformer, columns) for name, transformer, columns in preprocessor.transformers_
+              if transformer != 'drop']
+    if len(scaled) != 1 or not hasattr(scaled[0][1], 'mean_'):
+        raise ValueError("Expected a single StandardScaler in front of the XGBoost model")
+    _, scaler, columns = scaled[0]
+    booster = regressor.get_booster()
+    booster.set_param({'nthread': threads})
+    return {
+        'pipeline': pipeline,
+        'booster': booster,
+        'columns': list(columns),
+        'mean': scaler.mean_.astype(np.float32),
+        'scale': scaler.scale_.astype(np.float32),
+    }
+
+def season_stats_batch(model, players, season=XGB_SEASON):
+    """Map career predictor inputs onto the per-season IPL stats the pipeline was trained on.
+
+    Career totals are spread over ipl_matches / 14 seasons. Fours and dot balls are
+    not collected by the form, so they follow the training set's average rates, and
+    impact_score is runs + 20 * wickets (which reproduces the training mean).
+    """
+    mean = dict(zip(model['columns'], model['mean'].astype(np.float64)))
+    col = lambda name: players[name].to_numpy(dtype=np.float64)
+    seasons = np.maximum(col('ipl_matches') / MATCHES_PER_SEASON, 1.0)
+    strike_rate, economy, bowl_sr = col('ipl_sr'), col('ipl_economy'), col('ipl_bowl_sr')
+    runs, sixes, wickets = col('ipl_runs') / seasons, col('ipl_sixes') / seasons, col('ipl_wickets') / seasons
+
+    balls_faced = np.where(strike_rate > 0, runs * 100 / np.where(strike_rate > 0, strike_rate, 1), 0.0)
+    fours = balls_faced * mean['fours'] / mean['balls_faced']
+    balls_bowled = wickets * bowl_sr
+    stats = {
+        'season': np.full(len(players), float(season)),
+        'runs_scored': runs,
+        'balls_faced': balls_faced,
+        'fours': fours,
+        'sixes': sixes,
+        'innings_batted': col('ipl_matches') / seasons,
+        'strike_rate': strike_rate,
+        'balls_bowled': balls_bowled,
+        'runs_conceded': balls_bowled / 6 * economy,
+        'wickets': wickets,
+        'dot_balls': balls_bowled * mean['dot_balls'] / mean['balls_bowled'],
+        'economy': economy,
+        'boundary_percent': np.where(balls_faced > 0, (fours + sixes) / np.where(balls_faced > 0, balls_faced, 1), 0.0),
+        'wicket_strike_rate': bowl_sr,
+        'impact_score': runs + 20 * wickets,
+    }
+    return pd.DataFrame(stats)[model['columns']]
+
+def xgb_feature_matrix(model, players):
+    """Scaled features as one C-contiguous float32 matrix, ready for inplace_predict."""
+    X = np.ascontiguousarray(season_stats_batch(model, players).to_numpy(dtype=np.float32))
+    X -= model['mean']
+    X /= model['scale']
+    return X
+
+def xgb_predict_log_prices(model, players):
+    """log(price in INR) for a whole batch in one native booster call."""
+    return model['booster'].inplace_predict(xgb_feature_matrix(model, players))
+
+def xgb_predict_with_contributions(model, players):
+    """(log_prices, contributions, intercept) like predict_with_contributions, via TreeSHAP."""
+    shap = model['booster'].predict(xgb.DMatrix(xgb_feature_matrix(model, players)), pred_contribs=True)
+    return shap.sum(axis=1), shap[:, :-1], float(shap[0, -1])
+
+def xgb_prices_crore(log_prices):
+    return np.exp(log_prices) / RUPEES_PER_CRORE
+
+
+# Conformal prediction intervals, stored next to each model as <model>_intervals.pkl
+INTERVAL_LEVELS = (0.5, 0.8, 0.9, 0.95)
+
+def interval_path(model_path):
+    root, ext = os.path.splitext(model_path)
+    return f"{root}_intervals{ext}"
+
+def conformal_calibration(residuals):
+    """Sorted |held-out residuals| in the model's log space; serves any coverage level."""
+    return {'abs_residuals': np.sort(np.abs(np.asarray(residuals, dtype=np.float64)))}
+
+def conformal_quantile(calibration, level):
+    """The ceil((n + 1) * level)-th smallest |residual|, or inf if n is too small for the level."""
+    scores = calibration['abs_residuals']
+    rank = int(np.ceil((len(scores) + 1) * level))
+    return float(scores[rank - 1]) if rank <= len(scores) else np.inf
+
+def conformal_bounds(log_prices, calibration, level):
+    """(lower, upper) log-price bounds for a whole batch: one quantile lookup, two vector ops."""
+    half_width = conformal_quantile(calibration, level)
+    return log_prices - half_width, log_prices + half_width
+
+
+# Feature store: engineered features, predictions and impact breakdowns keyed by the raw stats
+def player_stats_key(player):
+    """Stable hash of the 18 raw fields plus any recent-form fields (numbers as floats, text
+    lower-cased), the same in every process."""
+    fields = RAW_PLAYER_FIELDS + [field for field in FORM_FIELDS if field in player]
+    values = [str(player[field]).strip().lower() if field in ('country', 'role') else float(player[field])
+              for field in fields]
+    return hashlib.blake2b(json.dumps(values).encode(), digest_size=16).hexdigest()
+
+class FeatureStore:
+    """Thread-safe LRU of per-player entries, optionally mirrored to a SQLite table.
+
+    An entry is a JSON-serializable dict; callers add to it (e.g. one prediction per
+    model) and put it back. The disk copy is pruned to the same capacity, so a
+    shared store stays bounded across server restarts too.
+    """
+
+    PRUNE_EVERY = 256
+
+    def __init__(self, capacity, db_path=None):
+        self.capacity, self.db_path = capacity, db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        if db_path:
+            with closing(sqlite3.connect(db_path)) as conn, conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS feature_store "
+                             "(key TEXT PRIMARY KEY, entry TEXT NOT NULL, used REAL NOT NULL)")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.db_path:
+            return None
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            row = conn.execute("SELECT entry FROM feature_store WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE feature_store SET used = ? WHERE key = ?", (time.time(), key))
+        entry = json.loads(row[0])
+        self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if not self.db_path:
+            return
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO feature_store (key, entry, used) VALUES (?, ?, ?)",
+                         (key, json.dumps(entry), time.time()))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM feature_store WHERE key IN "
+                             "(SELECT key FROM feature_store ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                             (self.capacity,))
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
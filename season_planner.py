@@ -0,0 +1,225 @@
+"""Plan a season: one squad and an XI for every fixture, with bowler workload limits.
+
+    python season_planner.py --matches 14 --squad-size 20 --players 5000
+
+Every XI follows the same rules as the Best XI builder (team_solver spec: team
+size, overseas cap, role bounds, batting slots, bowling overs, conflicts), and
+the squad is picked jointly with the lineups:
+
+    x[p, m] <= s[p]                      # only squad players take the field
+    sum(s) <= squad_size                 # squad size and squad overseas cap
+    sum(s[overseas]) <= squad_overseas
+    workload (players of workload['roles'] only):
+      max_matches       appearances over the season
+      max_consecutive   appearances in any run of max_consecutive + 1 fixtures
+      rest_days         no two appearances within rest_days days of each other
+
+The objective is the XI impact summed over all fixtures. Must-include players
+must be in the squad, not in every XI. Captaincy is left to the per-match
+builder.
+
+The model is compiled once. It is then solved on a rolling horizon: the next
+`horizon` fixtures are binary, later fixtures are relaxed to [0, 1] so the squad
+still sees the whole season, and the first `step` fixtures of each window are
+fixed before moving on. The squad is fixed after the first window. The full
+LP relaxation gives an upper bound, so the reported gap is honest.
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from team_solver import DEFAULT_BOWLING, build_team_model, diagnose_infeasibility, prune_pool
+
+DEFAULT_WORKLOAD = {"roles": DEFAULT_BOWLING["roles"], "max_consecutive": 3, "max_matches": None, "rest_days": 0}
+
+
+def fixture_days(fixtures):
+    """Fixture count, day offsets or dates -> sorted day numbers."""
+    if isinstance(fixtures, int):
+        return np.arange(fixtures)
+    return np.sort(np.array([day.toordinal() if hasattr(day, 'toordinal') else int(day) for day in fixtures]))
+
+
+def build_season_model(candidates, spec, days, squad_size, squad_overseas=None, workload=None):
+    """Compile squad + per-fixture lineups over a (pruned) pool into c, A, lb, ub.
+
+    Columns are the squad picks s (k) followed by one block of k lineup picks per fixture.
+    """
+    match_spec = {key: value for key, value in spec.items() if key not in ('must_include', 'must_exclude', 'captaincy')}
+    match = build_team_model(candidates, match_spec)
+    k, m = match['players'], len(days)
+    impact = np.asarray(candidates['impact'], dtype=float)
+    is_overseas = np.asarray(candidates['is_overseas'], dtype=float) > 0
+    roles = np.asarray(candidates['role']).astype(str)
+
+    def pick(fixture, players):
+        return k + fixture * k + players
+
+    blocks = [sparse.hstack([sparse.csr_matrix((match['A'].shape[0] * m, k)), sparse.block_diag([match['A']] * m)])]
+    lb, ub = [np.tile(match['lb'], m)], [np.tile(match['ub'], m)]
+    rows, cols, vals, row_lb, row_ub = [], [], [], [], []
+
+    def add(columns, low=-np.inf, high=np.inf, coefficients=None):
+        rows.append(np.full(len(columns), len(row_lb)))
+        cols.append(columns)
+        vals.append(np.ones(len(columns)) if coefficients is None else coefficients)
+        row_lb.append(low)
+        row_ub.append(high)
+
+    add(np.arange(k), high=squad_size)
+    if squad_overseas is not None:
+        add(np.flatnonzero(is_overseas), high=squad_overseas)
+    if spec.get('must_include'):
+        names = {str(name).strip().lower(): i for i, name in enumerate(candidates['player_name'])}
+        included = np.array([names[str(name).strip().lower()] for name in spec['must_include']], dtype=np.int64)
+        add(included, len(included), len(included))
+
+    # x[p, m] - s[p] <= 0 for every player and fixture, as one vectorized block
+    link = sparse.csr_matrix((np.r_[np.ones(k * m), -np.ones(k * m)],
+                              (np.r_[np.arange(k * m), np.arange(k * m)],
+                               np.r_[k + np.arange(k * m), np.tile(np.arange(k), m)])), shape=(k * m, k * (m + 1)))
+    blocks.append(link)
+    lb.append(np.full(k * m, -np.inf))
+    ub.append(np.zeros(k * m))
+
+    workload = {**DEFAULT_WORKLOAD, **(workload or {})}
+    for player in np.flatnonzero(np.isin(roles, workload['roles'])):
+        if workload['max_matches'] is not None and workload['max_matches'] < m:
+            add(pick(np.arange(m), player), high=workload['max_matches'])
+        run = workload['max_consecutive']
+        if run is not None and run < m:
+            for first in range(m - run):
+                add(pick(np.arange(first, first + run + 1), player), high=run)
+        if workload['rest_days']:
+            # every set of fixtures inside one rest window is a clique: at most one appearance
+            for first in range(m):
+                close = np.flatnonzero((days >= days[first]) & (days <= days[first] + workload['rest_days']))
+                if len(close) > 1 and (first == 0 or days[close[-1]] > days[first - 1] + workload['rest_days']):
+                    add(pick(close, player), high=1)
+
+    if row_lb:
+        blocks.append(sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                                        shape=(len(row_lb), k * (m + 1))))
+        lb.append(np.array(row_lb, dtype=float))
+        ub.append(np.array(row_ub, dtype=float))
+    return {'c': np.r_[np.zeros(k), np.tile(impact, m)], 'A': sparse.vstack(blocks, format='csr'),
+            'lb': np.concatenate(lb), 'ub': np.concatenate(ub), 'players': k, 'fixtures': m}
+
+
+def plan_season(players, spec, fixtures, squad_size=18, squad_overseas=None, workload=None, horizon=4, step=2,
+                time_limit=None, gap=None):
+    """Pick a squad and an XI per fixture on a rolling horizon; horizon=None solves the whole season at once.
+
+    players needs impact, is_overseas, role and player_name columns (as select_team).
+    Returns status, squad (pool positions), lineups (pool positions per fixture),
+    objective, bound (the LP relaxation), gap, seconds, windows, pool_size and candidates.
+    """
+    pool_size = len(players['player_name'])
+    days = fixture_days(fixtures)
+    m = len(days)
+    plan = {'status': "infeasible", 'squad': None, 'lineups': None, 'objective': None, 'bound': None, 'gap': None,
+            'seconds': 0.0, 'windows': 0, 'pool_size': pool_size, 'candidates': pool_size, 'conflicts': []}
+    conflicts = diagnose_infeasibility(players, spec)
+    if squad_size < spec['team_size']:
+        conflicts.append({'constraints': ["Squad size", "TeamSize"],
+                          'message': f"a squad of {squad_size} cannot field {spec['team_size']} players"})
+    if conflicts:
+        return {**plan, 'conflicts': conflicts}
+
+    start = time.perf_counter()
+    # A squad member below the top squad_size of their (role, overseas) bucket can hand their whole
+    # schedule to an unpicked better one of those, so prune_pool's exchange argument still holds
+    kept, candidates, model_spec = prune_pool(players, {**spec, 'team_size': squad_size})
+    model = build_season_model(candidates, {**model_spec, 'team_size': spec['team_size']}, days, squad_size, squad_overseas, workload)
+    k, n = model['players'], len(model['c'])
+    constraints = LinearConstraint(model['A'], model['lb'], model['ub'])
+    plan['candidates'] = len(kept)
+
+    relaxed = milp(-model['c'], integrality=np.zeros(n), bounds=Bounds(0, 1), constraints=constraints)
+    if relaxed.status != 0:
+        return {**plan, 'seconds': time.perf_counter() - start,
+                'conflicts': [{'constraints': ["Squad", "Workload"],
+                               'message': "no squad can cover every fixture under these workload limits"}]}
+    bound = -relaxed.fun
+
+    # Each window solves only the columns still open: once the squad is settled that is the squad's
+    # picks for the remaining fixtures, with settled picks folded into the row bounds
+    horizon, step = horizon or m, min(step, horizon or m)
+    A = model['A'].tocsc()
+    low, high = np.zeros(n), np.ones(n)
+    options = {key: value for key, value in (('time_limit', time_limit), ('mip_rel_gap', gap)) if value is not None}
+    fixed, windows, active = 0, 0, np.arange(n)
+    while fixed < m:
+        end = min(m, fixed + horizon)
+        window = A[:, active].tocsr()
+        settled = low.copy()
+        settled[active] = 0
+        offset = A @ settled
+        rows = np.diff(window.indptr) > 0
+        integrality = ((active >= k + fixed * k) & (active < k + end * k)) | (active < k)
+        result = milp(-model['c'][active], integrality=integrality.astype(float),
+                      bounds=Bounds(low[active], high[active]),
+                      constraints=LinearConstraint(window[rows], (model['lb'] - offset)[rows],
+                                                   (model['ub'] - offset)[rows]), options=options)
+        windows += 1
+        if result.x is None:
+            return {**plan, 'status': "infeasible" if result.status == 2 else "time_limit", 'windows': windows,
+                    'seconds': time.perf_counter() - start, 'bound': bound,
+                    'conflicts': [{'constraints': [f"Fixtures {fixed + 1}-{end}"],
+                                   'message': "no squad can field a whole XI in every fixture under these limits"
+                                   if fixed == 0 else "the rolling horizon could not extend the plan past this window"}]}
+        # settle the squad and this window's first `step` fixtures (all of the last window)
+        done = m if end == m else fixed + step
+        values = np.round(result.x)
+        low[active] = high[active] = values
+        squad = np.flatnonzero(low[:k] > 0.5)
+        active = (k + np.arange(done, m)[:, None] * k + squad).ravel()
+        low[active], high[active] = 0, 1
+        fixed = done
+
+    picks = low > 0.5
+    objective = float(model['c'][picks].sum())
+    gap = max(bound - objective, 0.0) / max(abs(bound), 1e-9)
+    proved = (windows == 1 and result.status == 0) or gap < 1e-9
+    return {**plan, 'status': "optimal" if proved else "feasible",
+            'squad': kept[picks[:k]],
+            'lineups': [kept[picks[k + f * k:k + (f + 1) * k]] for f in range(m)],
+            'objective': objective, 'bound': bound, 'gap': gap,
+            'seconds': time.perf_counter() - start, 'windows': windows}
+
+
+if __name__ == "__main__":
+    from benchmark_solvers import DEFAULT_SPEC, synthetic_pool
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=5_000, help="synthetic pool size")
+    parser.add_argument("--matches", type=int, default=14)
+    parser.add_argument("--squad-size", type=int, default=18)
+    parser.add_argument("--squad-overseas", type=int, default=8)
+    parser.add_argument("--max-consecutive", type=int, default=3, help="bowler appearances in a row")
+    parser.add_argument("--max-matches", type=int, default=None, help="bowler appearances per season")
+    parser.add_argument("--rest-days", type=int, default=0)
+    parser.add_argument("--days-between", type=int, default=3, help="days between fixtures")
+    parser.add_argument("--horizon", type=int, default=4, help="binary fixtures per window (0 = whole season)")
+    parser.add_argument("--step", type=int, default=2, help="fixtures fixed per window")
+    args = parser.parse_args()
+
+    pool = synthetic_pool(args.players)
+    spec = {**DEFAULT_SPEC, 'bowling': {'overs': 20}}
+    workload = {'max_consecutive': args.max_consecutive, 'max_matches': args.max_matches, 'rest_days': args.rest_days}
+    plan = plan_season(pool, spec, list(range(0, args.matches * args.days_between, args.days_between)),
+                       args.squad_size, args.squad_overseas, workload, args.horizon or None, args.step)
+    print(f"{plan['status']} in {plan['seconds']:.2f} s over {plan['windows']} window(s), "
+          f"{plan['candidates']} of {plan['pool_size']} players after pruning")
+    if plan['squad'] is None:
+        for conflict in plan['conflicts']:
+            print(f"- {', '.join(conflict['constraints'])}: {conflict['message']}")
+    else:
+        print(f"objective {plan['objective']:.1f}, LP bound {plan['bound']:.1f} (gap {plan['gap']:.2%})")
+        appearances = {player: sum(player in lineup for lineup in plan['lineups']) for player in plan['squad']}
+        for player in plan['squad']:
+            print(f"  {pool['player_name'][player]:<14} {pool['role'][player]:<13} "
+                  f"{pool['impact'][player]:7.1f}  {appearances[player]:2d}/{args.matches}")
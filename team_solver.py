@@ -0,0 +1,610 @@
+"""Best XI selection model and pluggable MILP backends (HiGHS, CBC, OR-Tools CP-SAT).
+
+Selection rules are a declarative spec (a dict, or YAML via parse_spec):
+
+    team_size: 11
+    max_overseas: 4
+    roles:                       # per-role bounds
+      Batsman: {min: 3, max: 6}
+      Wicketkeeper: {min: 1}
+    batting_slots:               # batting-order slots and the roles that can fill them
+      top_order: {count: 4, roles: [Batsman, Wicketkeeper]}
+    bowling:                     # bowling-overs coverage
+      overs: 20
+      max_overs_per_bowler: 4
+      roles: [Bowler, All-Rounder]
+    must_include: [Virat Kohli]
+    must_exclude: [Player X]
+    conflicts: [[Player A, Player B]]
+    captaincy: {captain: 2.0, vice_captain: 1.5}   # picked jointly with the XI
+
+It compiles straight to an objective vector plus sparse rows lb <= A @ x <= ub
+over binary pick variables, so each backend only has to translate it once.
+"""
+import time
+from itertools import combinations, product
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+import pulp
+import yaml
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # OR-Tools is optional
+    cp_model = None
+
+ROLES = ["Batsman", "Bowler", "All-Rounder", "Wicketkeeper"]
+SPEC_KEYS = {"team_size", "max_overseas", "roles", "batting_slots", "bowling",
+             "must_include", "must_exclude", "conflicts", "captaincy"}
+DEFAULT_BOWLING = {"max_overs_per_bowler": 4, "roles": ["Bowler", "All-Rounder"]}
+
+# Scenario grid fields -> (model row, the bound they set)
+GRID_FIELDS = {
+    "team_size": ("TeamSize", "both"),
+    "max_overseas": ("OverseasLimit", "ub"),
+    "min_batsmen": ("Batsman count", "lb"),
+    "min_bowlers": ("Bowler count", "lb"),
+    "min_allrounders": ("All-Rounder count", "lb"),
+    "min_wk": ("Wicketkeeper count", "lb"),
+}
+
+# Batting-slot rows grow as 2^(distinct slot roles); more roles than this is a malformed spec
+MAX_SLOT_ROLES = 8
+
+# CP-SAT needs an integer objective; impact is scaled and rounded to this precision
+CPSAT_OBJECTIVE_SCALE = 1000
+# ... and integer rows; a row with fractional coefficients or bounds is scaled by this first
+CPSAT_ROW_SCALE = 1000
+
+
+def parse_spec(text):
+    """Load a YAML constraint spec; an empty document is an empty spec."""
+    try:
+        spec = yaml.safe_load(text) or {}
+    except yaml.YAMLError as e:
+        raise ValueError(f"Invalid YAML: {e}") from e
+    if not isinstance(spec, dict):
+        raise ValueError("The constraint spec must be a mapping of rules")
+    return spec
+
+
+def validate_spec(spec):
+    """Raise ValueError naming the first malformed rule."""
+    def require(condition, message):
+        if not condition:
+            raise ValueError(message)
+
+    unknown = set(spec) - SPEC_KEYS
+    require(not unknown, f"Unknown constraint rule(s): {', '.join(sorted(map(str, unknown)))}")
+    for key in ("team_size", "max_overseas"):
+        require(isinstance(spec.get(key), int), f"{key} must be a whole number")
+    for key in ("roles", "batting_slots"):
+        require(isinstance(spec.get(key, {}), dict), f"{key} must be a mapping")
+    for role, bounds in spec.get('roles', {}).items():
+        require(isinstance(bounds, dict) and set(bounds) <= {'min', 'max'},
+                f"roles.{role} must look like {{min: 1, max: 4}}")
+    for name, slot in spec.get('batting_slots', {}).items():
+        require(isinstance(slot, dict) and isinstance(slot.get('count'), int) and isinstance(slot.get('roles'), list),
+                f"batting_slots.{name} must look like {{count: 2, roles: [Batsman, Wicketkeeper]}}")
+    slot_roles = {role for slot in spec.get('batting_slots', {}).values() for role in slot['roles']}
+    require(len(slot_roles) <= MAX_SLOT_ROLES,
+            f"batting_slots may name at most {MAX_SLOT_ROLES} different roles, not {len(slot_roles)}")
+    if 'bowling' in spec:
+        bowling = spec['bowling']
+        require(isinstance(bowling, dict) and isinstance(bowling.get('overs'), (int, float))
+                and set(bowling) <= {'overs', 'max_overs_per_bowler', 'roles'},
+                "bowling must look like {overs: 20, max_overs_per_bowler: 4, roles: [Bowler, All-Rounder]}")
+    for key in ("must_include", "must_exclude"):
+        require(isinstance(spec.get(key, []), list), f"{key} must be a list of player names")
+    require(all(isinstance(pair, list) and len(pair) == 2 for pair in spec.get('conflicts', [])),
+            "conflicts must be a list of [player, player] pairs")
+    if spec.get('captaincy'):
+        captaincy = spec['captaincy']
+        require(isinstance(captaincy, dict) and set(captaincy) == {'captain', 'vice_captain'}
+                and all(isinstance(value, (int, float)) for value in captaincy.values()),
+                "captaincy must look like {captain: 2.0, vice_captain: 1.5}")
+    return spec
+
+
+def merge_specs(base, override):
+    """Overlay override on base; role bounds merge per role, other rules are replaced."""
+    roles = {role: dict(bounds) for role, bounds in base.get('roles', {}).items()}
+    override_roles = override.get('roles') or {}
+    if not isinstance(override_roles, dict):
+        raise ValueError("roles must be a mapping")
+    for role, bounds in override_roles.items():
+        roles[role] = {**roles.get(role, {}), **(bounds if isinstance(bounds, dict) else {'invalid': bounds})}
+    return validate_spec({**base, **override, 'roles': roles})
+
+
+def _name_resolver(names):
+    """Map player names in rules to pool positions (names match case-insensitively)."""
+    lookup = {name.strip().lower(): i for i, name in enumerate(map(str, names))}
+
+    def positions(listed, rule):
+        keys = [str(name).strip().lower() for name in listed]
+        missing = [name for name, key in zip(listed, keys) if key not in lookup]
+        if missing:
+            raise ValueError(f"{rule}: not in the player pool: {', '.join(map(str, missing))}")
+        return np.array([lookup[key] for key in keys], dtype=np.int64)
+    return positions
+
+
+def bucket_top(impact, is_overseas, roles, excluded, pinned, k):
+    """Positions ranked within the top k free players of each (role, overseas) bucket.
+
+    One lexsort and a segmented cumulative count, so it stays vectorized however
+    many players or buckets there are. Excluded players never qualify; pinned ones
+    qualify if they rank above the bucket's k-th free player but don't count
+    towards its k.
+    """
+    order = np.lexsort((-impact, is_overseas, roles))
+    sorted_roles, sorted_overseas = roles[order], is_overseas[order]
+    new_bucket = np.r_[True, (sorted_roles[1:] != sorted_roles[:-1]) | (sorted_overseas[1:] != sorted_overseas[:-1])]
+    free = (~pinned & ~excluded)[order].astype(np.int64)
+    free_before = np.cumsum(free) - free
+    free_before -= np.maximum.accumulate(np.where(new_bucket, free_before, 0))
+    keep = (free_before < k) & ~excluded[order]
+    return np.sort(order[keep])
+
+
+def captaincy_candidates(impact, is_overseas, roles, excluded, pinned, forced):
+    """Players who can be captain or vice-captain in some optimal XI.
+
+    Swapping a captain or vice-captain out for a higher-impact, unpicked player
+    of the same role and overseas status keeps every role-level rule satisfied
+    and raises the objective. So only the top two freely swappable players of
+    each (role, overseas) bucket qualify. Players named in conflicts are kept but
+    do not count towards a bucket's two, and must-include players always qualify.
+    """
+    return np.union1d(bucket_top(impact, is_overseas, roles, excluded, pinned, 2), np.flatnonzero(forced))
+
+
+def prune_pool(players, spec):
+    """Drop players who cannot be in any optimal XI; returns (kept positions, column dict, spec).
+
+    A picked player ranked below the top team_size free players of their (role,
+    overseas) bucket can always be swapped for an unpicked one of those: every
+    rule sees the same role and overseas status, and impact (captaincy included)
+    does not go down. So the model only needs those top team_size per bucket plus
+    the players named in must_include / conflicts, whatever the pool size. Roles no
+    rule mentions are interchangeable, so they share one bucket. The
+    returned spec drops must_exclude (those players are gone) and any conflict
+    pair that lost a member.
+    """
+    impact = np.asarray(players['impact'], dtype=float)
+    is_overseas = np.asarray(players['is_overseas'], dtype=float)
+    roles = np.asarray(players['role']).astype(str)
+    names = np.asarray(players['player_name'], dtype=object)
+    ruled = dict.fromkeys(ROLES + list(spec.get('roles', {}))
+                          + [role for slot in spec.get('batting_slots', {}).values() for role in slot['roles']]
+                          + list(spec.get('bowling', {}).get('roles', [])))
+    role_codes = np.full(len(roles), len(ruled), dtype=np.int64)
+    for code, role in enumerate(ruled):
+        role_codes[roles == role] = code
+    excluded, pinned = np.zeros(len(impact), dtype=bool), np.zeros(len(impact), dtype=bool)
+    if spec.get('must_include') or spec.get('must_exclude') or spec.get('conflicts'):
+        positions = _name_resolver(names)
+        if spec.get('must_exclude'):
+            excluded[positions(spec['must_exclude'], "must_exclude")] = True
+        if spec.get('must_include'):
+            pinned[positions(spec['must_include'], "must_include")] = True
+        for pair in spec.get('conflicts', []):
+            pinned[positions(pair, "conflicts")] = True
+    kept = np.union1d(bucket_top(impact, is_overseas, role_codes, excluded, pinned, spec['team_size']),
+                      np.flatnonzero(pinned & ~excluded))
+    kept_names = {str(name).strip().lower() for name in names[kept]}
+    pruned_spec = {key: value for key, value in spec.items() if key != 'must_exclude'}
+    if spec.get('conflicts'):
+        pruned_spec['conflicts'] = [pair for pair in spec['conflicts'] 
+                                  if all(str(name).strip().lower() in kept_names for name in pair)]
+    return kept, {'impact': impact[kept], 'is_overseas': is_overseas[kept], 'role': roles[kept],
+                  'player_name': names[kept]}, pruned_spec
+
+
+def build_team_model(players, spec):
+    """Compile a constraint spec over a scored pool into an objective and sparse rows.
+
+    players needs impact, is_overseas, role and player_name columns.
+    """
+    impact = np.asarray(players['impact'], dtype=float)
+    is_overseas = np.asarray(players['is_overseas'], dtype=float)
+    roles = np.asarray(players['role']).astype(str)
+    n = len(impact)
+    role_members = {role: np.flatnonzero(roles == role) for role in set(roles) | set(spec.get('roles', {}))}
+
+    members, values, lb, ub, names = [], [], [], [], []
+
+    def add(name, columns, low=-np.inf, high=np.inf, coefficients=None):
+        members.append(columns)
+        values.append(np.ones(len(columns)) if coefficients is None else coefficients)
+        names.append(name)
+        lb.append(low)
+        ub.append(high)
+
+    add("TeamSize", np.arange(n), spec["team_size"], spec["team_size"])
+    add("OverseasLimit", np.flatnonzero(is_overseas), high=spec["max_overseas"])
+    for role, bounds in spec.get('roles', {}).items():
+        add(f"{role} count", role_members[role], bounds.get('min', 0), bounds.get('max', np.inf))
+
+    # Hall's condition: every set of slots has enough eligible players between them. Players
+    # differ only by role, so it is enough to check, for each set of slot roles, the slots
+    # that set can fill: one row per distinct union, at most 2^roles however many slots
+    slots = list(spec.get('batting_slots', {}).items())
+    slot_roles = list(dict.fromkeys(role for _, slot in slots for role in slot['roles']))
+    for size in range(1, len(slot_roles) + 1):
+        for eligible in combinations(slot_roles, size):
+            group = [(name, slot) for name, slot in slots if set(slot['roles']) <= set(eligible)]
+            if not group or {role for _, slot in group for role in slot['roles']} != set(eligible):
+                continue  # a smaller role set already covers these slots with fewer players
+            add(f"Batting slots: {' + '.join(name for name, _ in group)}",
+                np.concatenate([role_members.get(role, np.empty(0, np.int64)) for role in eligible]),
+                sum(slot['count'] for _, slot in group))
+
+    if 'bowling' in spec:
+        bowling = {**DEFAULT_BOWLING, **spec['bowling']}
+        bowlers = np.concatenate([role_members.get(role, np.empty(0, np.int64)) for role in bowling['roles']])
+        add("Bowling overs", bowlers, bowling['overs'],
+            coefficients=np.full(len(bowlers), float(bowling['max_overs_per_bowler'])))
+
+    forced, excluded, pinned = (np.zeros(n, dtype=bool) for _ in range(3))
+    if spec.get('must_include') or spec.get('must_exclude') or spec.get('conflicts'):
+        positions = _name_resolver(players['player_name'])
+        if spec.get('must_include'):
+            included = positions(spec['must_include'], "must_include")
+            forced[included] = True
+            add("Must include", included, len(included), len(included))
+        if spec.get('must_exclude'):
+            excluded[positions(spec['must_exclude'], "must_exclude")] = True
+            add("Must exclude", np.flatnonzero(excluded), high=0)
+        for pair in spec.get('conflicts', []):
+            pair_positions = positions(pair, "conflicts")
+            pinned[pair_positions] = True
+            add(f"Conflict: {' / '.join(map(str, pair))}", pair_positions, high=1)
+
+    # Captain / vice-captain picks ride on extra binaries for a handful of candidates:
+    # objective gains (multiplier - 1) * impact, and each needs its player in the XI
+    objective, candidates = impact, np.empty(0, dtype=np.int64)
+    if spec.get('captaincy'):
+        candidates = captaincy_candidates(impact, is_overseas, roles, excluded, pinned, forced)
+        k = len(candidates)
+        add("Captain", n + np.arange(k), 1, 1)
+        add("Vice-captain", n + k + np.arange(k), 1, 1)
+        for t, player in enumerate(candidates):
+            add(f"Captaincy of {player}", np.array([n + t, n + k + t, player]), high=0,
+                coefficients=np.array([1.0, 1.0, -1.0]))
+        objective = np.concatenate([impact, (spec['captaincy']['captain'] - 1) * impact[candidates],
+                                    (spec['captaincy']['vice_captain'] - 1) * impact[candidates]])
+
+    row_ids = np.repeat(np.arange(len(members)), [len(columns) for columns in members])
+    A = sparse.csr_matrix((np.concatenate(values), (row_ids, np.concatenate(members))),
+                          shape=(len(members), len(objective)))
+    return {'c': objective, 'A': A, 'lb': np.array(lb, dtype=float), 'ub': np.array(ub, dtype=float),
+            'names': names, 'players': n, 'candidates': candidates}
+
+
+def diagnose_infeasibility(players, spec):
+    """Explain which rules of a spec cannot all hold, without solving.
+
+    The team size / role minimum / overseas cap check is exact: overseas players
+    only ever count against a cap, so filling every role minimum (and then the
+    rest of the team) with domestic players first uses the fewest overseas slots
+    possible. The remaining rules are checked against simple counting bounds.
+    """
+    positions = _name_resolver(players['player_name'])
+    available = np.ones(len(players['player_name']), dtype=bool)
+    if spec.get('must_exclude'):
+        available[positions(spec['must_exclude'], "must_exclude")] = False
+    is_overseas = np.asarray(players['is_overseas']).astype(bool)[available]
+    roles = np.asarray(players['role']).astype(str)[available]
+    team_size, max_overseas = spec["team_size"], spec["max_overseas"]
+    role_bounds = spec.get('roles', {})
+    conflicts = []
+
+    if len(roles) < team_size:
+        conflicts.append({'constraints': ["TeamSize"],
+                          'message': f"team size is {team_size} but the pool has only {len(roles)} players"})
+
+    minimums = {role: bounds.get('min', 0) for role, bounds in role_bounds.items()}
+    total_minimum = sum(minimums.values())
+    if total_minimum > team_size:
+        conflicts.append({'constraints': ["TeamSize"] + [f"{role} count" for role in minimums],
+                          'message': f"role minimums add up to {total_minimum}, more than the team size of {team_size}"})
+
+    overseas_needed, domestic_left = 0, 0
+    for role, minimum in minimums.items():
+        in_role = roles == role
+        available_in_role, domestic = int(in_role.sum()), int((in_role & ~is_overseas).sum())
+        if minimum > role_bounds[role].get('max', np.inf):
+            conflicts.append({'constraints': [f"{role} count"],
+                              'message': f"{role} minimum {minimum} is above its maximum {role_bounds[role]['max']}"})
+        if minimum > available_in_role:
+            conflicts.append({'constraints': [f"{role} count"],
+                              'message': f"needs {minimum} {role}(s) but the pool has {available_in_role}"})
+        overseas_needed += max(0, min(minimum, available_in_role) - domestic)
+        domestic_left += max(0, domestic - minimum)
+
+    unbounded = ~np.isin(roles, list(minimums))
+    domestic_left += int((unbounded & ~is_overseas).sum())
+    overseas_needed += max(0, max(0, team_size - total_minimum) - domestic_left)
+    if overseas_needed > max_overseas:
+        binding = [f"{role} count" for role, minimum in minimums.items()
+                   if minimum > ((roles == role) & ~is_overseas).sum()]
+        conflicts.append({'constraints': ["OverseasLimit"] + (binding or ["TeamSize"]),
+                          'message': f"needs at least {overseas_needed} overseas players but the cap is {max_overseas}"})
+
+    slots = spec.get('batting_slots', {})
+    slot_total = sum(slot['count'] for slot in slots.values())
+    if slot_total > team_size:
+        conflicts.append({'constraints': ["TeamSize", "Batting slots"],
+                          'message': f"{slot_total} batting slots do not fit in a team of {team_size}"})
+    for name, slot in slots.items():
+        eligible = int(np.isin(roles, slot['roles']).sum())
+        if slot['count'] > eligible:
+            conflicts.append({'constraints': [f"Batting slots: {name}"],
+                              'message': f"{name} needs {slot['count']} players but only {eligible} can fill it"})
+
+    if 'bowling' in spec:
+        bowling = {**DEFAULT_BOWLING, **spec['bowling']}
+        needed = int(np.ceil(bowling['overs'] / bowling['max_overs_per_bowler']))
+        eligible = int(np.isin(roles, bowling['roles']).sum())
+        if needed > min(eligible, team_size):
+            conflicts.append({'constraints': ["Bowling overs"],
+                              'message': f"{bowling['overs']} overs need {needed} bowlers but only "
+                                         f"{min(eligible, team_size)} can be picked"})
+
+    if spec.get('captaincy') and team_size < 2:
+        conflicts.append({'constraints': ["Captain", "Vice-captain", "TeamSize"],
+                          'message': "a captain and a vice-captain need a team of at least 2"})
+
+    included = spec.get('must_include', [])
+    if included:
+        included_positions = positions(included, "must_include")
+        if not available[included_positions].all():
+            conflicts.append({'constraints': ["Must include", "Must exclude"],
+                              'message': "a player is both included and excluded"})
+        if len(included_positions) > team_size:
+            conflicts.append({'constraints': ["Must include", "TeamSize"],
+                              'message': f"{len(included_positions)} must-include players exceed the team size of {team_size}"})
+        included_overseas = int(np.asarray(players['is_overseas']).astype(bool)[included_positions].sum())
+        if included_overseas > max_overseas:
+            conflicts.append({'constraints': ["Must include", "OverseasLimit"],
+                              'message': f"{included_overseas} must-include players are overseas; the cap is {max_overseas}"})
+        included_names = {str(name).strip().lower() for name in included}
+        for pair in spec.get('conflicts', []):
+            if all(str(name).strip().lower() in included_names for name in pair):
+                conflicts.append({'constraints': ["Must include", f"Conflict: {' / '.join(map(str, pair))}"],
+                                  'message': "both players of a conflicting pair are must-include"})
+    return conflicts
+
+def _solve_highs(model, time_limit, gap):
+    options = {}
+    if time_limit:
+        options['time_limit'] = float(time_limit)
+    if gap is not None:
+        options['mip_rel_gap'] = float(gap)
+    n = len(model['c'])
+    result = milp(-model['c'], integrality=np.ones(n), bounds=Bounds(0, 1),
+                  constraints=LinearConstraint(model['A'], model['lb'], model['ub']), options=options)
+    if result.status == 2:
+        return "infeasible", None, None
+    if result.x is None:
+        return ("time_limit" if result.status == 1 else "error"), None, None
+    status = "optimal" if result.status == 0 else "feasible"
+    return status, result.x > 0.5, getattr(result, 'mip_gap', None)
+
+
+def _solve_cbc(model, time_limit, gap):
+    prob = pulp.LpProblem("BestXI", pulp.LpMaximize)
+    choices = [pulp.LpVariable(f"select_{i}", cat="Binary") for i in range(len(model['c']))]
+    prob += pulp.LpAffineExpression(zip(choices, model['c']))
+
+    A = model['A']
+    for r in range(A.shape[0]):
+        name = f"row_{r}"
+        start, end = A.indptr[r], A.indptr[r + 1]
+        expr = pulp.LpAffineExpression(zip((choices[j] for j in A.indices[start:end]), A.data[start:end]))
+        lb, ub = model['lb'][r], model['ub'][r]
+        if lb == ub:
+            prob += expr == lb, name
+            continue
+        if np.isfinite(lb):
+            prob += expr >= lb, name if not np.isfinite(ub) else f"{name}_min"
+        if np.isfinite(ub):
+            prob += expr <= ub, name if not np.isfinite(lb) else f"{name}_max"
+
+    prob.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit or None, gapRel=gap))
+    if prob.status == pulp.LpStatusInfeasible:
+        return "infeasible", None, None
+    if prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        return ("time_limit" if time_limit else "error"), None, None
+    status = "optimal" if prob.sol_status == pulp.LpSolutionOptimal else "feasible"
+    return status, np.array([(v.value() or 0) > 0.5 for v in choices]), None
+
+
+def _solve_cpsat(model, time_limit, gap):
+    cp = cp_model.CpModel()
+    n = len(model['c'])
+    choices = [cp.NewBoolVar(f"select_{i}") for i in range(n)]
+    weights = np.rint(model['c'] * CPSAT_OBJECTIVE_SCALE).astype(np.int64)
+    cp.Maximize(cp_model.LinearExpr.WeightedSum(choices, weights.tolist()))
+
+    A = model['A']
+    for r in range(A.shape[0]):
+        start, end = A.indptr[r], A.indptr[r + 1]
+        lb, ub = model['lb'][r], model['ub'][r]
+        row = np.concatenate([A.data[start:end], [bound for bound in (lb, ub) if np.isfinite(bound)]])
+        scale = 1 if np.array_equal(row, np.rint(row)) else CPSAT_ROW_SCALE
+        coefficients = np.rint(A.data[start:end] * scale).astype(np.int64)
+        lb, ub = np.round(lb * scale, 6), np.round(ub * scale, 6)  # no float noise past ceil / floor
+        bound = int(np.abs(coefficients).sum())
+        low = int(np.ceil(lb)) if np.isfinite(lb) else -bound
+        high = int(np.floor(ub)) if np.isfinite(ub) else bound
+        if low > min(high, bound):
+            return "infeasible", None, None
+        cp.AddLinearConstraint(
+            cp_model.LinearExpr.WeightedSum([choices[j] for j in A.indices[start:end]], coefficients.tolist()),
+            low, high
+        )
+
+    solver = cp_model.CpSolver()
+    if time_limit:
+        solver.parameters.max_time_in_seconds = float(time_limit)
+    if gap is not None:
+        solver.parameters.relative_gap_limit = float(gap)
+    status = solver.Solve(cp)
+    if status == cp_model.INFEASIBLE:
+        return "infeasible", None, None
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return ("time_limit" if time_limit else "error"), None, None
+    picked = np.array([solver.Value(v) for v in choices], dtype=bool)
+    objective, bound = solver.ObjectiveValue(), solver.BestObjectiveBound()
+    mip_gap = abs(bound - objective) / max(abs(objective), 1e-9)
+    return ("optimal" if status == cp_model.OPTIMAL else "feasible"), picked, mip_gap
+
+
+BACKENDS = {"HiGHS": _solve_highs, "CBC": _solve_cbc, "CP-SAT": _solve_cpsat}
+
+
+def available_backends():
+    return [name for name in BACKENDS if name != "CP-SAT" or cp_model is not None]
+
+
+def solve_model(model, backend="HiGHS", time_limit=None, gap=None):
+    """Solve a built model; status is optimal, feasible (limit hit), infeasible, time_limit or error."""
+    if backend not in available_backends():
+        raise ValueError(f"Solver backend {backend!r} is not available; choose from {available_backends()}")
+    start = time.perf_counter()
+    status, values, mip_gap = BACKENDS[backend](model, time_limit, gap)
+    seconds = time.perf_counter() - start
+    n, candidates = model['players'], model['candidates']
+    captain = vice_captain = None
+    if values is not None and len(candidates):
+        captain = int(candidates[values[n:n + len(candidates)]][0])
+        vice_captain = int(candidates[values[n + len(candidates):]][0])
+    return {
+        'backend': backend,
+        'status': status,
+        'picked': values[:n] if values is not None else None,
+        'captain': captain,
+        'vice_captain': vice_captain,
+        'objective': float(model['c'][values].sum()) if values is not None else None,
+        'gap': mip_gap,
+        'seconds': seconds,
+        'conflicts': [],
+    }
+
+
+def select_team(players, spec, backend="HiGHS", time_limit=None, gap=None, prune=True):
+    """Pick the best XI under a constraint spec, or explain the conflicting rules.
+
+    With prune, the model is built over prune_pool's candidates only; picked and the
+    captaincy positions still index the full pool, and pool_size / candidates report
+    the reduction.
+    """
+    pool_size = len(players['player_name'])
+    conflicts = diagnose_infeasibility(players, spec)
+    if conflicts:
+        return {'backend': backend, 'status': "infeasible", 'picked': None, 'captain': None,
+                'vice_captain': None, 'objective': None, 'gap': None, 'seconds': 0.0, 'conflicts': conflicts,
+                'pool_size': pool_size, 'candidates': pool_size}
+    kept, candidates, model_spec = prune_pool(players, spec) if prune else (np.arange(pool_size), players, spec)
+    model = build_team_model(candidates, model_spec)
+    result = solve_model(model, backend, time_limit, gap)
+    result.update(pool_size=pool_size, candidates=len(kept))
+    if result['picked'] is not None:
+        picked = np.zeros(pool_size, dtype=bool)
+        picked[kept[result['picked']]] = True
+        result['picked'] = picked
+        for role in ('captain', 'vice_captain'):
+            if result[role] is not None:
+                result[role] = int(kept[result[role]])
+    if result['status'] == "infeasible":
+        # The counting checks found no single culprit; name the spec's rules, not the per-candidate
+        # captaincy links they compile to
+        rules = [name for name in model['names'][1:] if not name.startswith("Captaincy of ")]
+        result['conflicts'] = [{'constraints': rules,
+                                'message': "no single conflicting rule found, but these cannot all hold "
+                                           "together (proved by the solver)"}]
+    return result
+
+
+def scenario_grid(ranges):
+    """Every combination of {grid field: values} as a list of scenario dicts."""
+    unknown = set(ranges) - set(GRID_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown scenario field(s): {', '.join(sorted(map(str, unknown)))}")
+    fields = list(ranges)
+    return [dict(zip(fields, values)) for values in product(*(ranges[field] for field in fields))]
+
+
+def scenario_bounds(model, scenarios):
+    """(scenarios, rows) lb / ub arrays: the model's row bounds with each scenario's fields applied."""
+    rows = {name: r for r, name in enumerate(model['names'])}
+    lb, ub = np.tile(model['lb'], (len(scenarios), 1)), np.tile(model['ub'], (len(scenarios), 1))
+    for field in {field for scenario in scenarios for field in scenario}:
+        row, bound = GRID_FIELDS[field]
+        given = np.array([field in scenario for scenario in scenarios])
+        values = np.array([scenario.get(field, 0) for scenario in scenarios], dtype=float)[given]
+        if bound in ("lb", "both"):
+            lb[given, rows[row]] = values
+        if bound in ("ub", "both"):
+            ub[given, rows[row]] = values
+    return lb, ub
+
+
+_scenario_worker = {}  # per-process compiled model and solver settings, set once by the pool initializer
+
+
+def _init_scenario_worker(model, backend, time_limit, gap):
+    _scenario_worker.update(model=model, solver=(backend, time_limit, gap))
+
+
+def _solve_scenario(bounds):
+    """Solve the shared model under one scenario's row bounds; only the bounds cross the process boundary."""
+    model = {**_scenario_worker['model'], 'lb': bounds[0], 'ub': bounds[1]}
+    result = solve_model(model, *_scenario_worker['solver'])
+    picked = np.flatnonzero(result['picked']) if result['picked'] is not None else None
+    return result['status'], result['objective'], picked, result['captain'], result['vice_captain'], result['seconds']
+
+
+def solve_scenarios(players, spec, scenarios, backend="HiGHS", time_limit=None, gap=None, workers=None):
+    """Solve the spec under every scenario of a grid (see scenario_grid) across a process pool.
+
+    The pool is pruned for the largest team size and compiled once; each worker gets that
+    model through the pool initializer, and a scenario only changes row bounds. Returns one
+    dict per scenario with its fields plus status, objective, picked (pool positions),
+    captain, vice_captain and seconds.
+    """
+    grid_roles = {GRID_FIELDS[field][0].removesuffix(" count") for scenario in scenarios for field in scenario
+                  if GRID_FIELDS[field][1] == "lb"}
+    spec = {**spec, 'roles': {**{role: {} for role in grid_roles}, **spec.get('roles', {})}}
+    team_size = max([scenario.get('team_size', spec['team_size']) for scenario in scenarios] + [spec['team_size']])
+    kept, candidates, model_spec = prune_pool(players, {**spec, 'team_size': team_size})
+    model = build_team_model(candidates, model_spec)
+    lb, ub = scenario_bounds(model, scenarios)
+    tasks = list(zip(lb, ub))
+
+    workers = min(workers or cpu_count(), len(tasks))
+    if workers <= 1:
+        _init_scenario_worker(model, backend, time_limit, gap)
+        solved = list(map(_solve_scenario, tasks))
+    else:
+        with Pool(workers, initializer=_init_scenario_worker, initargs=(model, backend, time_limit, gap)) as pool:
+            solved = pool.map(_solve_scenario, tasks, chunksize=max(1, len(tasks) // (4 * workers)))
+
+    results = []
+    for scenario, (status, objective, picked, captain, vice_captain, seconds) in zip(scenarios, solved):
+        results.append({
+            **scenario,
+            'status': status,
+            'objective': objective,
+            'picked': kept[picked] if picked is not None else None,
+            'captain': int(kept[captain]) if captain is not None else None,
+            'vice_captain': int(kept[vice_captain]) if vice_captain is not None else None,
+            'seconds': seconds,
+        })
+    return results
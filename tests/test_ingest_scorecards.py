@@ -0,0 +1,163 @@
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+
+from ingest_scorecards import (AGGREGATE_COLUMNS, FORM_HALF_LIFE_DAYS, FORM_WINDOW, FORM_YEAR_DAYS, ingest,
+                               load_aggregates, summarize_match)
+
+
+def ball(batter, bowler, non_striker, runs=0, extras=None, wicket=None):
+    delivery = {'batter': batter, 'bowler': bowler, 'non_striker': non_striker,
+                'runs': {'batter': runs, 'extras': sum((extras or {}).values()),
+                         'total': runs + sum((extras or {}).values())}}
+    if extras:
+        delivery['extras'] = extras
+    if wicket:
+        delivery['wickets'] = [wicket]
+    return delivery
+
+
+def scorecard(day, players, people, innings):
+    return {'meta': {}, 'info': {'match_type': 'T20', 'dates': [day], 'teams': list(players), 'players': players,
+                                 'registry': {'people': people}},
+            'innings': [{'team': team, 'overs': [{'over': 0, 'deliveries': balls}]} for team, balls in innings]}
+
+
+SQUADS = {'India': ['V Kohli', 'RG Sharma', 'JJ Bumrah', 'RR Pant'],
+          'Australia': ['DA Warner', 'TM Head', 'PJ Cummins']}
+PEOPLE = {name: f"id-{name.replace(' ', '').lower()}" for names in SQUADS.values() for name in names}
+FIXTURE = scorecard('2024-05-01', SQUADS, PEOPLE, [
+    ('India', [
+        ball('V Kohli', 'PJ Cummins', 'RG Sharma', 4),
+        ball('V Kohli', 'PJ Cummins', 'RG Sharma', extras={'wides': 1}),
+        ball('V Kohli', 'PJ Cummins', 'RG Sharma', 1, extras={'noballs': 1}),
+        ball('RG Sharma', 'PJ Cummins', 'V Kohli', extras={'legbyes': 1}),
+        ball('V Kohli', 'PJ Cummins', 'RG Sharma'),
+        ball('V Kohli', 'PJ Cummins', 'RG Sharma', wicket={'player_out': 'V Kohli', 'kind': 'bowled'}),
+    ]),
+    ('Australia', [
+        ball('DA Warner', 'JJ Bumrah', 'TM Head', 6),
+        ball('DA Warner', 'JJ Bumrah', 'TM Head',
+             wicket={'player_out': 'DA Warner', 'kind': 'stumped', 'fielders': [{'name': 'RR Pant'}]}),
+    ]),
+])
+
+
+def write(path, match):
+    path.write_text(json.dumps(match))
+    return str(path)
+
+
+def counts(summary, name):
+    return dict(zip(AGGREGATE_COLUMNS, summary[name][2:]))
+
+
+def test_counting_conventions(tmp_path):
+    _, fmt, _, summary = summarize_match((write(tmp_path / "1.json", FIXTURE), None))
+    assert fmt == 'T20'
+    kohli = counts(summary, 'V Kohli')
+    # The wide is not a ball faced; the no-ball is, and its run goes to the batter
+    assert (kohli['balls_faced'], kohli['runs_scored'], kohli['fours'], kohli['innings_batted']) == (4, 5, 1, 1)
+    # Batting means striker or non-striker in the innings, even without facing
+    assert counts(summary, 'TM Head')['innings_batted'] == 1
+    assert counts(summary, 'TM Head')['balls_faced'] == 0
+    assert counts(summary, 'JJ Bumrah')['innings_batted'] == 0
+    cummins = counts(summary, 'PJ Cummins')
+    # Wides and no-balls are not balls bowled; a leg bye concedes nothing, so it is a dot
+    assert (cummins['balls_bowled'], cummins['runs_conceded'], cummins['dot_balls']) == (4, 7, 3)
+    assert cummins['wickets'] == 1
+    bumrah = counts(summary, 'JJ Bumrah')
+    assert (bumrah['wickets'], bumrah['dot_balls'], bumrah['runs_conceded']) == (1, 1, 6)
+    assert counts(summary, 'RR Pant')['stumpings'] == 1
+    assert all(counts(summary, name)['matches'] == 1 for name in summary)
+    assert summary['V Kohli'][:2] == ('id-vkohli', 'India')
+
+
+def test_players_are_keyed_by_registry_id(tmp_path):
+    # Match 2: Warner's name is spelled differently under the same id, and a second
+    # "TM Head" with another id plays for the other side
+    squads = {'India': ['V Kohli', 'TM Head'], 'Australia': ['David Warner', 'PJ Cummins']}
+    people = {'V Kohli': 'id-vkohli', 'TM Head': 'id-other-head', 'David Warner': 'id-dawarner',
+              'PJ Cummins': 'id-pjcummins'}
+    second = scorecard('2024-06-01', squads, people, [('India', [ball('V Kohli', 'PJ Cummins', 'TM Head')])])
+    write(tmp_path / "1.json", FIXTURE)
+    write(tmp_path / "2.json", second)
+    ingest([str(tmp_path)], str(tmp_path / "cards.db"), workers=1)
+    players = load_aggregates(str(tmp_path / "cards.db"), 'T20').set_index('player_name')
+    assert (players.index == 'TM Head').sum() == 2
+    assert 'DA Warner' not in players.index
+    assert players.loc['David Warner', 'runs_scored'] == 6
+    assert players.loc['V Kohli', 'balls_faced'] == 5
+
+
+@pytest.mark.parametrize("order", [("1", "2"), ("2", "1")])
+def test_overseas_follows_each_match_team(tmp_path, order):
+    # Kohli also plays for a franchise and stays domestic whichever match is flushed last
+    franchise = scorecard('2024-06-01', {'Royal Challengers': ['V Kohli', 'DA Warner'], 'Super Kings': ['MS Dhoni']},
+                          {'V Kohli': 'id-vkohli', 'DA Warner': 'id-dawarner', 'MS Dhoni': 'id-msdhoni'},
+                          [('Royal Challengers', [ball('V Kohli', 'MS Dhoni', 'DA Warner')])])
+    for name, match in zip(order, (FIXTURE, franchise)):
+        write(tmp_path / f"{name}.json", match)
+        ingest([str(tmp_path / f"{name}.json")], str(tmp_path / "cards.db"), workers=1)
+    players = load_aggregates(str(tmp_path / "cards.db"), 'T20', home_team='India').set_index('player_name')
+    assert players.loc['V Kohli', 'is_overseas'] == 0
+    assert players.loc['DA Warner', 'is_overseas'] == 1
+    assert players.loc['MS Dhoni', 'is_overseas'] == 1
+
+
+def test_files_without_a_registry_key_players_by_resolved_name(tmp_path):
+    legacy = [scorecard(day, {'Bangladesh': [name], 'India': ['V Kohli']}, {},
+                        [('India', [ball('V Kohli', name, 'V Kohli')])])
+              for day, name in (('2024-01-01', 'Ebadot Hossain'), ('2024-02-01', 'Ebadat Hossain'))]
+    for number, match in enumerate(legacy):
+        del match['info']['registry']
+        write(tmp_path / f"{number}.json", match)
+    ingest([str(tmp_path)], str(tmp_path / "cards.db"), workers=1)
+    players = load_aggregates(str(tmp_path / "cards.db"), 'T20')
+    assert players['player_name'].str.startswith('Ebad').sum() == 1
+    assert players.loc[players['player_name'].str.startswith('Ebad'), 'balls_bowled'].item() == 2
+
+
+def test_form_views_match_a_brute_force_recomputation(tmp_path):
+    rng = np.random.default_rng(46)
+    days = sorted(rng.choice(np.arange(date(2021, 1, 1).toordinal(), date(2022, 12, 31).toordinal()), 12,
+                             replace=False)) + \
+        sorted(rng.choice(np.arange(date(2023, 1, 1).toordinal(), date(2023, 5, 1).toordinal()), 4, replace=False)) + \
+        [date(2024, 6, 1).toordinal() - FORM_YEAR_DAYS + offset for offset in (-1, 0, 1, 2, 100, 200, 300)] + \
+        [date(2024, 6, 1).toordinal()]  # matches on both sides of the year view's edge
+    squads = {'India': ['V Kohli', 'RG Sharma'], 'Australia': ['PJ Cummins']}
+    people = {name: f"id-{name}" for names in squads.values() for name in names}
+    files = []
+    for number, day in enumerate(days):
+        # Sharma stops playing halfway, so the year view drops them while the window keeps their last matches
+        batters = ['V Kohli', 'RG Sharma'] if number < len(days) // 2 else ['V Kohli', 'V Kohli']
+        balls = [ball(batters[0], 'PJ Cummins', batters[1], int(runs)) for runs in rng.integers(0, 7, 3)]
+        match = scorecard(date.fromordinal(int(day)).isoformat(), squads, people, [('India', balls)])
+        files.append(write(tmp_path / f"{number}.json", match))
+    for batch in np.array_split(rng.permutation(files), 3):  # out of date order, across flushes
+        ingest(list(batch), str(tmp_path / "cards.db"), workers=1)
+
+    played = {}
+    for path in files:
+        _, _, day, summary = summarize_match((path, None))
+        for name, (_, _, *stats) in summary.items():
+            played.setdefault(name, []).append((day, np.array(stats, dtype=float)))
+    latest = max(days)
+    expected = {
+        'career': lambda rows: sum(stats for _, stats in rows),
+        'decayed': lambda rows: sum(stats * 2.0 ** ((day - latest) / FORM_HALF_LIFE_DAYS) for day, stats in rows),
+        'window': lambda rows: sum(stats for _, stats in sorted(rows, key=lambda row: row[0])[-FORM_WINDOW:]),
+        'year': lambda rows: sum((stats for day, stats in rows if day > latest - FORM_YEAR_DAYS),
+                                 np.zeros(len(AGGREGATE_COLUMNS))),
+    }
+    columns = ['innings_batted', 'runs_scored', 'balls_faced', 'balls_bowled', 'runs_conceded', 'dot_balls']
+    for form, recompute in expected.items():
+        players = load_aggregates(str(tmp_path / "cards.db"), 'T20', form=form).set_index('player_name')
+        for name, rows in played.items():
+            want = dict(zip(AGGREGATE_COLUMNS, recompute(rows)))
+            for column in columns:
+                assert players.loc[name, column] == pytest.approx(want[column]), (form, name, column)
+    recent = load_aggregates(str(tmp_path / "cards.db"), 'T20', form='year').set_index('player_name')
+    assert recent.loc['RG Sharma', 'innings_batted'] == 0
@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from match_simulator import score_summary, simulate_match
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def bundled_xis(path):
+    pool = pd.DataFrame(json.loads((ROOT / path).read_text()))
+    ranked = pool.iloc[np.argsort(-(pool['balls_faced'] + pool['balls_bowled']).to_numpy(), kind='stable')]
+    return ranked.iloc[0:22:2], ranked.iloc[1:22:2]
+
+
+@pytest.mark.parametrize("path", ["test_output.json", "ODI_output.json"])
+def test_win_probabilities_sum_to_one_and_ties_split(path):
+    team_a, team_b = bundled_xis(path)
+    for a, b in ((team_a, team_b), (team_a, team_a)):  # identical sides tie often
+        result = simulate_match(a, b, simulations=5_000, seed=50)
+        win, share = result['win_probability'], result['win_share']
+        assert win['team_a'] + win['team_b'] + win['tie'] == pytest.approx(1.0)
+        assert share['team_a'] == pytest.approx(win['team_a'] + win['tie'] / 2)
+        assert share['team_b'] == pytest.approx(win['team_b'] + win['tie'] / 2)
+        assert share['team_a'] + share['team_b'] == pytest.approx(1.0)
+        runs_a, runs_b = result['runs']['team_a'], result['runs']['team_b']
+        assert win['tie'] == np.mean(runs_a == runs_b) and win['team_a'] == np.mean(runs_a > runs_b)
+        assert list(score_summary(result)['win share']) == [share['team_a'], share['team_b']]
+    assert win['tie'] > 0
+
+
+def test_a_fixed_seed_repeats_the_simulation():
+    team_a, team_b = bundled_xis("test_output.json")
+    first, second = (simulate_match(team_a, team_b, simulations=2_000, seed=7) for _ in range(2))
+    assert first['win_probability'] == second['win_probability']
+    assert np.array_equal(first['runs']['team_a'], second['runs']['team_a'])
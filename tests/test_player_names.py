@@ -0,0 +1,34 @@
+from player_names import build_player_index, initials_matches, register_player, resolve_player
+
+
+def test_initials_resolve_to_the_only_matching_full_name():
+    index = build_player_index(["Shai Hope", "SD Hope"], overseas=[1, 1])
+    assert resolve_player(index, "SD Hope", 1) == "shai hope"
+
+
+def test_initials_do_not_merge_into_a_different_country_player():
+    # "Sam Hope" cannot vouch for the D, so SD Hope needs a matching country too
+    index = build_player_index(["Sam Hope", "SD Hope"], overseas=[0, 1])
+    assert resolve_player(index, "SD Hope", 1) == "sd hope"
+    assert resolve_player(index, "SD Hope") == "sd hope"
+
+
+def test_conflicting_middle_initial_never_merges():
+    index = build_player_index(["Shai Diego Hope", "SJ Hope"], overseas=[1, 1])
+    assert resolve_player(index, "SJ Hope", 1) == "sj hope"
+
+
+def test_full_initials_agreement_needs_no_country():
+    index = build_player_index(["Aiden Markram"])
+    assert resolve_player(index, "A Markram") == "aiden markram"
+
+
+def test_initials_matches_finds_rows_a_new_registration_links():
+    index = build_player_index(["SD Hope", "SJ Hope", "V Kohli"], overseas=[1, 0, 0])
+    register_player(index, "Shai Hope", 1)
+    assert initials_matches(index, "Shai Hope") == {"sd hope": "shai hope"}
+    # A flag change registered for an existing initials name links it to a full name
+    register_player(index, "Virat Kohli", 1)
+    assert initials_matches(index, "V Kohli") == {}
+    register_player(index, "V Kohli", 1)
+    assert initials_matches(index, "V Kohli") == {"v kohli": "virat kohli"}
@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from price_models import RAW_PLAYER_FIELDS, engineer_features_batch, impact_breakdown_batch, predict_with_contributions
+
+ROOT = Path(__file__).resolve().parent.parent
+ROLES = ['batsman', 'bowler', 'batting-allrounder', 'bowling-allrounder', 'wk-batsman', 'allrounder']
+
+
+def random_players(rng, n):
+    """Raw player fields with zeros and the tier / age edges mixed in."""
+    def values(high, edges=()):
+        drawn = rng.uniform(0, high, n).round(int(rng.integers(0, 3)))
+        return np.where(rng.random(n) < 0.25, rng.choice([0, *edges], n), drawn)
+    return pd.DataFrame({
+        'country': rng.choice(['India', 'england', 'Australia', 'South Africa', 'New Zealand', 'Afghanistan'], n),
+        'age': values(40, (24, 25, 32, 33)),
+        'role': rng.choice(ROLES, n),
+        'ipl_matches': values(250, (20, 21, 50, 51)),
+        'ipl_runs': values(5000, (50, 51, 2000, 2001)),
+        'ipl_avg': values(50),
+        'ipl_sr': values(190, (150,)),
+        'ipl_sixes': values(150, (50,)),
+        'ipl_wickets': values(180, (5, 6, 100, 101)),
+        'ipl_economy': values(11, (7.5,)),
+        'ipl_bowl_sr': values(30),
+        't20_matches': values(120, (50, 51)),
+        't20_runs': values(3500),
+        't20_avg': values(50),
+        't20_sr': values(180, (140,)),
+        't20_wickets': values(120, (20,)),
+        't20_economy': values(10),
+        't20_bowl_sr': values(30),
+    })[RAW_PLAYER_FIELDS]
+
+
+# The per-player feature code the batch path replaced, kept as the reference
+def batting_impact(runs, sr, avg, weight=1.0):
+    return (runs ** 0.7) * ((sr if sr > 0 else 100) / 130) * ((avg if avg > 0 else 15) / 25) * weight
+
+
+def bowling_impact(wickets, econ, sr, weight=1.0):
+    return (wickets ** 0.7) * (8 / (econ if econ > 0 else 8.5)) * (20 / (sr if sr > 0 else 20)) * weight
+
+
+def scalar_features(p):
+    country = p['country'].lower()
+    nationality = 1.0 if country == 'india' else 0.8 if country in [
+        'england', 'australia', 'south africa', 'new zealand'] else 0.6
+    tier = 0 if p['ipl_matches'] == 0 else 1 if p['ipl_matches'] <= 20 else 2 if p['ipl_matches'] <= 50 else 3
+    uncapped = 1 if p['ipl_runs'] == 0 and p['ipl_wickets'] == 0 else 0
+    if p['ipl_runs'] > 0:
+        bat = batting_impact(p['ipl_runs'], p['ipl_sr'], p['ipl_avg'])
+    elif p['t20_runs'] > 0:
+        bat = batting_impact(p['t20_runs'], p['t20_sr'], p['t20_avg'], 0.6)
+    else:
+        bat = 0.0
+    if p['ipl_wickets'] > 0:
+        bowl = bowling_impact(p['ipl_wickets'], p['ipl_economy'], p['ipl_bowl_sr'])
+    elif p['t20_wickets'] > 0:
+        bowl = bowling_impact(p['t20_wickets'], p['t20_economy'], p['t20_bowl_sr'], 0.6)
+    else:
+        bowl = 0.0
+    if p['ipl_runs'] > 50:
+        consistency = (p['ipl_avg'] if p['ipl_avg'] > 0 else 15) / ((p['ipl_sr'] if p['ipl_sr'] > 0 else 100) / 100)
+    elif p['ipl_wickets'] > 5:
+        consistency = 1 / ((p['ipl_economy'] if p['ipl_economy'] > 0 else 8.5)
+                           * (p['ipl_bowl_sr'] if p['ipl_bowl_sr'] > 0 else 20) / 100)
+    else:
+        consistency = 0.0
+    specialization = {'batsman': bat * 1.2, 'bowler': bowl * 1.2, 'batting-allrounder': bat * 0.7 + bowl * 0.3,
+                      'bowling-allrounder': bat * 0.3 + bowl * 0.7, 'wk-batsman': bat * 1.1 + 10}
+    bracket = 'young_prospect' if p['age'] < 25 else 'prime' if p['age'] <= 32 else 'veteran'
+    return [
+        nationality, 0.2, tier, np.log1p(p['t20_matches']), uncapped, bat, bowl, consistency,
+        specialization.get(p['role'], bat + bowl), bat + bowl,
+        1 if p['ipl_runs'] > 2000 or p['ipl_wickets'] > 100 or p['t20_matches'] > 50 else 0,
+        1 if p['ipl_sr'] > 150 or p['ipl_sixes'] > 50 or 0 < p['ipl_economy'] < 7.5 else 0,
+        1 if p['ipl_matches'] > 20 else 0,
+        1 if uncapped and p['age'] < 25 and (p['t20_sr'] > 140 or p['t20_wickets'] > 20) else 0,
+        bracket == 'prime', bracket == 'veteran', bracket == 'young_prospect',
+    ]
+
+
+def scalar_breakdown(p):
+    return [batting_impact(p['ipl_runs'], p['ipl_sr'], p['ipl_avg']) if p['ipl_runs'] > 0 else 0.0,
+            batting_impact(p['t20_runs'], p['t20_sr'], p['t20_avg'], 0.6) if p['t20_runs'] > 0 else 0.0,
+            bowling_impact(p['ipl_wickets'], p['ipl_economy'], p['ipl_bowl_sr']) if p['ipl_wickets'] > 0 else 0.0,
+            bowling_impact(p['t20_wickets'], p['t20_economy'], p['t20_bowl_sr'], 0.6) if p['t20_wickets'] > 0
+            else 0.0]
+
+
+def test_batch_features_match_the_per_player_path():
+    players = random_players(np.random.default_rng(33), 3000)
+    records = players.to_dict('records')
+    expected = np.array([scalar_features(p) for p in records], dtype=np.float64)
+    np.testing.assert_allclose(engineer_features_batch(players), expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(impact_breakdown_batch(players), [scalar_breakdown(p) for p in records],
+                               rtol=1e-12, atol=1e-12)
+    # One row at a time, as the Price Predictor form calls it
+    for p in records[:50]:
+        np.testing.assert_allclose(engineer_features_batch(pd.DataFrame([p]))[0], scalar_features(p), rtol=1e-12)
+
+
+def test_contributions_sum_to_the_bundled_model_prediction():
+    model = joblib.load(ROOT / 'ipl_price_model.pkl')
+    feature_columns = joblib.load(ROOT / 'feature_columns.pkl')
+    X = engineer_features_batch(random_players(np.random.default_rng(34), 500))
+    log_prices, contributions, intercept = predict_with_contributions(model, X)
+    expected = model.predict(pd.DataFrame(X, columns=feature_columns))
+    np.testing.assert_allclose(log_prices, expected, rtol=1e-12)
+    np.testing.assert_allclose(contributions.sum(axis=1) + intercept, expected, rtol=1e-12)
+    assert log_prices[0] == pytest.approx(predict_with_contributions(model, X[0])[0][0])
@@ -0,0 +1,183 @@
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+import pulp
+import pytest
+
+from team_solver import (GRID_FIELDS, ROLES, available_backends, build_team_model, scenario_grid, select_team,
+                         solve_scenarios)
+
+
+def random_pool(rng, n):
+    return pd.DataFrame({
+        'player_name': [f"Player {i}" for i in range(n)],
+        'role': rng.choice(ROLES, n),
+        'is_overseas': rng.integers(0, 2, n),
+        'impact': rng.uniform(1, 100, n).round(2),
+    })
+
+
+def random_slots(rng):
+    return {f"slot_{s}": {'count': int(rng.integers(1, 3)),
+                          'roles': list(rng.choice(ROLES, int(rng.integers(1, 3)), replace=False))}
+            for s in range(int(rng.integers(1, 5)))}
+
+
+def random_spec(rng, pool):
+    names = list(rng.permutation(pool['player_name']))
+    spec = {'team_size': int(rng.integers(5, 12)), 'max_overseas': int(rng.integers(1, 5)),
+            'roles': {role: {'min': int(rng.integers(0, 3))} for role in rng.choice(ROLES, 2, replace=False)}}
+    if rng.random() < 0.3:
+        spec['roles'][str(rng.choice(ROLES))] = {'max': int(rng.integers(1, 4))}
+    if rng.random() < 0.3:
+        spec['batting_slots'] = random_slots(rng)
+    if rng.random() < 0.3:
+        spec['bowling'] = {'overs': int(rng.integers(8, 21)), 'max_overs_per_bowler': 4}
+    if rng.random() < 0.4:
+        spec['must_include'] = names[:int(rng.integers(1, 3))]
+    if rng.random() < 0.4:
+        spec['must_exclude'] = names[3:5]
+    if rng.random() < 0.4:
+        spec['conflicts'] = [names[5:7], [names[0], names[7]]]
+    if rng.random() < 0.6:
+        spec['captaincy'] = {'captain': 2.0, 'vice_captain': 1.5}
+    return spec
+
+
+def reference_objective(pool, spec):
+    """The spec written straight into PuLP over the whole pool; None when infeasible."""
+    prob = pulp.LpProblem("reference", pulp.LpMaximize)
+    players = range(len(pool))
+    pick = [pulp.LpVariable(f"pick_{i}", cat="Binary") for i in players]
+    roles, impact = pool['role'].tolist(), pool['impact'].tolist()
+    position = {name.lower(): i for i, name in enumerate(pool['player_name'])}
+    objective = pulp.lpSum(impact[i] * pick[i] for i in players)
+
+    prob += pulp.lpSum(pick) == spec['team_size']
+    prob += pulp.lpSum(pick[i] for i in players if pool['is_overseas'].iloc[i]) <= spec['max_overseas']
+    for role, bounds in spec.get('roles', {}).items():
+        count = pulp.lpSum(pick[i] for i in players if roles[i] == role)
+        prob += count >= bounds.get('min', 0)
+        if 'max' in bounds:
+            prob += count <= bounds['max']
+    seats = {}
+    for name, slot in spec.get('batting_slots', {}).items():
+        for i in players:
+            if roles[i] in slot['roles']:
+                seats[i, name] = pulp.LpVariable(f"seat_{i}_{name}", cat="Binary")
+        prob += pulp.lpSum(var for (i, slot_name), var in seats.items() if slot_name == name) >= slot['count']
+    for i in players:
+        prob += pulp.lpSum(var for (j, _), var in seats.items() if j == i) <= pick[i]
+    if 'bowling' in spec:
+        bowling = spec['bowling']
+        prob += pulp.lpSum(bowling['max_overs_per_bowler'] * pick[i] for i in players
+                           if roles[i] in ("Bowler", "All-Rounder")) >= bowling['overs']
+    for name in spec.get('must_include', []):
+        prob += pick[position[name.lower()]] == 1
+    for name in spec.get('must_exclude', []):
+        prob += pick[position[name.lower()]] == 0
+    for a, b in spec.get('conflicts', []):
+        prob += pick[position[a.lower()]] + pick[position[b.lower()]] <= 1
+    if spec.get('captaincy'):
+        captain = [pulp.LpVariable(f"captain_{i}", cat="Binary") for i in players]
+        vice = [pulp.LpVariable(f"vice_{i}", cat="Binary") for i in players]
+        prob += pulp.lpSum(captain) == 1
+        prob += pulp.lpSum(vice) == 1
+        for i in players:
+            prob += captain[i] + vice[i] <= pick[i]
+        objective += pulp.lpSum((spec['captaincy']['captain'] - 1) * impact[i] * captain[i]
+                                + (spec['captaincy']['vice_captain'] - 1) * impact[i] * vice[i] for i in players)
+    prob += objective
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    return pulp.value(prob.objective) if prob.status == pulp.LpStatusOptimal else None
+
+
+def slots_fillable(roles, slots):
+    """Brute force: some distinct picked players sit in every batting seat their role allows."""
+    seats = [slot['roles'] for slot in slots.values() for _ in range(slot['count'])]
+    return any(all(roles[player] in eligible for player, eligible in zip(order, seats))
+               for order in permutations(range(len(roles)), len(seats)))
+
+
+def test_batting_slot_rows_match_a_brute_force_assignment():
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        pool = random_pool(rng, int(rng.integers(3, 8)))
+        slots = random_slots(rng)
+        model = build_team_model(pool, {'team_size': 1, 'max_overseas': 1, 'batting_slots': slots})
+        rows = [r for r, name in enumerate(model['names']) if name.startswith("Batting slots")]
+        picked = rng.integers(0, 2, len(pool)).astype(bool)
+        satisfied = bool((model['A'][rows] @ picked >= model['lb'][rows]).all())
+        assert satisfied == slots_fillable(pool['role'].to_numpy()[picked], slots), slots
+
+
+@pytest.mark.skipif("CP-SAT" not in available_backends(), reason="OR-Tools is not installed")
+def test_cpsat_keeps_fractional_row_coefficients():
+    pool = random_pool(np.random.default_rng(3), 60)
+    # 13 overs at 1.3 per bowler needs 10 bowlers; rounded to 1 per bowler it would need 13
+    spec = {'team_size': 11, 'max_overseas': 4, 'bowling': {'overs': 13, 'max_overs_per_bowler': 1.3}}
+    highs, cpsat = select_team(pool, spec), select_team(pool, spec, backend="CP-SAT")
+    assert cpsat['status'] == highs['status'] == "optimal"
+    assert cpsat['objective'] == pytest.approx(highs['objective'])
+
+
+def test_solver_proved_infeasibility_names_rules_not_captaincy_links():
+    pool = random_pool(np.random.default_rng(5), 40)
+    spec = {'team_size': 11, 'max_overseas': 4, 'captaincy': {'captain': 2.0, 'vice_captain': 1.5},
+            'roles': {'Wicketkeeper': {'max': 1}},
+            'batting_slots': {'keepers': {'count': 2, 'roles': ['Wicketkeeper']}}}
+    result = select_team(pool, spec)
+    assert result['status'] == "infeasible"
+    [conflict] = result['conflicts']
+    assert "Batting slots: keepers" in conflict['constraints']
+    assert not any(name.startswith("Captaincy of") for name in conflict['constraints'])
+
+
+def test_pruned_and_unpruned_solves_match_a_plain_pulp_reference():
+    rng = np.random.default_rng(11)
+    for _ in range(40):
+        pool = random_pool(rng, int(rng.integers(40, 120)))
+        # Ties in impact make pruning choose between equal players, and a strong bucket fills
+        # most of the XI so its team_size cut-off matters
+        strong = (pool['role'] == rng.choice(ROLES)) & (pool['is_overseas'] == 0)
+        pool['impact'] = (pool['impact'] + 100 * strong).round(-1)
+        spec = random_spec(rng, pool)
+        expected = reference_objective(pool, spec)
+        for prune in (True, False):
+            result = select_team(pool, spec, prune=prune)
+            if expected is None:
+                assert result['status'] == "infeasible", spec
+            else:
+                assert result['status'] == "optimal", spec
+                assert result['objective'] == pytest.approx(expected), (prune, spec)
+
+
+def scenario_spec(spec, scenario):
+    """The spec a scenario describes, written out as ordinary rules."""
+    spec = {**spec, 'roles': {role: dict(bounds) for role, bounds in spec.get('roles', {}).items()}}
+    for field, value in scenario.items():
+        row, _ = GRID_FIELDS[field]
+        if field in ('team_size', 'max_overseas'):
+            spec[field] = value
+        else:
+            spec['roles'].setdefault(row.removesuffix(" count"), {})['min'] = value
+    return spec
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_scenario_grid_cells_match_select_team(workers):
+    pool = random_pool(np.random.default_rng(17), 80)
+    spec = {'team_size': 11, 'max_overseas': 4, 'roles': {'Bowler': {'min': 2, 'max': 5}},
+            'must_exclude': ['Player 3'], 'captaincy': {'captain': 2.0, 'vice_captain': 1.5}}
+    scenarios = scenario_grid({'team_size': [9, 11, 13], 'max_overseas': [0, 2, 4],
+                               'min_wk': [1, 4], 'min_bowlers': [3, 6]})
+    results = solve_scenarios(pool, spec, scenarios, workers=workers)
+    assert len(results) == len(scenarios)
+    for scenario, result in zip(scenarios, results):
+        expected = select_team(pool, scenario_spec(spec, scenario))
+        assert result['status'] == expected['status'], scenario
+        if expected['status'] == "optimal":
+            assert result['objective'] == pytest.approx(expected['objective']), scenario
+            assert set(result['picked']) == set(np.flatnonzero(expected['picked'])), scenario
+            assert (result['captain'], result['vice_captain']) == (expected['captain'], expected['vice_captain'])
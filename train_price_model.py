@@ -0,0 +1,249 @@
+"""Rebuild the price model from a player/price CSV.
+
+    python train_price_model.py players.csv --price-column price --folds 5 --jobs -1
+
+The CSV needs the 18 raw predictor fields (see price_models.RAW_PLAYER_FIELDS)
+plus a price column in crore; if it also has every price_models.FORM_FIELDS column,
+form_momentum is trained on recent form instead of career impact, and feature_columns.pkl names it
+recent_form_momentum so the app sends form inputs only to such a model. Features go through the same vectorized
+engineer_features_batch the app uses, and the target is log1p(price), as in
+ipl_price_model.pkl. Ridge, LightGBM and XGBoost candidates are cross-validated
+in parallel (one joblib task per candidate and fold), the best mean RMSE is
+refit on all rows, and the run is written to artifacts/<version>/:
+
+    price_model.pkl             # the refit winner
+    price_model_intervals.pkl   # conformal calibration from the winner's out-of-fold residuals
+    feature_columns.pkl         # column order of the feature matrix
+    metadata.json               # data hash, library versions, CV scores and fold timings
+
+--promote also copies the winner to ipl_price_model.pkl (+ _intervals.pkl) and
+feature_columns.pkl in the project root, which is what the app loads. The app's contribution breakdown
+needs coef_, so restrict the search with --models Ridge when promoting.
+
+An already trained model, such as the bundled ipl_price_model.pkl or the XGBoost
+pipeline best_price_model.pkl, is calibrated on its own from a priced hold-out CSV
+it was never fit on:
+
+    python train_price_model.py holdout.csv --calibrate best_price_model.pkl
+
+This writes <model>_intervals.pkl from the model's residuals in its own log space.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import joblib
+import lightgbm
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost
+from joblib import Parallel, delayed
+from sklearn.linear_model import Ridge
+from sklearn.model_selection import KFold
+
+from price_models import (FEATURE_COLUMNS, FORM_FEATURE_COLUMNS, FORM_FIELDS, INTERVAL_LEVELS, RAW_PLAYER_FIELDS,
+                          RUPEES_PER_CRORE, conformal_calibration, conformal_quantile, engineer_features_batch,
+                          interval_path, load_xgb_price_model, uses_recent_form, xgb_predict_log_prices)
+
+SEED = 42
+
+# (name, estimator factory, parameter grid); each fit runs single-threaded, joblib spreads the tasks
+CANDIDATES = [
+    ("Ridge", lambda **params: Ridge(**params),
+     [{"alpha": alpha} for alpha in (0.1, 1.0, 10.0, 100.0)]),
+    ("LightGBM", lambda **params: lightgbm.LGBMRegressor(random_state=SEED, n_jobs=1, verbose=-1, **params),
+     [{"n_estimators": n, "learning_rate": 0.05, "num_leaves": leaves, "min_child_samples": 10}
+      for n in (200, 500) for leaves in (7, 15)]),
+    ("XGBoost", lambda **params: xgboost.XGBRegressor(random_state=SEED, n_jobs=1, **params),
+     [{"n_estimators": n, "learning_rate": 0.05, "max_depth": depth, "subsample": 0.8}
+      for n in (200, 500) for depth in (3, 5)]),
+]
+FACTORIES = {name: factory for name, factory, _ in CANDIDATES}
+
+
+def load_training_data(path, price_column):
+    """CSV -> (raw player frame, log1p price target). Missing stats count as 0, like the form."""
+    data = pd.read_csv(path)
+    missing = [field for field in RAW_PLAYER_FIELDS + [price_column] if field not in data.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    data = data.dropna(subset=[price_column])
+    fields = RAW_PLAYER_FIELDS + (FORM_FIELDS if all(field in data.columns for field in FORM_FIELDS) else [])
+    players = data[fields].copy()
+    numeric = [field for field in fields if field not in ('country', 'role')]
+    players[numeric] = players[numeric].apply(pd.to_numeric, errors='coerce').fillna(0)
+    players['country'] = players['country'].fillna('').astype(str)
+    players['role'] = players['role'].fillna('').astype(str).str.lower()
+    return players.reset_index(drop=True), np.log1p(data[price_column].to_numpy(dtype=np.float64))
+
+
+def fit_fold(name, params, fold, X, y, train_index, test_index):
+    start = time.perf_counter()
+    model = FACTORIES[name](**params).fit(X[train_index], y[train_index])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predicted = model.predict(X[test_index])
+    predict_seconds = time.perf_counter() - start
+    errors = predicted - y[test_index]
+    return errors, {
+        'model': name,
+        'params': json.dumps(params, sort_keys=True),
+        'fold': fold,
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'mae': float(np.mean(np.abs(errors))),
+        'fit ms': round(fit_seconds * 1000, 2),
+        'predict ms': round(predict_seconds * 1000, 2),
+    }
+
+
+def cross_validate(X, y, folds, jobs, models):
+    """Per-fold scores plus each candidate's out-of-fold residuals, keyed by (model, params)."""
+    splits = list(KFold(folds, shuffle=True, random_state=SEED).split(X))
+    tasks = [delayed(fit_fold)(name, params, fold, X, y, train_index, test_index)
+             for name, _, grid in CANDIDATES if name in models for params in grid
+             for fold, (train_index, test_index) in enumerate(splits)]
+    results = Parallel(n_jobs=jobs)(tasks)
+    residuals = {}
+    for errors, row in results:
+        residuals.setdefault((row['model'], row['params']), []).append(errors)
+    return pd.DataFrame([row for _, row in results]), {key: np.concatenate(parts) for key, parts in residuals.items()}
+
+
+def summarize(fold_results):
+    return (fold_results.groupby(['model', 'params'], sort=False)
+            .agg(rmse=('rmse', 'mean'), rmse_std=('rmse', 'std'), mae=('mae', 'mean'),
+                 fit_ms=('fit ms', 'sum'), predict_ms=('predict ms', 'sum'))
+            .reset_index().sort_values('rmse', kind='stable'))
+
+
+def data_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def train(csv_path, price_column='price', folds=5, jobs=-1, output_dir='artifacts', models=tuple(FACTORIES)):
+    players, y = load_training_data(csv_path, price_column)
+    if len(players) < folds:
+        raise ValueError(f"Need at least {folds} priced players, got {len(players)}")
+
+    recent_form = all(field in players for field in FORM_FIELDS)
+    start = time.perf_counter()
+    X = engineer_features_batch(players, recent_form)
+    feature_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fold_results, residuals = cross_validate(X, y, folds, jobs, models)
+    search_seconds = time.perf_counter() - start
+    summary = summarize(fold_results)
+
+    best = summary.iloc[0]
+    best_params = json.loads(best['params'])
+    calibration = conformal_calibration(residuals[(best['model'], best['params'])])
+    start = time.perf_counter()
+    model = FACTORIES[best['model']](**best_params).fit(X, y)
+    refit_seconds = time.perf_counter() - start
+
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    run_dir = os.path.join(output_dir, version)
+    os.makedirs(run_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(run_dir, 'price_model.pkl'))
+    joblib.dump(calibration, interval_path(os.path.join(run_dir, 'price_model.pkl')))
+    joblib.dump(FORM_FEATURE_COLUMNS if recent_form else FEATURE_COLUMNS, os.path.join(run_dir, 'feature_columns.pkl'))
+    metadata = {
+        'version': version,
+        'data': {'path': os.path.abspath(csv_path), 'sha256': data_hash(csv_path), 'rows': len(players),
+                 'price_column': price_column, 'target': 'log1p(price in crore)',
+                 'form_momentum': 'recent' if recent_form else 'career'},
+        'best': {'model': best['model'], 'params': best_params, 'cv_rmse': float(best['rmse'])},
+        'interval_half_widths': {f"{level:.0%}": conformal_quantile(calibration, level) for level in INTERVAL_LEVELS},
+        'folds': folds,
+        'seconds': {'features': feature_seconds, 'search': search_seconds, 'refit': refit_seconds},
+        'versions': {'scikit-learn': sklearn.__version__, 'lightgbm': lightgbm.__version__,
+                     'xgboost': xgboost.__version__, 'numpy': np.__version__},
+        'cv': summary.to_dict(orient='records'),
+        'fold_results': fold_results.to_dict(orient='records'),
+    }
+    with open(os.path.join(run_dir, 'metadata.json'), 'w') as handle:
+        json.dump(metadata, handle, indent=2)
+    return run_dir, model, summary, fold_results, metadata
+
+
+def promote(run_dir, model):
+    """Install a linear winner as the app's ipl_price_model.pkl / feature_columns.pkl."""
+    if not hasattr(model, 'coef_'):
+        raise ValueError(f"{type(model).__name__} has no coef_; the app's price breakdown needs a linear model")
+    shutil.copyfile(os.path.join(run_dir, 'price_model.pkl'), 'ipl_price_model.pkl')
+    shutil.copyfile(interval_path(os.path.join(run_dir, 'price_model.pkl')), interval_path('ipl_price_model.pkl'))
+    shutil.copyfile(os.path.join(run_dir, 'feature_columns.pkl'), 'feature_columns.pkl')
+
+
+def calibrate(model_path, csv_path, price_column='price'):
+    """Write model_path's conformal calibration from its residuals on a priced hold-out CSV.
+
+    Works for any regressor on the engineered features (log1p crore target) and for the
+    XGBoost pipeline (log rupee target); no coef_ is needed. Returns the calibration.
+    """
+    players, y = load_training_data(csv_path, price_column)
+    model = joblib.load(model_path)
+    if hasattr(model, 'steps'):
+        log_prices = xgb_predict_log_prices(load_xgb_price_model(model_path), players)
+        y = np.log(np.expm1(y) * RUPEES_PER_CRORE)
+    else:
+        columns_path = os.path.join(os.path.dirname(model_path), 'feature_columns.pkl')
+        recent_form = os.path.exists(columns_path) and uses_recent_form(joblib.load(columns_path))
+        X = engineer_features_batch(players, recent_form)
+        log_prices = model.predict(pd.DataFrame(X, columns=model.feature_names_in_)
+                                   if hasattr(model, 'feature_names_in_') else X)
+    calibration = conformal_calibration(log_prices - y)
+    joblib.dump(calibration, interval_path(model_path))
+    return calibration
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv", help="player/price CSV with the raw predictor fields")
+    parser.add_argument("--price-column", default="price", help="price in crore")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel CV tasks (-1 = all cores)")
+    parser.add_argument("--output-dir", default="artifacts")
+    parser.add_argument("--models", nargs="+", choices=list(FACTORIES), default=list(FACTORIES))
+    parser.add_argument("--promote", action="store_true", help="install a linear winner for the app")
+    parser.add_argument("--calibrate", metavar="MODEL",
+                        help="skip training; calibrate MODEL's intervals on the CSV as a hold-out set")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        calibration = calibrate(args.calibrate, args.csv, args.price_column)
+        print(f"{len(calibration['abs_residuals'])} hold-out residuals -> {interval_path(args.calibrate)}")
+        print("interval half-widths (log price): " + ", ".join(
+            f"{level:.0%} ±{conformal_quantile(calibration, level):.3f}" for level in INTERVAL_LEVELS))
+        raise SystemExit
+
+    run_dir, model, summary, fold_results, metadata = train(args.csv, args.price_column, args.folds, args.jobs,
+                                                             args.output_dir, args.models)
+    pd.set_option('display.max_colwidth', 80)
+    pd.set_option('display.width', 200)
+    print(fold_results.to_string(index=False))
+    print()
+    print(summary.round(4).to_string(index=False))
+    seconds = metadata['seconds']
+    print(f"\nfeatures {seconds['features'] * 1000:.1f} ms | search {seconds['search']:.1f} s "
+          f"| refit {seconds['refit'] * 1000:.1f} ms")
+    print(f"best: {metadata['best']['model']} {metadata['best']['params']} "
+          f"(CV RMSE {metadata['best']['cv_rmse']:.4f}) -> {run_dir}")
+    print("interval half-widths (log price): " + ", ".join(
+        f"{level} ±{width:.3f}" for level, width in metadata['interval_half_widths'].items()))
+    if args.promote:
+        try:
+            promote(run_dir, model)
+        except ValueError as e:
+            parser.error(f"{e} (use --models Ridge to promote)")
+        print("promoted to ipl_price_model.pkl / ipl_price_model_intervals.pkl / feature_columns.pkl")